@@ -1,28 +1,49 @@
 from flask import Flask
+from app.utils.json_provider import FastJSONProvider
 
 app = Flask(__name__)
+app.config.from_prefixed_env()
+app.json = FastJSONProvider(app)
 
-import redis
+from app.utils.backends import create_redis, connect_mongo
 
-redis_connection = redis.Redis(host="localhost", port=6379, decode_responses=True)
+redis_connection = create_redis(app.config)
 
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from app.utils.errors import rate_limit_exeeded
+from app.api import user_bp, list_bp, admin_bp
+from app.utils.sharding import shard_audit
+from app.utils.access_log import query_tracer
 
-limiter = Limiter(
-    key_func=get_remote_address,
-    app=app,
-    storage_uri="redis://127.0.0.1:6379",
-    on_breach=rate_limit_exeeded,
-)
+event_listeners = [query_tracer]
+if app.config.get("SHARD_AUDIT_ENABLED"):
+    event_listeners.append(shard_audit)
+# the client connects on its first operation instead of at import
+connect_mongo(app.config, event_listeners)
 
-from app.api import user_bp, list_bp
-import mongoengine as me
 
+from app.utils.ids import IdConverter
 
-me.connect("Kadoostan")
-
+app.url_map.converters["id"] = IdConverter
 
 app.register_blueprint(user_bp, url_prefix="/api/user")
 app.register_blueprint(list_bp, url_prefix="/api/list")
+app.register_blueprint(admin_bp, url_prefix="/api/admin")
+
+from app.utils.access_log import setup_access_log, start_access_log, log_access
+from app.utils.profiling import start_profiling, stop_profiling
+from app.utils.compression import compress_response
+
+if app.config.get("ACCESS_LOG_ENABLED", True):
+    setup_access_log(app)
+app.before_request(start_access_log)
+app.before_request(start_profiling)
+app.teardown_request(stop_profiling)
+# hooks run in reverse order, the access log sees the compressed size
+app.after_request(log_access)
+app.after_request(compress_response)
+
+from app.cli import export_cli, import_cli, jobs_cli, shard_cli
+
+app.cli.add_command(export_cli)
+app.cli.add_command(import_cli)
+app.cli.add_command(jobs_cli)
+app.cli.add_command(shard_cli)
@@ -1,2 +1,3 @@
 from app.api.users import user_bp
 from app.api.lists import list_bp
+from app.api.admin import admin_bp
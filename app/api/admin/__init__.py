@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+
+admin_bp = Blueprint("admin_bp", __name__)
+
+from . import api
@@ -0,0 +1,162 @@
+from app.api.admin import admin_bp
+from flask import request, Response
+from app.schemas import ProfilingSchema
+from app.utils.errors import error_response
+from app.utils.response import make_response
+from app.utils.auth import token_auth
+from app.utils.profiling import profiler
+from app.utils.user_cache import user_cache
+from app.utils.validation import validate, ValidationError
+
+
+@admin_bp.route("/profiling", methods=["POST"])
+@token_auth.check_admin
+def start_profiling():
+    """
+    @api {post} /api/admin/profiling Start Profiling
+    @apiName StartProfiling
+    @apiGroup Admin
+    @apiHeader {String} Authorization Authorization token of an admin.
+
+    @apiBody {Number} seconds Profile requests for this many seconds, at most 3600
+    @apiBody {String} [header] Only profile requests sending this header
+    @apiBody {String} [value] Only profile requests sending the header with this value
+
+    @apiSuccess {Number} until End of profiling as a unix timestamp
+    @apiSuccess {String} header Header profiled requests must send
+    @apiSuccess {String} value Value of the header
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        {
+            "header": "X-Profile",
+            "until": 1704139096.043,
+            "value": "1"
+        }
+
+    @apiError (Bad Request 400) BadRequest Invalid data sent by user.
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Forbidden 403) Forbidden the user is not an admin.
+    """
+    data = request.get_json() or {}
+    try:
+        validate(data, ProfilingSchema)
+    except ValidationError:
+        return error_response(400)
+
+    settings = profiler.start(data["seconds"], data.get("header"), data.get("value"))
+    return make_response(data=settings, status_code=200)
+
+
+@admin_bp.route("/profiling", methods=["GET"])
+@token_auth.check_admin
+def get_profiling():
+    """
+    @api {get} /api/admin/profiling Get Profiling Status
+    @apiName GetProfiling
+    @apiGroup Admin
+    @apiHeader {String} Authorization Authorization token of an admin.
+
+    @apiSuccess {Object} settings Current profiling settings, null when stopped
+    @apiSuccess {Object} endpoints Number of samples per endpoint
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        {
+            "endpoints": {
+                "list_bp.create_gift": 412,
+                "user_bp.get_spicific_list_gifts_by_user_id": 96
+            },
+            "settings": {
+                "header": null,
+                "until": 1704139096.043,
+                "value": null
+            }
+        }
+
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Forbidden 403) Forbidden the user is not an admin.
+    """
+    response_data = {
+        "settings": profiler.get_settings(),
+        "endpoints": profiler.sample_counts(),
+    }
+    return make_response(data=response_data, status_code=200)
+
+
+@admin_bp.route("/profiling", methods=["DELETE"])
+@token_auth.check_admin
+def stop_profiling():
+    """
+    @api {delete} /api/admin/profiling Stop Profiling
+    @apiName StopProfiling
+    @apiGroup Admin
+    @apiHeader {String} Authorization Authorization token of an admin.
+
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Forbidden 403) Forbidden the user is not an admin.
+    """
+    profiler.stop()
+    return make_response(status_code=200)
+
+
+@admin_bp.route("/profiling/<endpoint>", methods=["GET"])
+@token_auth.check_admin
+def get_profile(endpoint):
+    """
+    @api {get} /api/admin/profiling/:endpoint Get Endpoint Profile
+    @apiName GetProfile
+    @apiGroup Admin
+    @apiHeader {String} Authorization Authorization token of an admin.
+
+    @apiParam {String} endpoint Endpoint name, e.g. list_bp.create_gift
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        Content-Type: text/plain
+
+        werkzeug.serving:...;app.api.lists.api:create_gift;... 17
+
+    @apiDescription Samples in the folded stack format, one stack per line
+    followed by its count, as read by flamegraph.pl and speedscope.
+
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Forbidden 403) Forbidden the user is not an admin.
+    @apiError (Not found 404) NotFound No samples for the endpoint.
+    """
+    folded = profiler.folded(endpoint)
+    if folded is None:
+        return error_response(404)
+    return Response(folded, mimetype="text/plain")
+
+
+@admin_bp.route("/user-cache", methods=["GET"])
+@token_auth.check_admin
+def get_user_cache_stats():
+    """
+    @api {get} /api/admin/user-cache Get User Cache Statistics
+    @apiName GetUserCacheStats
+    @apiGroup Admin
+    @apiHeader {String} Authorization Authorization token of an admin.
+
+    @apiDescription Counters of the process serving the request since it
+    started, every worker process keeps its own.
+
+    @apiSuccess {Number} local_hits Users found in the process cache
+    @apiSuccess {Number} redis_hits Users found in Redis
+    @apiSuccess {Number} misses Users read from MongoDB
+    @apiSuccess {Number} local_entries Users held in the process cache
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        {
+            "local_entries": 118,
+            "local_hits": 5210,
+            "misses": 131,
+            "redis_hits": 342
+        }
+
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Forbidden 403) Forbidden the user is not an admin.
+    """
+    return make_response(data=user_cache.get_stats(), status_code=200)
@@ -1,9 +1,8 @@
 from app.api.lists import list_bp
-from flask import request
+from flask import request, Response, stream_with_context
 from app.models import List, Gift
 from mongoengine.queryset.visitor import Q
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
+from app.utils.validation import validate, ValidationError
 from app.schemas import (
     ListSchema,
     GiftSchema,
@@ -12,7 +11,19 @@ from app.utils.errors import error_response
 from app.utils.response import make_response
 from app.utils.auth import token_auth
 from app.utils.pagination import get_paginated_data
-import uuid
+from app.utils.export import iter_user_export, gzip_stream
+from app.utils.cascade import delete_list_cascade
+from app.utils.fields import parse_fields, LIST_FIELDS, GIFT_FIELDS
+from app.utils.filters import parse_gift_filters
+from app.utils.events import list_events
+from app.utils.ids import new_id
+from app.utils.feed import list_feed
+from app.utils.sync import (
+    sync_write,
+    record_gift_deletion,
+    parse_sync_token,
+    get_list_changes,
+)
 
 
 @list_bp.route("", methods=["GET"])
@@ -26,6 +37,7 @@ def get_lists():
 
     @apiQuery {Number} [page] page in pagination
     @apiQuery {Number} [per_page] items per page
+    @apiQuery {String} [fields] comma separated list fields to return
 
     @apiSuccess {Object[]} items User lists
     @apiSuccess {Object} pagination pagination metadata
@@ -55,15 +67,22 @@ def get_lists():
             }
         }
 
+    @apiError (Bad Request 400) BadRequest Invalid fields.
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound invalid pagination parameters.
 
     """
     user = token_auth.current_user()
+    try:
+        fields = parse_fields(LIST_FIELDS)
+    except ValueError:
+        return error_response(400)
+
     paginated_data = get_paginated_data(
         model=List,
         query=Q(user=user),
         endpoint="list_bp.get_lists",
+        fields=fields,
     )
     if paginated_data is None:
         return error_response(404)
@@ -102,7 +121,7 @@ def create_list():
     user = token_auth.current_user()
     data = request.get_json() or {}
     try:
-        validate(data, ListSchema.get_schema())
+        validate(data, ListSchema)
     except ValidationError:
         return error_response(400)
 
@@ -110,15 +129,56 @@ def create_list():
         return error_response(409)
 
     gift_list = List()
-    data["id"] = str(uuid.uuid4())
+    data["id"] = new_id()
     data["user"] = user
     gift_list.from_dict(data)
     gift_list.save()
+    list_feed.publish(user.id, gift_list.id)
     response_data = gift_list.to_dict()
     return make_response(data=response_data, status_code=201)
 
 
-@list_bp.route("/<string:list_id>", methods=["GET"])
+@list_bp.route("/export", methods=["GET"])
+@token_auth.check_login
+def export_lists():
+    """
+    @api {get} /api/list/export Export Lists
+    @apiName ExportLists
+    @apiGroup List
+    @apiHeader {String} Authorization Authorization token.
+
+    @apiQuery {String} [after] resume the export after the list with this ID
+    @apiQuery {String="gzip"} [compression] compress the exported stream
+
+    @apiSuccess {Object} list one line per list, followed by its gifts
+    @apiSuccess {Object} gift one line per gift in the preceding list
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        {"type":"list","id":"80af7f76-08e2-4db4-a8e2-41d202d6ec14","name":"birthday","created_at":"2024-01-03T21:44:25.197000"}
+        {"type":"gift","id":"cc3f4578-29cd-41df-9bc1-130eeb5b4eab","list":"80af7f76-08e2-4db4-a8e2-41d202d6ec14","name":"gift1","price":100,"link":null,"expected_buyer":null,"created_at":"2024-01-03T22:04:53.627000"}
+
+    @apiError (Bad Request 400) BadRequest Invalid compression.
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    """
+    user = token_auth.current_user()
+    parameters = request.args
+    after = parameters.get("after", None, str)
+    compression = parameters.get("compression", None, str)
+    if compression not in (None, "gzip"):
+        return error_response(400)
+
+    lines = iter_user_export(user, after=after)
+    if compression == "gzip":
+        return Response(
+            stream_with_context(gzip_stream(lines)),
+            mimetype="application/gzip",
+            headers={"Content-Disposition": "attachment; filename=export.ndjson.gz"},
+        )
+    return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+
+@list_bp.route("/<id:list_id>", methods=["GET"])
 @token_auth.check_login
 def get_specific_list(list_id):
     """
@@ -128,6 +188,8 @@ def get_specific_list(list_id):
     @apiHeader {String} Authorization Authorization token.
 
     @apiParam {String} list_id Gift list ID
+    @apiQuery {String} [fields] comma separated list fields to return, gifts included
+    @apiQuery {String} [gift_fields] comma separated gift fields to return
 
     @apiSuccess {String} created_at List creation date in ISOformat
     @apiSuccess {String} id gift list id
@@ -151,24 +213,130 @@ def get_specific_list(list_id):
             "id": "80af7f76-08e2-4db4-a8e2-41d202d6ec14",
             "name": "birthday"
         }
+    @apiError (Bad Request 400) BadRequest Invalid fields.
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound List not found.
     """
     user = token_auth.current_user()
-    list = List.objects(id=list_id, user=user).first()
+    try:
+        fields = parse_fields(LIST_FIELDS + ("gifts",))
+        gift_fields = parse_fields(GIFT_FIELDS, parameter="gift_fields")
+    except ValueError:
+        return error_response(400)
+
+    lists = List.objects(id=list_id, user=user)
+    if fields is not None:
+        lists = lists.only("id", *[field for field in fields if field != "gifts"])
+    list = lists.first()
     if list is None:
         return error_response(404)
 
-    gifts = [gift.to_dict() for gift in Gift.objects(list=list)]
+    response_data = list.to_dict(fields=fields)
+    if fields is None or "gifts" in fields:
+        gifts = Gift.objects(list=list)
+        if gift_fields is not None:
+            gifts = gifts.only(*gift_fields)
+        response_data["gifts"] = [gift.to_dict(fields=gift_fields) for gift in gifts]
+    return make_response(data=response_data, status_code=200)
+
+
+@list_bp.route("/<id:list_id>/changes", methods=["GET"])
+@token_auth.check_login
+def get_list_changes_since(list_id):
+    """
+    @api {get} /api/list/:list_id/changes Get List changes
+    @apiName GetListChanges
+    @apiGroup List
+    @apiHeader {String} Authorization Authorization token.
+
+    @apiParam {String} list_id List ID
+    @apiQuery {String} [since] sync token of the previous call
+
+    @apiSuccess {Object} list the list
+    @apiSuccess {Object[]} gifts gifts created or changed since the sync token
+    @apiSuccess {String[]} deleted IDs of gifts deleted since the sync token
+    @apiSuccess {Boolean} reset gifts contains the whole list, drop local copy
+    @apiSuccess {String} sync_token token to send in the next call
 
-    response_data = {
-        **list.to_dict(),
-        "gifts": gifts,
-    }
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        {
+            "deleted": [
+                "2751f793-f243-4bc7-8984-0aa8cc5e086d"
+            ],
+            "gifts": [
+                {
+                    "created_at": "2024-01-03T22:04:53.627000",
+                    "expected_buyer": null,
+                    "id": "cc3f4578-29cd-41df-9bc1-130eeb5b4eab",
+                    "link": null,
+                    "name": "gift1",
+                    "price": 100
+                }
+            ],
+            "list": {
+                "created_at": "2024-01-03T21:44:25.197000",
+                "id": "80af7f76-08e2-4db4-a8e2-41d202d6ec14",
+                "name": "birthday"
+            },
+            "reset": false,
+            "sync_token": "12.1704318293"
+        }
+
+    @apiError (Bad Request 400) BadRequest Invalid sync token.
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Not found 404) NotFound List not found.
+    """
+    user = token_auth.current_user()
+    try:
+        since = parse_sync_token(request.args.get("since", None, str))
+    except ValueError:
+        return error_response(400)
+
+    list = List.objects(id=list_id, user=user).first()
+    if list is None:
+        return error_response(404)
+
+    response_data = get_list_changes(list, since)
     return make_response(data=response_data, status_code=200)
 
 
-@list_bp.route("/<string:list_id>", methods=["PUT"])
+@list_bp.route("/<id:list_id>/events", methods=["GET"])
+@token_auth.check_login
+def get_list_events(list_id):
+    """
+    @api {get} /api/list/:list_id/events Subscribe to List events
+    @apiName GetListEvents
+    @apiGroup List
+    @apiHeader {String} Authorization Authorization token.
+
+    @apiParam {String} list_id List ID
+
+    @apiDescription Server-sent events stream of the list. Event types are
+    gift_created, gift_updated, gift_reserved, gift_unreserved, gift_deleted,
+    list_updated and list_deleted, data is the changed gift or list.
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        event: list_deleted
+        data: {"id":"80af7f76-08e2-4db4-a8e2-41d202d6ec14"}
+
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Not found 404) NotFound List not found.
+    """
+    user = token_auth.current_user()
+    list = List.objects(id=list_id, user=user).only("id").first()
+    if list is None:
+        return error_response(404)
+
+    return Response(
+        list_events.stream(list.id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@list_bp.route("/<id:list_id>", methods=["PUT"])
 @token_auth.check_login
 def update_list(list_id):
     """
@@ -203,7 +371,7 @@ def update_list(list_id):
         return error_response(404)
     data = request.get_json() or {}
     try:
-        validate(data, ListSchema.get_schema())
+        validate(data, ListSchema)
     except ValidationError:
         return error_response(400)
 
@@ -212,12 +380,15 @@ def update_list(list_id):
             return error_response(409)
 
     list.from_dict(data, new_obj=False)
-    list.save()
+    # Document.save() would dereference the user to build the shard key
+    List.objects(id=list.id, user=user).update_one(set__name=list.name)
+    list_feed.publish(user.id, list.id)
     response_data = list.to_dict()
+    list_events.publish(list.id, "list_updated", response_data)
     return make_response(data=response_data, status_code=200)
 
 
-@list_bp.route("/<string:list_id>", methods=["DELETE"])
+@list_bp.route("/<id:list_id>", methods=["DELETE"])
 @token_auth.check_login
 def delete_list(list_id):
     """
@@ -236,11 +407,13 @@ def delete_list(list_id):
     if list is None:
         return error_response(404)
 
-    list.delete()
+    delete_list_cascade(list.id, user.id)
+    list_feed.remove(user.id, list.id)
+    list_events.publish(list.id, "list_deleted", {"id": list.id})
     return make_response(status_code=200)
 
 
-@list_bp.route("/<string:list_id>/gift", methods=["GET"])
+@list_bp.route("/<id:list_id>/gift", methods=["GET"])
 @token_auth.check_login
 def get_list_gifts(list_id):
     """
@@ -250,6 +423,12 @@ def get_list_gifts(list_id):
     @apiHeader {String} Authorization Authorization token.
 
     @apiParam {String} list_id List ID
+    @apiQuery {String} [fields] comma separated gift fields to return
+    @apiQuery {String="price","-price","created_at","-created_at","name","-name"} [sort]
+        sort gifts, descending with a leading -
+    @apiQuery {Boolean} [reserved] only reserved or unreserved gifts
+    @apiQuery {Number} [min_price] minimum gift price
+    @apiQuery {Number} [max_price] maximum gift price
 
     @apiSuccess {Object[]} items a list of gifts
     @apiSuccess {Object} pagination pagination metadata
@@ -277,21 +456,31 @@ def get_list_gifts(list_id):
             }
         }
 
+    @apiError (Bad Request 400) BadRequest Invalid fields, filters or sort.
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound List not found or invalid pagination parameters.
     """
     user = token_auth.current_user()
-    list = List.objects(id=list_id, user=user).first()
+    try:
+        fields = parse_fields(GIFT_FIELDS)
+        filters, order_by, filter_params = parse_gift_filters()
+    except ValueError:
+        return error_response(400)
+
+    list = List.objects(id=list_id, user=user).only("id").first()
     if list is None:
         return error_response(404)
 
     paginated_data = get_paginated_data(
         model=Gift,
-        query=Q(list=list),
+        query=Q(list=list) & filters,
         endpoint="list_bp.get_list_gifts",
         endpoint_params={
             "list_id": list_id,
+            **filter_params,
         },
+        fields=fields,
+        order_by=order_by,
     )
     if paginated_data is None:
         return error_response(404)
@@ -299,7 +488,7 @@ def get_list_gifts(list_id):
     return make_response(data=paginated_data, status_code=200)
 
 
-@list_bp.route("/<string:list_id>/gift", methods=["POST"])
+@list_bp.route("/<id:list_id>/gift", methods=["POST"])
 @token_auth.check_login
 def create_gift(list_id):
     """
@@ -315,7 +504,8 @@ def create_gift(list_id):
     @apiBody {String} [link] gift link
 
     @apiSuccess (Created 201) {String} created_at creation date in ISOformat
-    @apiSuccess (Created 201) {Object} expected_buyer data of User who wants to buy the gift
+    @apiSuccess (Created 201) {Object} expected_buyer data of User who wants to
+        buy the gift
     @apiSuccess (Created 201) {String} id Gift ID
     @apiSuccess (Created 201) {String} link Gift link
     @apiSuccess (Created 201) {String} name Gift name
@@ -343,21 +533,25 @@ def create_gift(list_id):
 
     data = request.get_json() or {}
     try:
-        validate(data, GiftSchema.get_schema())
+        validate(data, GiftSchema)
     except ValidationError:
         return error_response(400)
 
     gift = Gift()
-    data["id"] = str(uuid.uuid4())
+    data["id"] = new_id()
     data["list"] = gift_list
     gift.from_dict(data)
-    gift.save()
+    with sync_write(gift_list.id, user.id) as sync_version:
+        gift.sync_version = sync_version
+        gift.save()
+    list_feed.publish(user.id, gift_list.id)
 
     response_data = gift.to_dict()
+    list_events.publish(gift_list.id, "gift_created", response_data)
     return make_response(data=response_data, status_code=201)
 
 
-@list_bp.route("/<string:list_id>/gift/<string:gift_id>", methods=["GET"])
+@list_bp.route("/<id:list_id>/gift/<id:gift_id>", methods=["GET"])
 @token_auth.check_login
 def get_specific_gift(list_id, gift_id):
     """
@@ -368,6 +562,7 @@ def get_specific_gift(list_id, gift_id):
 
     @apiParam {String} list_id List ID
     @apiParam {String} gift_id Gift ID
+    @apiQuery {String} [fields] comma separated gift fields to return
 
     @apiSuccess {String} id Gift ID
     @apiSuccess {String} name gift name
@@ -393,22 +588,31 @@ def get_specific_gift(list_id, gift_id):
             "price": 100
         }
 
+    @apiError (Bad Request 400) BadRequest Invalid fields.
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound resources with provided data not found.
     """
     user = token_auth.current_user()
-    gift_list = List.objects(id=list_id, user=user).first()
+    try:
+        fields = parse_fields(GIFT_FIELDS)
+    except ValueError:
+        return error_response(400)
+
+    gift_list = List.objects(id=list_id, user=user).only("id").first()
     if gift_list is None:
         return error_response(404)
-    gift = Gift.objects(id=gift_id, list=gift_list).first()
+    gifts = Gift.objects(id=gift_id, list=gift_list)
+    if fields is not None:
+        gifts = gifts.only(*fields)
+    gift = gifts.first()
     if gift is None:
         return error_response(404)
 
-    response_data = gift.to_dict()
+    response_data = gift.to_dict(fields=fields)
     return make_response(data=response_data, status_code=200)
 
 
-@list_bp.route("/<string:list_id>/gift/<string:gift_id>", methods=["PUT"])
+@list_bp.route("/<id:list_id>/gift/<id:gift_id>", methods=["PUT"])
 @token_auth.check_login
 def update_gift(list_id, gift_id):
     """
@@ -461,17 +665,25 @@ def update_gift(list_id, gift_id):
 
     data = request.get_json() or {}
     try:
-        validate(data, GiftSchema.get_schema())
+        validate(data, GiftSchema)
     except ValidationError:
         return error_response(400)
 
     gift.from_dict(data, new_obj=False)
-    gift.save()
+    # Document.save() would dereference the list to build the shard key
+    editable = ("name", "price", "link")
+    updates = {f"set__{field}": data[field] for field in editable if field in data}
+    with sync_write(list.id, user.id) as sync_version:
+        gift.sync_version = sync_version
+        Gift.objects(id=gift.id, list=list).update_one(
+            set__sync_version=sync_version, **updates
+        )
     response_data = gift.to_dict()
+    list_events.publish(list.id, "gift_updated", response_data)
     return make_response(data=response_data, status_code=200)
 
 
-@list_bp.route("/<string:list_id>/gift/<string:gift_id>", methods=["DELETE"])
+@list_bp.route("/<id:list_id>/gift/<id:gift_id>", methods=["DELETE"])
 @token_auth.check_login
 def delete_gift(list_id, gift_id):
     """
@@ -494,5 +706,8 @@ def delete_gift(list_id, gift_id):
     if gift is None:
         return error_response(404)
 
-    gift.delete()
+    record_gift_deletion(gift, list.id, user.id)
+    # Document.delete() would dereference the list to build the shard key
+    Gift.objects(id=gift.id, list=list).delete()
+    list_events.publish(list.id, "gift_deleted", {"id": gift.id})
     return make_response(status_code=200)
@@ -1,23 +1,37 @@
 from app.api.users import user_bp
 from app.models import User, List, Gift, Token
 from mongoengine.queryset.visitor import Q
-from flask import request
-from jsonschema import validate
+from flask import request, current_app, Response, g
 from app.schemas import (
     EditUserSchema,
     LoginCodeSchema,
     LoginSchema,
+    GiftBatchSchema,
+    ReservationBatchSchema,
 )
 from app.utils.errors import error_response
 from app.utils.response import make_response
-from app.utils.pagination import get_paginated_data
+from app.utils.pagination import get_paginated_data, compute_range
 from app.utils.auth import token_auth
-from jsonschema.exceptions import ValidationError
-from app import limiter
-import uuid
+from app.utils.jobs import job_queue
+from app.utils.user_cache import user_cache
+from app.utils.fields import parse_fields, LIST_FIELDS, GIFT_FIELDS
+from app.utils.filters import parse_gift_filters
+from app.utils.events import list_events
+from app.utils.ids import new_id
+from app.utils.singleflight import single_flight
+from app.utils.reservations import apply_reservations, RESERVED
+from app.utils.sync import sync_write, parse_sync_token, get_list_changes
+from app.utils.validation import validate, ValidationError
+from app.utils.ratelimit import limiter, keys
+from app.utils.feed import list_feed, MAX_FEED_PAGE_SIZE
+from datetime import datetime
 
 
 @user_bp.route("/auth/login/code", methods=["POST"])
+@limiter.limit("20/minute", key_func=keys.remote_address)
+@limiter.limit("3/minute", key_func=keys.phone_number)
+@limiter.limit("10/hour", key_func=keys.phone_number)
 def get_login_code():
     """
     @api {post} /api/user/auth/login/code Receive login code
@@ -27,10 +41,11 @@ def get_login_code():
     @apiBody {string} phone_number User phone number
 
     @apiError (Bad Request 400) BadRequest Invalid data sent by user.
+    @apiError (Too Many Requests 429) TooManyRequests rate limit exceeded.
     """
     data = request.get_json() or {}
     try:
-        validate(data, LoginCodeSchema.get_schema())
+        validate(data, LoginCodeSchema)
     except ValidationError:
         return error_response(400)
 
@@ -38,7 +53,7 @@ def get_login_code():
     user = User.objects(phone_number=phone_number).first()
     if user is None:
         user = User()
-        data["id"] = str(uuid.uuid4())
+        data["id"] = new_id()
         user.from_dict(data)
         user.save()
 
@@ -46,15 +61,19 @@ def get_login_code():
     if login_code is None:
         user.generate_and_save_login_code()
         login_code = user.get_login_code()
-    # this part is just for test
+    job_queue.enqueue("send_login_code", user.id, dedup_key=f"login_code:{user.id}")
+    # the code is only returned while no real SMS provider is configured
+    if current_app.config.get("SMS_PROVIDER", "fake") != "fake":
+        return make_response(status_code=200)
     response_data = {
         "login_code": login_code,
     }
-    ############################
     return make_response(data=response_data, status_code=200)
 
 
 @user_bp.route("/auth/login", methods=["POST"])
+@limiter.limit("30/minute", key_func=keys.remote_address)
+@limiter.limit("10/minute", key_func=keys.phone_number)
 def login():
     """
     @api {post} /api/user/auth/login Login
@@ -73,11 +92,12 @@ def login():
         }
     @apiError (Bad Request 400) BadRequest Invalid data sent by user.
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Too Many Requests 429) TooManyRequests rate limit exceeded.
 
     """
     data = request.get_json() or {}
     try:
-        validate(data, LoginSchema.get_schema())
+        validate(data, LoginSchema)
     except ValidationError:
         return error_response(400)
 
@@ -149,7 +169,7 @@ def get_user():
 
 
 # This endpoint is not needed. We can remove it.
-@user_bp.route("/<string:user_id>", methods=["GET"])
+@user_bp.route("/<id:user_id>", methods=["GET"])
 @token_auth.check_login
 def get_user_by_phone_number(user_id):
     """
@@ -195,7 +215,7 @@ def get_user_by_phone_number(user_id):
         response_data = current_user.to_dict(confidential_data=True)
         return make_response(data=response_data, status_code=200)
 
-    user = User.objects(id=user_id).first()
+    user = user_cache.get(user_id)
     if user is None:
         return error_response(404)
 
@@ -205,8 +225,8 @@ def get_user_by_phone_number(user_id):
 
 @user_bp.route("/search", methods=["GET"])
 @token_auth.check_login
-@limiter.limit("100/minute")
-@limiter.limit("1000/hour")
+@limiter.limit("100/minute", key_func=keys.token)
+@limiter.limit("1000/hour", key_func=keys.token)
 def search_user_by_phone_number():
     """
     @api {get} /api/user/search Search User by phone number
@@ -245,6 +265,7 @@ def search_user_by_phone_number():
 
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound User with provided phone number not found.
+    @apiError (Too Many Requests 429) TooManyRequests rate limit exceeded.
     """
     params = request.args
     phone_number = params.get("phone_number", None, str)
@@ -252,6 +273,7 @@ def search_user_by_phone_number():
     if user is None:
         return error_response(404)
 
+    list_feed.follow(token_auth.current_user().id, user.id)
     lists = [list.to_dict() for list in List.objects(user=user)]
     response_data = {
         **user.to_dict(),
@@ -260,7 +282,94 @@ def search_user_by_phone_number():
     return make_response(data=response_data, status_code=200)
 
 
-@user_bp.route("/<string:user_id>/list", methods=["GET"])
+@user_bp.route("/feed", methods=["GET"])
+@token_auth.check_login
+def get_feed():
+    """
+    @api {get} /api/user/feed Get Feed
+    @apiName GetFeed
+    @apiGroup User
+    @apiHeader {String} Authorization Authorization token.
+
+    @apiDescription Recently updated lists of the users the current user
+    searched for or bought from, newest first.
+
+    @apiQuery {Number} [page=1] page number
+    @apiQuery {Number} [per_page=10] number of lists per page, at most 50
+
+    @apiSuccess {Object[]} items Lists with their owner and update date
+    @apiSuccess {Object} pagination page and per_page of the response
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        {
+            "items": [
+                {
+                    "created_at": "2024-01-01T19:20:30.325000",
+                    "id": "01hn3kq2v8e6x4t5ag7n1r0c9d",
+                    "name": "birthday",
+                    "updated_at": "2024-01-05T08:12:44.518000",
+                    "user": {
+                        "first_name": "lex",
+                        "id": "01hn3kpz8w2m5r7c0v9t4y6e1a",
+                        "last_name": "fridman",
+                        "phone_number": "09000000000"
+                    }
+                }
+            ],
+            "pagination": {
+                "page": 1,
+                "per_page": 10
+            }
+        }
+
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Not found 404) NotFound invalid page.
+    """
+    current_user = token_auth.current_user()
+    page = request.args.get("page", 1, type=int)
+    per_page = min(request.args.get("per_page", 10, type=int), MAX_FEED_PAGE_SIZE)
+    start, stop = compute_range(page, per_page)
+    if start is None:
+        return error_response(404)
+
+    entries = list_feed.read(current_user.id, start, stop)
+    owner_ids = {owner_id for owner_id, _, _ in entries}
+    lists = {}
+    if entries:
+        # filtered on the owners, the shard key, so only their shards are read
+        lists = {
+            son["_id"]: son
+            for son in List.objects(
+                user__in=owner_ids, id__in=[list_id for _, list_id, _ in entries]
+            )
+            .only("id", "name", "created_at", "user")
+            .as_pymongo()
+        }
+    owners = {owner_id: user_cache.get(owner_id) for owner_id in owner_ids}
+    items, deleted = [], []
+    for owner_id, list_id, updated_at in entries:
+        son = lists.get(list_id)
+        if son is None or son["user"] != owner_id or owners[owner_id] is None:
+            deleted.append((owner_id, list_id))
+            continue
+        items.append(
+            {
+                **List._from_son(son, created=False).to_dict(),
+                "updated_at": datetime.utcfromtimestamp(updated_at),
+                "user": owners[owner_id].to_dict(),
+            }
+        )
+    # lists deleted since they were added to the feed
+    list_feed.discard(current_user.id, *deleted)
+    response_data = {
+        "items": items,
+        "pagination": {"page": page, "per_page": per_page},
+    }
+    return make_response(data=response_data, status_code=200)
+
+
+@user_bp.route("/<id:user_id>/list", methods=["GET"])
 @token_auth.check_login
 def get_lists_by_user_id(user_id):
     """
@@ -272,6 +381,7 @@ def get_lists_by_user_id(user_id):
     @apiParam {String} user_id User ID
     @apiQuery {Number} [page] page number
     @apiQuery {NUmber} [per_page] items per page
+    @apiQuery {String} [fields] comma separated list fields to return
 
     @apiSuccess {Object[]} items User lists
     @apiSuccess {Object} pagination pagination metadata
@@ -301,11 +411,17 @@ def get_lists_by_user_id(user_id):
             }
         }
 
+    @apiError (Bad Request 400) BadRequest Invalid fields.
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound User with provided ID not found
     or pagination parameters are not valid.
     """
-    user = User.objects(id=user_id).first()
+    try:
+        fields = parse_fields(LIST_FIELDS)
+    except ValueError:
+        return error_response(400)
+
+    user = user_cache.get(user_id)
     if user is None:
         return error_response(404)
 
@@ -316,6 +432,7 @@ def get_lists_by_user_id(user_id):
         endpoint_params={
             "user_id": user_id,
         },
+        fields=fields,
     )
     if paginated_data is None:
         return error_response(404)
@@ -323,7 +440,7 @@ def get_lists_by_user_id(user_id):
     return make_response(data=paginated_data, status_code=200)
 
 
-@user_bp.route("/<string:user_id>/list/<string:list_id>", methods=["GET"])
+@user_bp.route("/<id:user_id>/list/<id:list_id>", methods=["GET"])
 @token_auth.check_login
 def get_specific_list_by_user_id(user_id, list_id):
     """
@@ -334,6 +451,8 @@ def get_specific_list_by_user_id(user_id, list_id):
 
     @apiParam {string} user_id User ID
     @apiParam {String} list_id List ID
+    @apiQuery {String} [fields] comma separated list fields to return, gifts included
+    @apiQuery {String} [gift_fields] comma separated gift fields to return
 
     @apiSuccess {String} id list ID
     @apiSuccess {String} name list name
@@ -366,22 +485,164 @@ def get_specific_list_by_user_id(user_id, list_id):
             ],
         }
 
+    @apiError (Bad Request 400) BadRequest Invalid fields.
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Not found 404) NotFound List with provided data not found.
+    """
+    try:
+        fields = parse_fields(LIST_FIELDS + ("gifts",))
+        gift_fields = parse_fields(GIFT_FIELDS, parameter="gift_fields")
+    except ValueError:
+        return error_response(400)
+
+    user = user_cache.get(user_id)
+    if user is None:
+        return error_response(404)
+
+    def load_list():
+        lists = List.objects(id=list_id, user=user)
+        if fields is not None:
+            lists = lists.only("id", *[field for field in fields if field != "gifts"])
+        list = lists.first()
+        if list is None:
+            return None
+        data = list.to_dict(fields=fields)
+        if fields is None or "gifts" in fields:
+            gifts = Gift.objects(list=list)
+            if gift_fields is not None:
+                gifts = gifts.only(*gift_fields)
+            data["gifts"] = [gift.to_dict(fields=gift_fields) for gift in gifts]
+        return data
+
+    # a shared list is requested by many clients at once, concurrent
+    # requests for the same representation share one set of queries. Users
+    # who just wrote must read their own writes and skip the shared result.
+    if g.get("recent_write", False):
+        response_data = load_list()
+    else:
+        key = ":".join(
+            [
+                "list",
+                user.id,
+                list_id,
+                ",".join(fields or "*"),
+                ",".join(gift_fields or "*"),
+            ]
+        )
+        response_data = single_flight.do(key, load_list)
+    if response_data is None:
+        return error_response(404)
+    return make_response(data=response_data, status_code=200)
+
+
+@user_bp.route(
+    "/<id:user_id>/list/<id:list_id>/changes",
+    methods=["GET"],
+)
+@token_auth.check_login
+def get_list_changes_by_user_id(user_id, list_id):
+    """
+    @api {get} /api/user/:user_id/list/:list_id/changes Get List changes by User ID
+    @apiName GetListChangesByUserID
+    @apiGroup List
+    @apiHeader {String} Authorization Authorization token.
+
+    @apiParam {String} user_id User ID
+    @apiParam {String} list_id List ID
+    @apiQuery {String} [since] sync token of the previous call
+
+    @apiSuccess {Object} list the list
+    @apiSuccess {Object[]} gifts gifts created or changed since the sync token
+    @apiSuccess {String[]} deleted IDs of gifts deleted since the sync token
+    @apiSuccess {Boolean} reset gifts contains the whole list, drop local copy
+    @apiSuccess {String} sync_token token to send in the next call
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        {
+            "deleted": [],
+            "gifts": [
+                {
+                    "created_at": "2024-01-01T19:34:28.758000",
+                    "expected_buyer": null,
+                    "id": "130e9777-7186-4222-8d73-87727692674f",
+                    "link": null,
+                    "name": "gift1",
+                    "price": 100
+                }
+            ],
+            "list": {
+                "created_at": "2023-12-26T17:15:28.366000",
+                "id": "43a57473-e734-423c-ac2a-3131690db057",
+                "name": "christmas"
+            },
+            "reset": false,
+            "sync_token": "4.1704137668"
+        }
+
+    @apiError (Bad Request 400) BadRequest Invalid sync token.
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound List with provided data not found.
     """
-    user = User.objects(id=user_id).first()
+    try:
+        since = parse_sync_token(request.args.get("since", None, str))
+    except ValueError:
+        return error_response(400)
+
+    user = user_cache.get(user_id)
     if user is None:
         return error_response(404)
     list = List.objects(id=list_id, user=user).first()
     if list is None:
         return error_response(404)
-    gifts = [gift.to_dict() for gift in Gift.objects(list=list)]
 
-    response_data = {**list.to_dict(), "gifts": gifts}
+    response_data = get_list_changes(list, since)
     return make_response(data=response_data, status_code=200)
 
 
-@user_bp.route("/<string:user_id>/list/<string:list_id>/gift", methods=["GET"])
+@user_bp.route(
+    "/<id:user_id>/list/<id:list_id>/events",
+    methods=["GET"],
+)
+@token_auth.check_login
+def get_list_events_by_user_id(user_id, list_id):
+    """
+    @api {get} /api/user/:user_id/list/:list_id/events
+    Subscribe to List events by User ID
+    @apiName GetListEventsByUserID
+    @apiGroup List
+    @apiHeader {String} Authorization Authorization token.
+
+    @apiParam {String} user_id User ID
+    @apiParam {String} list_id List ID
+
+    @apiDescription Server-sent events stream of the list. Event types are
+    gift_created, gift_updated, gift_reserved, gift_unreserved, gift_deleted,
+    list_updated and list_deleted, data is the changed gift or list.
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        event: gift_deleted
+        data: {"id":"130e9777-7186-4222-8d73-87727692674f"}
+
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Not found 404) NotFound List with provided data not found.
+    """
+    user = user_cache.get(user_id)
+    if user is None:
+        return error_response(404)
+    list = List.objects(id=list_id, user=user).only("id").first()
+    if list is None:
+        return error_response(404)
+
+    return Response(
+        list_events.stream(list.id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@user_bp.route("/<id:user_id>/list/<id:list_id>/gift", methods=["GET"])
 @token_auth.check_login
 def get_spicific_list_gifts_by_user_id(user_id, list_id):
     """
@@ -394,6 +655,12 @@ def get_spicific_list_gifts_by_user_id(user_id, list_id):
     @apiParam {String} list_id List ID
     @apiQuery {Number} [page] page number
     @apiQuery {Number} [per_page] items per page
+    @apiQuery {String} [fields] comma separated gift fields to return
+    @apiQuery {String="price","-price","created_at","-created_at","name","-name"} [sort]
+        sort gifts, descending with a leading -
+    @apiQuery {Boolean} [reserved] only reserved or unreserved gifts
+    @apiQuery {Number} [min_price] minimum gift price
+    @apiQuery {Number} [max_price] maximum gift price
 
     @apiSuccess {Object[]} items a list of Gifts
     @apiSuccess {Object} pagination results pagination metadata
@@ -428,24 +695,34 @@ def get_spicific_list_gifts_by_user_id(user_id, list_id):
                 "total_pages": 1
             }
         }
+    @apiError (Bad Request 400) BadRequest Invalid fields, filters or sort.
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound resources with provided data not found.
     """
-    user = User.objects(id=user_id).first()
+    try:
+        fields = parse_fields(GIFT_FIELDS)
+        filters, order_by, filter_params = parse_gift_filters()
+    except ValueError:
+        return error_response(400)
+
+    user = user_cache.get(user_id)
     if user is None:
         return error_response(404)
-    list = List.objects(id=list_id, user=user).first()
+    list = List.objects(id=list_id, user=user).only("id").first()
     if list is None:
         return error_response(404)
 
     paginated_data = get_paginated_data(
         model=Gift,
-        query=Q(list=list),
+        query=Q(list=list) & filters,
         endpoint="user_bp.get_spicific_list_gifts_by_user_id",
         endpoint_params={
             "user_id": user_id,
             "list_id": list_id,
+            **filter_params,
         },
+        fields=fields,
+        order_by=order_by,
     )
     if paginated_data is None:
         return error_response(404)
@@ -453,7 +730,7 @@ def get_spicific_list_gifts_by_user_id(user_id, list_id):
 
 
 @user_bp.route(
-    "/<string:user_id>/list/<string:list_id>/gift/<string:gift_id>",
+    "/<id:user_id>/list/<id:list_id>/gift/<id:gift_id>",
     methods=["GET"],
 )
 @token_auth.check_login
@@ -468,6 +745,7 @@ def get_specific_gift_by_user_id(user_id, list_id, gift_id):
     @apiParam {String} user_id User ID
     @apiParam {String} list_id List ID
     @apiParam {String} gift_id Gift ID
+    @apiQuery {String} [fields] comma separated gift fields to return
 
     @apiSuccess {String} id Gift ID
     @apiSuccess {String} name gift name
@@ -492,25 +770,146 @@ def get_specific_gift_by_user_id(user_id, list_id, gift_id):
             "price": 12
         }
 
+    @apiError (Bad Request 400) BadRequest Invalid fields.
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound resource not found.
     """
-    user = User.objects(id=user_id).first()
+    try:
+        fields = parse_fields(GIFT_FIELDS)
+    except ValueError:
+        return error_response(400)
+
+    user = user_cache.get(user_id)
     if user is None:
         return error_response(404)
-    list = List.objects(id=list_id, user=user).first()
+    list = List.objects(id=list_id, user=user).only("id").first()
     if list is None:
         return error_response(404)
-    gift = Gift.objects(id=gift_id, list=list).first()
+    gifts = Gift.objects(id=gift_id, list=list)
+    if fields is not None:
+        gifts = gifts.only(*fields)
+    gift = gifts.first()
     if gift is None:
         return error_response(404)
 
-    response_data = gift.to_dict()
+    response_data = gift.to_dict(fields=fields)
+    return make_response(data=response_data, status_code=200)
+
+
+@user_bp.route("/gifts/batch", methods=["POST"])
+@token_auth.check_login
+def get_gifts_batch():
+    """
+    @api {post} /api/user/gifts/batch Get many gifts
+    @apiName GetGiftsBatch
+    @apiGroup Gift
+    @apiHeader {String} Authorization Authorization token.
+
+    @apiBody {Object[]} gifts references to the gifts, at most 100
+    @apiBody {String} gifts.user_id User ID
+    @apiBody {String} gifts.list_id List ID
+    @apiBody {String} gifts.gift_id Gift ID
+    @apiQuery {String} [fields] comma separated gift fields to return
+
+    @apiSuccess {Object[]} gifts found gifts in the requested order, with
+        the ID of their list
+    @apiSuccess {Object[]} not_found references of the gifts not found
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        {
+            "gifts": [
+                {
+                    "created_at": "2024-01-01T19:32:36.356000",
+                    "expected_buyer": null,
+                    "id": "01hn3kq2v8e6x4t5ag7n1r0c9d",
+                    "link": null,
+                    "list_id": "01hn3kpzd4w1b2m7y0e9f8q6aj",
+                    "name": "gift1",
+                    "price": 12
+                }
+            ],
+            "not_found": []
+        }
+
+    @apiError (Bad Request 400) BadRequest Invalid data sent by user.
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    """
+    try:
+        fields = parse_fields(GIFT_FIELDS)
+    except ValueError:
+        return error_response(400)
+    data = request.get_json() or {}
+    try:
+        validate(data, GiftBatchSchema)
+    except ValidationError:
+        return error_response(400)
+    references = data["gifts"]
+
+    # one query checks every list belongs to the user in its reference
+    owned_lists = {
+        (gift_list["user"], gift_list["_id"])
+        for gift_list in List.objects(
+            user__in=list({reference["user_id"] for reference in references}),
+            id__in=list({reference["list_id"] for reference in references}),
+        )
+        .only("id", "user")
+        .as_pymongo()
+    }
+    authorized = [
+        reference
+        for reference in references
+        if (reference["user_id"], reference["list_id"]) in owned_lists
+    ]
+
+    gifts = Gift.objects(
+        list__in=list({reference["list_id"] for reference in authorized}),
+        id__in=list({reference["gift_id"] for reference in authorized}),
+    ).no_dereference()
+    if fields is not None:
+        gifts = gifts.only("list", *fields)
+    gifts_by_key = {(gift.list.id, gift.id): gift for gift in gifts}
+
+    with_buyer = fields is None or "expected_buyer" in fields
+    buyers = {}
+    if with_buyer:
+        buyer_ids = {
+            gift.expected_buyer.id
+            for gift in gifts_by_key.values()
+            if gift.expected_buyer is not None
+        }
+        if buyer_ids:
+            buyers = {
+                buyer.id: buyer.to_dict()
+                for buyer in User.objects(id__in=list(buyer_ids))
+            }
+
+    gift_fields = [
+        field for field in fields or GIFT_FIELDS if field != "expected_buyer"
+    ]
+    found, not_found = [], []
+    for reference in references:
+        gift = None
+        if (reference["user_id"], reference["list_id"]) in owned_lists:
+            gift = gifts_by_key.get((reference["list_id"], reference["gift_id"]))
+        if gift is None:
+            not_found.append(reference)
+            continue
+        gift_data = gift.to_dict(fields=gift_fields)
+        if with_buyer:
+            expected_buyer = gift.expected_buyer
+            gift_data["expected_buyer"] = (
+                None if expected_buyer is None else buyers.get(expected_buyer.id)
+            )
+        gift_data["list_id"] = reference["list_id"]
+        found.append(gift_data)
+
+    response_data = {"gifts": found, "not_found": not_found}
     return make_response(data=response_data, status_code=200)
 
 
 @user_bp.route(
-    "/<string:user_id>/list/<string:list_id>/gift/<string:gift_id>/buy",
+    "/<id:user_id>/list/<id:list_id>/gift/<id:gift_id>/buy",
     methods=["POST"],
 )
 @token_auth.check_login
@@ -531,7 +930,7 @@ def buy_gift(user_id, list_id, gift_id):
     @apiError (Conflict 409) Conflict Existing other User has bough the gift.
     """
     current_user = token_auth.current_user()
-    user = User.objects(id=user_id).first()
+    user = user_cache.get(user_id)
     if user is None:
         return error_response(404)
     if user == current_user:
@@ -543,14 +942,98 @@ def buy_gift(user_id, list_id, gift_id):
     if gift is None:
         return error_response(404)
 
-    if gift.expected_buyer is not None and gift.expected_buyer != current_user:
+    # only a free gift or one already reserved by the user is updated.
+    # Document.save() would dereference the list to build the shard key
+    with sync_write(list.id, user.id) as sync_version:
+        updated = Gift.objects(
+            id=gift.id, list=list, expected_buyer__in=[None, current_user]
+        ).update_one(set__expected_buyer=current_user, set__sync_version=sync_version)
+    if not updated:
         return error_response(409)
 
     gift.expected_buyer = current_user
-    gift.save()
+    gift.sync_version = sync_version
+    list_feed.follow(current_user.id, user.id)
+    list_events.publish(list.id, "gift_reserved", gift.to_dict())
     return make_response(status_code=200)
 
 
+@user_bp.route(
+    "/<id:user_id>/list/<id:list_id>/gift/reservations",
+    methods=["POST"],
+)
+@token_auth.check_login
+def update_reservations(user_id, list_id):
+    """
+    @api {post} /api/user/:user_id/list/:list_id/gift/reservations
+    Reserve and unreserve many gifts
+    @apiName UpdateReservations
+    @apiGroup Gift
+    @apiHeader {String} Authorization Authorization token.
+
+    @apiParam {String} user_id User ID
+    @apiParam {String} list_id List ID
+    @apiBody {String[]} [reserve] IDs of the gifts to reserve
+    @apiBody {String[]} [unreserve] IDs of the gifts to unreserve
+
+    @apiSuccess {Object} outcomes outcome of every requested gift, one of
+        reserved, unreserved, conflict and not_found
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        {
+            "outcomes": {
+                "01hn3kq2v8e6x4t5ag7n1r0c9d": "reserved",
+                "01hn3kq2xbq0m9h8dk3w6e5tza": "conflict"
+            }
+        }
+
+    @apiError (Bad Request 400) BadRequest Invalid request.
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Not found 404) NotFound resource not found.
+    """
+    data = request.get_json() or {}
+    try:
+        validate(data, ReservationBatchSchema)
+    except ValidationError:
+        return error_response(400)
+    reserve = data.get("reserve", [])
+    unreserve = data.get("unreserve", [])
+    if (not reserve and not unreserve) or set(reserve) & set(unreserve):
+        return error_response(400)
+
+    current_user = token_auth.current_user()
+    user = user_cache.get(user_id)
+    if user is None:
+        return error_response(404)
+    if user == current_user:
+        return error_response(400)
+    list = List.objects(id=list_id, user=user).only("id").first()
+    if list is None:
+        return error_response(404)
+
+    outcomes, changed = apply_reservations(
+        list.id,
+        user.id,
+        current_user.id,
+        reserve,
+        unreserve,
+    )
+    if RESERVED in outcomes.values():
+        list_feed.follow(current_user.id, user.id)
+    gift_fields = [field for field in GIFT_FIELDS if field != "expected_buyer"]
+    for gift in changed:
+        gift_data = gift.to_dict(fields=gift_fields)
+        if outcomes[gift.id] == RESERVED:
+            gift_data["expected_buyer"] = current_user.to_dict()
+            list_events.publish(list.id, "gift_reserved", gift_data)
+        else:
+            gift_data["expected_buyer"] = None
+            list_events.publish(list.id, "gift_unreserved", gift_data)
+    response_data = {"outcomes": outcomes}
+    return make_response(data=response_data, status_code=200)
+
+
 @user_bp.route("", methods=["PUT"])
 @token_auth.check_login
 def update_user():
@@ -578,11 +1061,34 @@ def update_user():
     user = token_auth.current_user()
     data = request.get_json() or {}
     try:
-        validate(data, EditUserSchema.get_schema())
+        validate(data, EditUserSchema)
     except ValidationError:
         return error_response(400)
 
     user.from_dict(data, new_obj=False)
     user.save()
+    user_cache.invalidate(user.id)
     response_data = user.to_dict(confidential_data=True)
     return make_response(data=response_data, status_code=200)
+
+
+@user_bp.route("", methods=["DELETE"])
+@token_auth.check_login
+def delete_user():
+    """
+    @api {delete} /api/user Delete User
+    @apiName DeleteUser
+    @apiGroup User
+    @apiHeader {String} Authorization Authorization token.
+
+    @apiDescription Revokes the token and deletes the account with its lists
+    and gifts in the background, reservations made by the user are cancelled.
+
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    """
+    user = token_auth.current_user()
+    Token.revoke_token(user)
+    user_cache.invalidate(user.id)
+    list_feed.forget(user.id)
+    job_queue.enqueue("delete_user", user.id, dedup_key=f"delete_user:{user.id}")
+    return make_response(status_code=200)
@@ -0,0 +1,11 @@
+from app.cli.export import export_cli
+from app.cli.imports import import_cli
+from app.cli.jobs import jobs_cli
+from app.cli.shard import shard_cli
+
+__all__ = [
+    "export_cli",
+    "import_cli",
+    "jobs_cli",
+    "shard_cli",
+]
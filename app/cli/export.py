@@ -0,0 +1,35 @@
+from flask.cli import AppGroup
+from app.models import User
+from app.utils.export import iter_user_export, gzip_stream
+import click
+import sys
+
+export_cli = AppGroup("export", help="Export user data.")
+
+
+@export_cli.command("user")
+@click.argument("phone_number")
+@click.option("--after", default=None, help="Resume after the list with this ID.")
+@click.option("--gzip", "compress", is_flag=True, help="Write gzipped NDJSON.")
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Output file, defaults to stdout.",
+)
+def export_user(phone_number, after, compress, output):
+    """Stream all lists and gifts of a user as NDJSON."""
+    user = User.objects(phone_number=phone_number).first()
+    if user is None:
+        raise click.ClickException(f"user {phone_number} not found")
+
+    lines = iter_user_export(user, after=after)
+    chunks = gzip_stream(lines) if compress else (line.encode() for line in lines)
+    stream = sys.stdout.buffer if output is None else open(output, "wb")
+    try:
+        for chunk in chunks:
+            stream.write(chunk)
+    finally:
+        if output is not None:
+            stream.close()
@@ -0,0 +1,86 @@
+from flask.cli import AppGroup
+from app.utils.importer import (
+    import_chunk,
+    iter_chunks,
+    read_csv,
+    read_ndjson,
+)
+from app.utils.backends import connect_mongo
+from flask import current_app
+from multiprocessing import Pool
+import click
+import json
+import mongoengine as me
+
+import_cli = AppGroup("import", help="Import user data.")
+
+
+def init_worker(config) -> None:
+    # connections must not be shared with the parent process after fork
+    me.disconnect()
+    connect_mongo(config)
+
+
+@import_cli.command("data")
+@click.argument("source", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "--format",
+    "source_format",
+    type=click.Choice(["ndjson", "csv"]),
+    default="ndjson",
+    show_default=True,
+)
+@click.option(
+    "--chunk-size", type=click.IntRange(min=1), default=1000, show_default=True
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Import chunks in a pool of processes. Rows must not reference "
+    "users or lists created by another chunk.",
+)
+@click.option(
+    "--errors",
+    "errors_file",
+    type=click.File("w", encoding="utf-8"),
+    default=None,
+    help="Write rejected rows to this file as NDJSON.",
+)
+def import_data(source, source_format, chunk_size, workers, errors_file):
+    """
+    Upsert users, lists and gifts keyed on their ids.
+
+    Every row has a type (user, list or gift) and an id. Users need a
+    phone_number, lists a name and the phone_number of their user, gifts a
+    name and the id of their list.
+    """
+    rows = read_csv(source) if source_format == "csv" else read_ndjson(source)
+    chunks = iter_chunks(rows, chunk_size)
+
+    imported = rejected = 0
+    pool = None
+    if workers > 1:
+        config = {
+            key: current_app.config[key]
+            for key in ("DATA_BACKEND", "MONGODB_HOST", "MONGODB_DB")
+            if key in current_app.config
+        }
+        pool = Pool(workers, initializer=init_worker, initargs=(config,))
+        results = pool.imap(import_chunk, chunks)
+    else:
+        results = map(import_chunk, chunks)
+
+    try:
+        for result in results:
+            imported += result.imported
+            rejected += len(result.rejected)
+            if errors_file is not None:
+                for rejected_row in result.rejected:
+                    errors_file.write(json.dumps(rejected_row) + "\n")
+            click.echo(f"imported: {imported}, rejected: {rejected}", err=True)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
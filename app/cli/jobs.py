@@ -0,0 +1,13 @@
+from flask.cli import AppGroup
+from app.utils.jobs import job_queue
+import click
+
+jobs_cli = AppGroup("jobs", help="Run background jobs.")
+
+
+@jobs_cli.command("worker")
+@click.option("--burst", is_flag=True, help="Stop when the queue is empty.")
+@click.option("--poll-interval", type=float, default=1, show_default=True)
+def worker(burst, poll_interval):
+    """Process jobs from the job queue."""
+    job_queue.work(burst=burst, poll_interval=poll_interval)
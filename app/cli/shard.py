@@ -0,0 +1,42 @@
+from flask.cli import AppGroup
+from app.utils.sharding import sharded_models, shard_collection_commands
+from mongoengine.connection import get_connection, get_db
+import click
+import json
+
+shard_cli = AppGroup("shard", help="Prepare the database for sharding.")
+
+
+@shard_cli.command("check")
+def check():
+    """Count documents missing a shard key field, they block sharding."""
+    failed = False
+    for model in sharded_models():
+        collection = model._get_collection()
+        for field in model._meta["shard_key"]:
+            db_field = model._fields[field].db_field
+            missing = collection.count_documents(
+                {"$or": [{db_field: {"$exists": False}}, {db_field: None}]}
+            )
+            click.echo(f"{collection.name}.{db_field}: {missing} missing")
+            failed = failed or missing > 0
+    if failed:
+        raise click.ClickException("fix or remove the documents above first")
+
+
+@shard_cli.command("setup")
+@click.option("--apply", is_flag=True, help="Run the commands against mongos.")
+def setup(apply):
+    """
+    Create the shard key indexes and shard the collections. Without --apply
+    the admin commands are only printed.
+    """
+    for model in sharded_models():
+        model.ensure_indexes()
+
+    database = get_db().name
+    admin = get_connection().admin
+    for command in shard_collection_commands(database):
+        click.echo(json.dumps(command))
+        if apply:
+            admin.command(command)
@@ -2,10 +2,12 @@ from app.models.user import User
 from app.models.list import List
 from app.models.gift import Gift
 from app.models.token import Token
+from app.models.tombstone import GiftTombstone
 
 __all__ = [
     "User",
     "List",
     "Gift",
     "Token",
+    "GiftTombstone",
 ]
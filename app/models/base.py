@@ -1,5 +1,29 @@
 import mongoengine as me
 from datetime import datetime
+from flask import current_app, g, has_request_context, request
+from pymongo.read_preferences import SecondaryPreferred
+
+
+def get_read_preference() -> SecondaryPreferred | None:
+    """
+    Read preference of queries made while handling the current request:
+    reads of GET requests go to secondaries when READ_REPLICAS_ENABLED is
+    set, unless the user wrote recently and must read their own writes.
+    """
+    if not has_request_context():
+        return None
+    if not current_app.config.get("READ_REPLICAS_ENABLED", False):
+        return None
+    if request.method not in ("GET", "HEAD") or g.get("recent_write", False):
+        return None
+    max_staleness = current_app.config.get("READ_MAX_STALENESS", 90)
+    return SecondaryPreferred(max_staleness=max_staleness)
+
+
+class RoutedQuerySet(me.QuerySet):
+    def __init__(self, document, collection):
+        super().__init__(document, collection)
+        self._read_preference = get_read_preference()
 
 
 class BaseDocument:
@@ -1,9 +1,9 @@
 import mongoengine as me
-from app.models.base import BaseDocument
+from app.models.base import BaseDocument, RoutedQuerySet
 from app.models.list import List
 from app.models.user import User
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
 
 
 class Gift(me.Document, BaseDocument):
@@ -12,30 +12,45 @@ class Gift(me.Document, BaseDocument):
     price = me.IntField()
     link = me.StringField()
     expected_buyer = me.ReferenceField(User, reverse_delete_rule=me.NULLIFY)
+    sync_version = me.IntField(default=0)
 
     meta = {
         "collection": "Gifts",
+        "queryset_class": RoutedQuerySet,
+        "shard_key": ("list", "id"),
         "indexes": [
-            "list",
+            ("list", "id"),
+            ("list", "price", "id"),
+            ("list", "created_at", "id"),
+            ("list", "name", "id"),
+            ("list", "sync_version"),
+            # reservations of a user, cancelled when the user is deleted
+            ("expected_buyer", "list"),
         ],
     }
 
-    def to_dict(self) -> Dict[str, Any]:
-        expected_buyer = self.expected_buyer
-        if self.expected_buyer is not None:
-            expected_buyer = expected_buyer.to_dict()
-        created_at = None if self.created_at is None else self.created_at.isoformat()
+    def to_dict(self, fields: Iterable[str] | None = None) -> Dict[str, Any]:
         data = {
             "id": self.id,
             "name": self.name,
             "price": self.price,
             "link": self.link,
-            "expected_buyer": expected_buyer,
-            "created_at": created_at,
+            "created_at": self.created_at,
         }
+        # dereferencing the buyer costs a query, skip it when not requested
+        if fields is None or "expected_buyer" in fields:
+            expected_buyer = self.expected_buyer
+            if expected_buyer is not None:
+                expected_buyer = expected_buyer.to_dict()
+            data["expected_buyer"] = expected_buyer
+        if fields is not None:
+            data = {key: value for key, value in data.items() if key in fields}
         return data
 
     def from_dict(self, data: Dict[str, Any], new_obj: bool = True) -> None:
+        # shard key fields are immutable once the id is set
+        if "list" in data:
+            self.list = data["list"]
         if "id" in data:
             self.id = data["id"]
         if "name" in data:
@@ -44,7 +59,5 @@ class Gift(me.Document, BaseDocument):
             self.price = data["price"]
         if "link" in data:
             self.link = data["link"]
-        if "list" in data:
-            self.list = data["list"]
         if new_obj:
             self.created_at = datetime.utcnow()
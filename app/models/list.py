@@ -1,36 +1,43 @@
 import mongoengine as me
-from app.models.base import BaseDocument
+from app.models.base import BaseDocument, RoutedQuerySet
 from app.models.user import User
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
 
 
 class List(me.Document, BaseDocument):
     user = me.ReferenceField(User, reverse_delete_rule=me.CASCADE, required=True)
     name = me.StringField(required=True, unique_with="user")
+    sync_version = me.IntField(default=0)
+    # versions taken by writers which have not written their change yet
+    sync_pending = me.ListField(me.DictField())
 
     meta = {
         "collection": "lists",
+        "queryset_class": RoutedQuerySet,
+        "shard_key": ("user",),
         "indexes": [
-            "user",
+            ("user", "id"),
         ],
     }
 
-    def to_dict(self) -> Dict[str, Any]:
-        created_at = None if self.created_at is None else self.created_at.isoformat()
+    def to_dict(self, fields: Iterable[str] | None = None) -> Dict[str, Any]:
         data = {
             "id": self.id,
             "name": self.name,
-            "created_at": created_at,
+            "created_at": self.created_at,
         }
+        if fields is not None:
+            data = {key: value for key, value in data.items() if key in fields}
         return data
 
     def from_dict(self, data: Dict[str, Any], new_obj: bool = True) -> None:
+        # shard key fields are immutable once the id is set
+        if "user" in data:
+            self.user = data["user"]
         if "id" in data:
             self.id = data["id"]
         if "name" in data:
             self.name = data["name"]
-        if "user" in data:
-            self.user = data["user"]
         if new_obj:
             self._created_at = datetime.utcnow()
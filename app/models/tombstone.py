@@ -0,0 +1,19 @@
+import mongoengine as me
+from datetime import datetime
+
+TOMBSTONE_TTL_SECONDS = 30 * 24 * 60 * 60
+
+
+class GiftTombstone(me.Document):
+    id = me.StringField(primary_key=True)
+    list = me.StringField(required=True)
+    sync_version = me.IntField(required=True)
+    deleted_at = me.DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        "collection": "gift_tombstones",
+        "indexes": [
+            ("list", "sync_version"),
+            {"fields": ["deleted_at"], "expireAfterSeconds": TOMBSTONE_TTL_SECONDS},
+        ],
+    }
@@ -1,5 +1,5 @@
 import mongoengine as me
-from app.models.base import BaseDocument
+from app.models.base import BaseDocument, RoutedQuerySet
 from datetime import datetime, timedelta
 from random import randint
 from typing import Dict, Any
@@ -13,6 +13,7 @@ class User(me.Document, BaseDocument):
 
     meta = {
         "collection": "users",
+        "queryset_class": RoutedQuerySet,
         "indexes": [
             "phone_number",
         ],
@@ -26,10 +27,7 @@ class User(me.Document, BaseDocument):
             "last_name": self.last_name,
         }
         if confidential_data:
-            created_at = (
-                None if self.created_at is None else self.created_at.isoformat()
-            )
-            data["created_at"] = created_at
+            data["created_at"] = self.created_at
         return data
 
     def from_dict(self, data, new_obj=True) -> None:
@@ -54,6 +52,17 @@ class User(me.Document, BaseDocument):
         login_code = redis_connection.get(key)
         return login_code
 
+    def mark_login_code_sent(self) -> bool:
+        """
+        Return False when the pending login code does not exist or was
+        already sent.
+        """
+        key = f"user:{self.id}:login_code"
+        ttl = redis_connection.ttl(key)
+        if ttl <= 0:
+            return False
+        return bool(redis_connection.set(f"{key}:sent", 1, nx=True, ex=ttl))
+
     def check_login_code(self, provided_login_code: str) -> bool:
         key = f"user:{self.id}:login_code"
         login_code = redis_connection.get(key)
@@ -1,7 +1,8 @@
 from app.schemas.user import EditUserSchema
 from app.schemas.auth import LoginCodeSchema, LoginSchema
 from app.schemas.list import ListSchema
-from app.schemas.gift import GiftSchema
+from app.schemas.gift import GiftSchema, GiftBatchSchema, ReservationBatchSchema
+from app.schemas.admin import ProfilingSchema
 
 __all__ = [
     "EditUserSchema",
@@ -9,4 +10,7 @@ __all__ = [
     "LoginSchema",
     "ListSchema",
     "GiftSchema",
+    "GiftBatchSchema",
+    "ReservationBatchSchema",
+    "ProfilingSchema",
 ]
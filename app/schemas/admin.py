@@ -0,0 +1,9 @@
+import jsl
+
+MAX_PROFILING_SECONDS = 60 * 60
+
+
+class ProfilingSchema(jsl.Document):
+    seconds = jsl.IntField(required=True, minimum=1, maximum=MAX_PROFILING_SECONDS)
+    header = jsl.StringField(min_length=1)
+    value = jsl.StringField()
@@ -1,5 +1,9 @@
 import jsl
 from jsl.fields import Null
+from app.utils.ids import ANY_ID_PATTERN
+
+ID_PATTERN = f"^(?:{ANY_ID_PATTERN})$"
+MAX_BATCH_SIZE = 100
 
 URL_PATTERN = (
     r"https?:\/\/(www\.)?[-a-zA-Z0-9@:%._\+~#=]"
@@ -11,3 +15,31 @@ class GiftSchema(jsl.Document):
     name = jsl.StringField(required=True)
     price = jsl.IntField()
     link = jsl.StringField(pattern=URL_PATTERN, default=Null)
+
+
+class GiftReferenceSchema(jsl.Document):
+    user_id = jsl.StringField(required=True, pattern=ID_PATTERN)
+    list_id = jsl.StringField(required=True, pattern=ID_PATTERN)
+    gift_id = jsl.StringField(required=True, pattern=ID_PATTERN)
+
+
+class GiftBatchSchema(jsl.Document):
+    gifts = jsl.ArrayField(
+        jsl.DocumentField(GiftReferenceSchema),
+        required=True,
+        min_items=1,
+        max_items=MAX_BATCH_SIZE,
+    )
+
+
+class ReservationBatchSchema(jsl.Document):
+    reserve = jsl.ArrayField(
+        jsl.StringField(pattern=ID_PATTERN),
+        max_items=MAX_BATCH_SIZE,
+        unique_items=True,
+    )
+    unreserve = jsl.ArrayField(
+        jsl.StringField(pattern=ID_PATTERN),
+        max_items=MAX_BATCH_SIZE,
+        unique_items=True,
+    )
@@ -0,0 +1,194 @@
+from flask import Flask, Response, current_app, g, request
+from app.utils.sharding import iter_queries
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from pymongo import monitoring
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+
+# their bodies hold login codes, they are never recorded
+UNRECORDED_BODY_ENDPOINTS = {"user_bp.login"}
+
+logger = logging.getLogger("app.access")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+class QueryTracer(monitoring.CommandListener):
+    """
+    Command listener counting the MongoDB commands of the request handled
+    by the current thread, and recording each of them with its filter
+    fields and duration when the request is sampled. pymongo publishes the
+    events of a command in the thread running it.
+    """
+
+    def __init__(self) -> None:
+        self.local = threading.local()
+
+    def begin(self, trace: bool) -> None:
+        self.local.count = 0
+        self.local.trace = [] if trace else None
+        self.local.pending = {}
+
+    def end(self) -> Tuple[int, List[Dict[str, Any]] | None]:
+        count = getattr(self.local, "count", None)
+        if count is None:
+            return 0, None
+        trace = self.local.trace
+        self.local.count = None
+        return count, trace
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if getattr(self.local, "count", None) is None:
+            return
+        self.local.count += 1
+        if self.local.trace is None:
+            return
+        collection = event.command.get(event.command_name)
+        fields = set()
+        for query in iter_queries(event.command_name, event.command):
+            fields.update(query)
+        entry = {
+            "command": event.command_name,
+            "collection": collection if isinstance(collection, str) else None,
+            "fields": sorted(fields),
+        }
+        self.local.trace.append(entry)
+        self.local.pending[event.request_id] = entry
+
+    def finish(self, event, error: bool) -> None:
+        pending = getattr(self.local, "pending", None)
+        if not pending or getattr(self.local, "count", None) is None:
+            return
+        entry = pending.pop(event.request_id, None)
+        if entry is not None:
+            entry["ms"] = round(event.duration_micros / 1000, 3)
+            if error:
+                entry["failed"] = True
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self.finish(event, False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self.finish(event, True)
+
+
+query_tracer = QueryTracer()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that drops records when the queue is full instead of
+    blocking, and leaves formatting to the listener thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, separators=(",", ":"), default=str)
+
+
+def setup_access_log(app: Flask) -> QueueListener:
+    """
+    Write the access log as one JSON object per line to ACCESS_LOG_FILE,
+    or stdout, from a listener thread fed by a bounded queue.
+    """
+    log_queue = queue.Queue(app.config.get("ACCESS_LOG_QUEUE_SIZE", 10000))
+    path = app.config.get("ACCESS_LOG_FILE")
+    handler = logging.FileHandler(path) if path else logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    # flush the records still queued when the process exits
+    atexit.register(listener.stop)
+    return listener
+
+
+def enabled() -> bool:
+    return current_app.config.get("ACCESS_LOG_ENABLED", True)
+
+
+def start_access_log() -> None:
+    if not enabled():
+        return
+    g.access_log_start = (time.time(), time.perf_counter())
+    if (
+        current_app.config.get("ACCESS_LOG_REQUEST_BODIES", False)
+        and request.method not in ("GET", "HEAD")
+        and request.endpoint not in UNRECORDED_BODY_ENDPOINTS
+    ):
+        # JSON bodies of writes so the log can be replayed, copied before
+        # the endpoint changes the parsed body
+        g.access_log_body = copy.deepcopy(request.get_json(silent=True))
+    rate = current_app.config.get("ACCESS_LOG_TRACE_SAMPLE_RATE", 0.01)
+    query_tracer.begin(trace=random.random() < rate)
+
+
+def count_bytes(chunks: Iterable[bytes], record: Dict[str, Any]) -> Iterator[bytes]:
+    for chunk in chunks:
+        record["bytes"] += len(chunk)
+        yield chunk
+
+
+def log_access(response: Response) -> Response:
+    """
+    Emit the access log record of the request once the response is closed,
+    so streamed responses are logged with their full duration and size.
+    Records are replayable with benchmarks/replay.py, writes only when
+    ACCESS_LOG_REQUEST_BODIES is set.
+    """
+    if g.get("access_log_start") is None:
+        return response
+
+    timestamp, start = g.access_log_start
+    user = g.get("current_user")
+    record = {
+        "ts": round(timestamp, 3),
+        "time": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(
+            timespec="milliseconds"
+        ),
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint,
+        "user_id": user.id if user is not None else None,
+        "status": response.status_code,
+    }
+    if "access_log_body" in g:
+        record["body"] = g.access_log_body
+    if response.is_streamed:
+        record["bytes"] = 0
+        response.response = count_bytes(response.response, record)
+    else:
+        record["bytes"] = response.content_length or 0
+
+    def emit() -> None:
+        record["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        record["mongo_queries"], trace = query_tracer.end()
+        if trace is not None:
+            record["trace"] = trace
+        logger.info(record)
+
+    response.call_on_close(emit)
+    return response
@@ -1,7 +1,8 @@
-from flask import request, g
+from flask import request, g, current_app
 from app.models import User
 from functools import wraps
 from app.utils.errors import error_response
+from app.utils.user_cache import user_cache
 from app import redis_connection
 
 
@@ -13,14 +14,32 @@ class TokenAuthz:
                 return token
         return None
 
+    def recent_write_key(self, token: str) -> str:
+        return f"{token}:recent_write"
+
+    def mark_recent_write(self) -> None:
+        """
+        Send reads of the user to the primary for as long as secondaries may
+        lag behind, so the user reads their own writes.
+        """
+        if not current_app.config.get("READ_REPLICAS_ENABLED", False):
+            return
+        max_staleness = current_app.config.get("READ_MAX_STALENESS", 90)
+        redis_connection.setex(
+            self.recent_write_key(self.get_token()), max_staleness, 1
+        )
+
     def get_user_by_token(self) -> User | None:
         token = self.get_token()
         if token is None:
             return None
-        user_id = redis_connection.get(token)
+        user_id, recent_write = redis_connection.mget(
+            token, self.recent_write_key(token)
+        )
         if user_id is None:
             return None
-        user = User.objects(id=user_id).first()
+        g.recent_write = recent_write is not None
+        user = user_cache.get(user_id)
         if user is None:
             return None
         return user
@@ -33,6 +52,20 @@ class TokenAuthz:
                 return error_response(status_code=401)
 
             g.current_user = user
+            response = f(*args, **kwargs)
+            if request.method not in ("GET", "HEAD") and response.status_code < 400:
+                self.mark_recent_write()
+            return response
+
+        return decorated
+
+    def check_admin(self, f):
+        @wraps(f)
+        @self.check_login
+        def decorated(*args, **kwargs):
+            admins = current_app.config.get("ADMIN_PHONE_NUMBERS", [])
+            if g.current_user.phone_number not in admins:
+                return error_response(status_code=403)
             return f(*args, **kwargs)
 
         return decorated
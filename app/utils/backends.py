@@ -0,0 +1,42 @@
+from redis import Redis
+from typing import Any, List as ListType, Mapping
+import mongoengine as me
+
+# DATA_BACKEND "memory" keeps MongoDB and Redis in process with mongomock
+# and fakeredis, for tests and local runs without services. Both packages
+# are test requirements and only imported when selected.
+MEMORY_BACKEND = "memory"
+
+
+def uses_memory_backend(config: Mapping[str, Any]) -> bool:
+    return config.get("DATA_BACKEND", "live") == MEMORY_BACKEND
+
+
+def create_redis(config: Mapping[str, Any]) -> Redis:
+    if uses_memory_backend(config):
+        import fakeredis
+
+        return fakeredis.FakeRedis(decode_responses=True)
+    return Redis(
+        host=config.get("REDIS_HOST", "localhost"),
+        port=config.get("REDIS_PORT", 6379),
+        decode_responses=True,
+    )
+
+
+def connect_mongo(config: Mapping[str, Any], event_listeners: ListType = ()) -> None:
+    """Register the default connection, it is opened on the first query."""
+    options = {}
+    host = config.get("MONGODB_HOST", "localhost")
+    if uses_memory_backend(config):
+        import mongomock
+
+        options["mongo_client_class"] = mongomock.MongoClient
+        host = "mongodb://localhost"
+    me.connect(
+        config.get("MONGODB_DB", "Kadoostan"),
+        host=host,
+        event_listeners=list(event_listeners),
+        connect=False,
+        **options,
+    )
@@ -0,0 +1,76 @@
+from app.models import User, List, Gift, Token, GiftTombstone
+from app.utils.sync import sync_write
+from app.utils.transactions import run_in_transaction
+from app.utils.user_cache import user_cache
+from app import redis_connection
+from flask import current_app
+from typing import Callable
+
+
+def run_cascade(operations: Callable, use_transaction: bool | None = None) -> None:
+    """
+    Run the cascade operations, inside a transaction when enabled by the
+    argument or the CASCADE_TRANSACTIONS setting.
+    """
+    if use_transaction is None:
+        use_transaction = current_app.config.get("CASCADE_TRANSACTIONS", False)
+    run_in_transaction(operations, use_transaction)
+
+
+def delete_list_cascade(
+    list_id: str, user_id: str, use_transaction: bool | None = None
+) -> None:
+    def operations(session):
+        Gift._get_collection().delete_many({"list": list_id}, session=session)
+        GiftTombstone._get_collection().delete_many({"list": list_id}, session=session)
+        List._get_collection().delete_one(
+            {"_id": list_id, "user": user_id}, session=session
+        )
+
+    run_cascade(operations, use_transaction)
+
+
+def delete_user_cascade(user_id: str, use_transaction: bool | None = None) -> None:
+    """
+    Delete a user with a handful of collection wide writes instead of
+    mongoengine's per document delete rules: gifts of the user's lists,
+    the lists, reservations made by the user, the token and the user.
+    """
+    token_obj = Token.objects(user=user_id).only("token").as_pymongo().first()
+
+    def operations(session):
+        list_ids = List._get_collection().distinct(
+            "_id", {"user": user_id}, session=session
+        )
+        Gift._get_collection().delete_many({"list": {"$in": list_ids}}, session=session)
+        GiftTombstone._get_collection().delete_many(
+            {"list": {"$in": list_ids}}, session=session
+        )
+        # cancelled reservations are changes clients of the lists must sync.
+        # Finding them is the only query here not routed by a shard key, the
+        # reservations of a user can be in lists on any shard.
+        reserved_list_ids = Gift._get_collection().distinct(
+            "list", {"expected_buyer": user_id}, session=session
+        )
+        owners = List._get_collection().find(
+            {"_id": {"$in": reserved_list_ids}}, {"user": True}, session=session
+        )
+        for owner in owners:
+            list_id = owner["_id"]
+            with sync_write(list_id, owner["user"], session) as sync_version:
+                Gift._get_collection().update_many(
+                    {"list": list_id, "expected_buyer": user_id},
+                    {
+                        "$unset": {"expected_buyer": 1},
+                        "$set": {"sync_version": sync_version},
+                    },
+                    session=session,
+                )
+        List._get_collection().delete_many({"user": user_id}, session=session)
+        Token._get_collection().delete_many({"user": user_id}, session=session)
+        User._get_collection().delete_one({"_id": user_id}, session=session)
+
+    run_cascade(operations, use_transaction)
+    user_cache.invalidate(user_id)
+    if token_obj is not None:
+        redis_connection.delete(token_obj["token"])
@@ -0,0 +1,155 @@
+from flask import Response, current_app, request
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# already compressed, or streamed events which must not be buffered
+INCOMPRESSIBLE_MIMETYPES = ("application/gzip", "application/zip", "text/event-stream")
+
+
+def gzip_compressor():
+    level = current_app.config.get("COMPRESS_GZIP_LEVEL", 6)
+    return zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+
+class BrotliCompressor:
+    # same interface as the zlib and zstandard compress objects
+    def __init__(self, quality: int) -> None:
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.finish()
+
+
+def brotli_compressor():
+    quality = current_app.config.get("COMPRESS_BROTLI_QUALITY", 4)
+    return BrotliCompressor(quality)
+
+
+def zstd_compressor():
+    level = current_app.config.get("COMPRESS_ZSTD_LEVEL", 3)
+    return zstandard.ZstdCompressor(level=level).compressobj()
+
+
+# encodings in order of preference when the client accepts several
+COMPRESSORS: Dict[str, Callable] = {}
+if brotli is not None:
+    COMPRESSORS["br"] = brotli_compressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = zstd_compressor
+COMPRESSORS["gzip"] = gzip_compressor
+
+
+class CompressedBodyCache:
+    """
+    LRU cache of compressed bodies keyed on the encoding and a digest of the
+    uncompressed body, so identical responses are compressed once. The cache
+    holds at most `max_bytes` of compressed data, bodies longer than
+    `max_body_size` are compressed without being cached.
+    """
+
+    def __init__(
+        self, max_bytes: int = 16 * 1024 * 1024, max_body_size: int = 256 * 1024
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_body_size = max_body_size
+        self.size = 0
+        self.lock = Lock()
+        self.entries: OrderedDict = OrderedDict()
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        compressor = COMPRESSORS[encoding]()
+        return compressor.compress(body) + compressor.flush()
+
+    def get_or_compress(self, encoding: str, body: bytes) -> bytes:
+        if len(body) > self.max_body_size:
+            return self.compress(encoding, body)
+
+        key = (encoding, blake2b(body, digest_size=16).digest())
+        with self.lock:
+            compressed = self.entries.get(key)
+            if compressed is not None:
+                self.entries.move_to_end(key)
+                return compressed
+
+        compressed = self.compress(encoding, body)
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                # compressed by another thread in the meantime
+                self.size -= len(previous)
+            self.entries[key] = compressed
+            self.size += len(compressed)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+        return compressed
+
+
+compressed_body_cache = CompressedBodyCache()
+
+
+def compress_stream(chunks: Iterable[bytes], compressor) -> Iterator[bytes]:
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def choose_encoding() -> str | None:
+    accepted = request.accept_encodings
+    encodings = [encoding for encoding in COMPRESSORS if accepted[encoding]]
+    if not encodings:
+        return None
+    return max(encodings, key=lambda encoding: accepted[encoding])
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compress the response with the best encoding accepted by the client.
+    Streamed responses are compressed chunk by chunk, other responses only
+    when they are at least COMPRESS_MIN_SIZE bytes long.
+    """
+    if (
+        not current_app.config.get("COMPRESS_ENABLED", True)
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype in INCOMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        compressor = COMPRESSORS[encoding]()
+        response.response = compress_stream(response.response, compressor)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < current_app.config.get("COMPRESS_MIN_SIZE", 500):
+            return response
+        response.set_data(compressed_body_cache.get_or_compress(encoding, body))
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -1,6 +1,5 @@
 from flask import jsonify
 from werkzeug.http import HTTP_STATUS_CODES
-from flask_limiter import RequestLimit
 
 
 def error_response(status_code, message=None):
@@ -12,6 +11,6 @@ def error_response(status_code, message=None):
     return response
 
 
-def rate_limit_exeeded(request_limit: RequestLimit):
-    message = f"limit {request_limit.limit} exceeded"
+def rate_limit_exeeded(limit: str):
+    message = f"limit {limit} exceeded"
     return error_response(status_code=429, message=message)
@@ -0,0 +1,115 @@
+from app import redis_connection
+from flask import current_app
+from queue import Empty, Full, Queue
+from redis import Redis, RedisError
+from threading import Lock
+from typing import Any, Dict, Iterator, Set
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PATTERN = "list:*:events"
+
+# pause before replacing a failed reader thread, so an unreachable Redis is
+# not retried in a tight loop
+RESUBSCRIBE_DELAY = 1
+
+
+class ListEventBroker:
+    """
+    Publishes list events to Redis and fans them out to the subscribers of
+    the process. A process holds one pattern subscription, read by a
+    background thread, whatever the number of subscribers. Each subscriber
+    waits on its own queue and holds a worker thread for as long as it
+    streams, workers need enough threads for the streams they serve.
+    """
+
+    def __init__(self, connection: Redis, queue_size: int = 100) -> None:
+        self.connection = connection
+        self.queue_size = queue_size
+        self.lock = Lock()
+        self.subscribers: Dict[str, Set[Queue]] = {}
+        self.thread = None
+
+    def channel(self, list_id: str) -> str:
+        return f"list:{list_id}:events"
+
+    def publish(self, list_id: str, event_type: str, data: Dict[str, Any]) -> None:
+        data = current_app.json.dumps(data, separators=(",", ":"))
+        self.connection.publish(self.channel(list_id), f"{event_type} {data}")
+
+    def start(self) -> None:
+        pubsub = self.connection.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(**{CHANNEL_PATTERN: self.dispatch})
+        self.thread = pubsub.run_in_thread(
+            sleep_time=1, daemon=True, exception_handler=self.on_thread_error
+        )
+
+    def ensure_started(self) -> None:
+        # failures are retried by the next subscriber or keepalive
+        try:
+            with self.lock:
+                if self.thread is None:
+                    self.start()
+        except RedisError:
+            logger.warning("list events resubscribe failed", exc_info=True)
+
+    def on_thread_error(self, error: BaseException, pubsub, thread) -> None:
+        """
+        Replace a reader thread whose connection failed. Events published
+        in the meantime are lost, clients catch up with the changes endpoint.
+        """
+        logger.warning("list events reader failed: %r", error)
+        thread.stop()
+        with self.lock:
+            if self.thread is thread:
+                self.thread = None
+        time.sleep(RESUBSCRIBE_DELAY)
+        self.ensure_started()
+
+    def dispatch(self, message: Dict[str, Any]) -> None:
+        list_id = message["channel"].split(":")[1]
+        with self.lock:
+            queues = list(self.subscribers.get(list_id, ()))
+        for queue in queues:
+            try:
+                queue.put_nowait(message["data"])
+            except Full:
+                # slow subscriber, it can catch up with the changes endpoint
+                pass
+
+    def subscribe(self, list_id: str) -> Queue:
+        queue = Queue(maxsize=self.queue_size)
+        with self.lock:
+            if self.thread is None:
+                self.start()
+            self.subscribers.setdefault(list_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, list_id: str, queue: Queue) -> None:
+        with self.lock:
+            queues = self.subscribers.get(list_id, set())
+            queues.discard(queue)
+            if not queues:
+                self.subscribers.pop(list_id, None)
+
+    def stream(self, list_id: str, keepalive: float = 15) -> Iterator[str]:
+        """Yield server-sent events of the list until the client leaves."""
+        queue = self.subscribe(list_id)
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    message = queue.get(timeout=keepalive)
+                except Empty:
+                    yield ": keepalive\n\n"
+                    self.ensure_started()
+                    continue
+                event_type, _, data = message.partition(" ")
+                yield f"event: {event_type}\ndata: {data}\n\n"
+        finally:
+            self.unsubscribe(list_id, queue)
+
+
+list_events = ListEventBroker(redis_connection)
@@ -0,0 +1,70 @@
+from app.models import List, Gift, User
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Tuple
+import json
+import zlib
+
+EXPORT_BATCH_SIZE = 500
+
+LIST_EXPORT_FIELDS = ("id", "name", "created_at")
+GIFT_EXPORT_FIELDS = (
+    "id",
+    "list",
+    "name",
+    "price",
+    "link",
+    "expected_buyer",
+    "created_at",
+)
+
+
+def serialize_record(
+    record_type: str,
+    document: Dict[str, Any],
+    fields: Tuple[str, ...],
+) -> str:
+    data = {"type": record_type}
+    for field in fields:
+        value = document.get("_id" if field == "id" else field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        data[field] = value
+    return json.dumps(data, separators=(",", ":")) + "\n"
+
+
+def iter_user_export(user: User, after: str | None = None) -> Iterator[str]:
+    """
+    Yield one NDJSON line per list of the user, each followed by the lines
+    of its gifts. Lists are ordered by id so an interrupted export can be
+    resumed by passing the id of the last fully received list as `after`.
+    """
+    query = {"user": user}
+    if after is not None:
+        query["id__gt"] = after
+
+    lists = (
+        List.objects(**query)
+        .only(*LIST_EXPORT_FIELDS)
+        .order_by("id")
+        .batch_size(EXPORT_BATCH_SIZE)
+        .as_pymongo()
+    )
+    for list_document in lists:
+        yield serialize_record("list", list_document, LIST_EXPORT_FIELDS)
+        gifts = (
+            Gift.objects(list=list_document["_id"])
+            .only(*GIFT_EXPORT_FIELDS)
+            .batch_size(EXPORT_BATCH_SIZE)
+            .as_pymongo()
+        )
+        for gift_document in gifts:
+            yield serialize_record("gift", gift_document, GIFT_EXPORT_FIELDS)
+
+
+def gzip_stream(lines: Iterable[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for line in lines:
+        chunk = compressor.compress(line.encode("utf-8"))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
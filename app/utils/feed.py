@@ -0,0 +1,149 @@
+from app import redis_connection
+from redis import Redis
+from typing import List, Tuple
+import time
+
+HIGH_FANOUT_KEY = "feed:high_fanout"
+MAX_FEED_PAGE_SIZE = 50
+
+
+class ListFeed:
+    """
+    Feeds of the recently updated lists of followed users, kept per user in
+    Redis sorted sets scored by update time. A user follows the owners they
+    search for or buy from. Updates are fanned out to the feed of every
+    follower on write, except for owners with more than `fanout_limit`
+    followers, whose recent lists are merged into the feed on read.
+    """
+
+    def __init__(
+        self, connection: Redis, feed_size: int = 200, fanout_limit: int = 1000
+    ) -> None:
+        self.connection = connection
+        self.feed_size = feed_size
+        self.fanout_limit = fanout_limit
+
+    def feed_key(self, user_id: str) -> str:
+        return f"user:{user_id}:feed"
+
+    def recent_lists_key(self, user_id: str) -> str:
+        return f"user:{user_id}:recent_lists"
+
+    def followers_key(self, user_id: str) -> str:
+        return f"user:{user_id}:followers"
+
+    def following_key(self, user_id: str) -> str:
+        return f"user:{user_id}:following"
+
+    def member(self, user_id: str, list_id: str) -> str:
+        # the owner is kept with the list so lists are read by shard key
+        return f"{user_id}:{list_id}"
+
+    def add(self, pipeline, key: str, entries: dict) -> None:
+        pipeline.zadd(key, entries)
+        pipeline.zremrangebyrank(key, 0, -self.feed_size - 1)
+
+    def follow(self, follower_id: str, user_id: str) -> None:
+        if follower_id == user_id:
+            return
+        pipeline = self.connection.pipeline()
+        pipeline.sadd(self.followers_key(user_id), follower_id)
+        pipeline.sadd(self.following_key(follower_id), user_id)
+        pipeline.scard(self.followers_key(user_id))
+        pipeline.zrange(self.recent_lists_key(user_id), 0, -1, withscores=True)
+        added, _, followers, recent_lists = pipeline.execute()
+        if not added:
+            return
+
+        pipeline = self.connection.pipeline()
+        if followers > self.fanout_limit:
+            pipeline.sadd(HIGH_FANOUT_KEY, user_id)
+        elif recent_lists:
+            # lists updated before the follow show up in the feed as well
+            self.add(pipeline, self.feed_key(follower_id), dict(recent_lists))
+        pipeline.execute()
+
+    def publish(self, user_id: str, list_id: str) -> None:
+        """Move the list to the top of the feeds of the followers of its owner."""
+        entry = {self.member(user_id, list_id): time.time()}
+        pipeline = self.connection.pipeline()
+        self.add(pipeline, self.recent_lists_key(user_id), entry)
+        pipeline.scard(self.followers_key(user_id))
+        followers = pipeline.execute()[-1]
+
+        if followers > self.fanout_limit:
+            # owners are never removed from the set when they lose followers:
+            # the feeds of their followers do not hold their lists, which are
+            # merged into the feeds on read for as long as they are in it
+            self.connection.sadd(HIGH_FANOUT_KEY, user_id)
+            return
+
+        pipeline = self.connection.pipeline(transaction=False)
+        for follower_id in self.connection.smembers(self.followers_key(user_id)):
+            self.add(pipeline, self.feed_key(follower_id), entry)
+        pipeline.execute()
+
+    def remove(self, user_id: str, list_id: str) -> None:
+        # feeds drop the deleted list when they are read
+        self.connection.zrem(
+            self.recent_lists_key(user_id), self.member(user_id, list_id)
+        )
+
+    def read(self, user_id: str, start: int, stop: int) -> List[Tuple[str, str, float]]:
+        """
+        Owner ids, ids and update times of the lists in the feed between
+        `start` and `stop`, newest first.
+        """
+        pipeline = self.connection.pipeline(transaction=False)
+        pipeline.zrevrange(self.feed_key(user_id), 0, stop - 1, withscores=True)
+        pipeline.sinter(self.following_key(user_id), HIGH_FANOUT_KEY)
+        entries, high_fanout = pipeline.execute()
+        if not high_fanout:
+            return self.parse(entries[start:stop])
+
+        pipeline = self.connection.pipeline(transaction=False)
+        for followed_id in high_fanout:
+            key = self.recent_lists_key(followed_id)
+            pipeline.zrevrange(key, 0, stop - 1, withscores=True)
+        merged = dict(entries)
+        for recent_lists in pipeline.execute():
+            merged.update(recent_lists)
+        entries = sorted(merged.items(), key=lambda entry: entry[1], reverse=True)
+        return self.parse(entries[start:stop])
+
+    def parse(self, entries: List[Tuple[str, float]]) -> List[Tuple[str, str, float]]:
+        parsed = []
+        for member, score in entries:
+            owner_id, _, list_id = member.partition(":")
+            parsed.append((owner_id, list_id, score))
+        return parsed
+
+    def discard(self, user_id: str, *entries: Tuple[str, str]) -> None:
+        """Remove (owner id, list id) entries from the feed of the user."""
+        if entries:
+            members = [self.member(owner_id, list_id) for owner_id, list_id in entries]
+            self.connection.zrem(self.feed_key(user_id), *members)
+
+    def forget(self, user_id: str) -> None:
+        """Remove a deleted user from the feeds and follow relations."""
+        pipeline = self.connection.pipeline()
+        pipeline.smembers(self.followers_key(user_id))
+        pipeline.smembers(self.following_key(user_id))
+        followers, following = pipeline.execute()
+
+        pipeline = self.connection.pipeline()
+        for follower_id in followers:
+            pipeline.srem(self.following_key(follower_id), user_id)
+        for followed_id in following:
+            pipeline.srem(self.followers_key(followed_id), user_id)
+        pipeline.delete(
+            self.feed_key(user_id),
+            self.recent_lists_key(user_id),
+            self.followers_key(user_id),
+            self.following_key(user_id),
+        )
+        pipeline.srem(HIGH_FANOUT_KEY, user_id)
+        pipeline.execute()
+
+
+list_feed = ListFeed(redis_connection)
@@ -0,0 +1,22 @@
+from flask import request
+from typing import Tuple
+
+LIST_FIELDS = ("id", "name", "created_at")
+GIFT_FIELDS = ("id", "name", "price", "link", "expected_buyer", "created_at")
+
+
+def parse_fields(
+    allowed: Tuple[str, ...],
+    parameter: str = "fields",
+) -> Tuple[str, ...] | None:
+    """
+    Return the fields requested by a comma separated query parameter, or
+    None when the parameter is not given. Raise ValueError on unknown fields.
+    """
+    value = request.args.get(parameter, None, str)
+    if value is None:
+        return None
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(",") if f.strip()))
+    if not fields or any(field not in allowed for field in fields):
+        raise ValueError(f"invalid {parameter}")
+    return fields
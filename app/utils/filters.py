@@ -0,0 +1,52 @@
+from flask import request
+from mongoengine.queryset.visitor import Q
+from typing import Dict, Tuple
+
+GIFT_SORT_FIELDS = ("price", "created_at", "name")
+
+
+def parse_gift_filters() -> Tuple[Q, Tuple[str, ...], Dict[str, str]]:
+    """
+    Build the query and ordering of a gift listing from the reserved,
+    min_price, max_price and sort parameters, and return them with the
+    parameters to keep in pagination links. Raise ValueError on invalid
+    values.
+
+    Ties are ordered by id so pages stay stable, matching the
+    (list, <field>, _id) indexes of the Gifts collection.
+    """
+    parameters = request.args
+    query = Q()
+    params = {}
+
+    reserved = parameters.get("reserved", None, str)
+    if reserved is not None:
+        if reserved not in ("true", "false"):
+            raise ValueError("invalid reserved")
+        if reserved == "true":
+            query &= Q(expected_buyer__ne=None)
+        else:
+            query &= Q(expected_buyer=None)
+        params["reserved"] = reserved
+
+    for name, operator in (("min_price", "gte"), ("max_price", "lte")):
+        value = parameters.get(name, None, str)
+        if value is None:
+            continue
+        try:
+            price = int(value)
+        except ValueError:
+            raise ValueError(f"invalid {name}")
+        query &= Q(**{f"price__{operator}": price})
+        params[name] = value
+
+    order_by = ()
+    sort = parameters.get("sort", None, str)
+    if sort is not None:
+        descending = sort.startswith("-")
+        if sort.lstrip("-") not in GIFT_SORT_FIELDS or sort.count("-") > 1:
+            raise ValueError("invalid sort")
+        order_by = (sort, "-id" if descending else "id")
+        params["sort"] = sort
+
+    return query, order_by, params
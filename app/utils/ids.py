@@ -0,0 +1,96 @@
+from werkzeug.routing import BaseConverter
+import os
+import re
+import threading
+import time
+
+# Crockford's base32 in lowercase, ascending in ASCII so encoded ids sort
+# like the integers they encode.
+ALPHABET = "0123456789abcdefghjkmnpqrstvwxyz"
+ID_LENGTH = 26
+
+ID_PATTERN = r"[0-9a-hjkmnp-tv-z]{26}"
+LEGACY_ID_PATTERN = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+ANY_ID_PATTERN = f"{ID_PATTERN}|{LEGACY_ID_PATTERN}"
+
+_any_id = re.compile(f"(?:{ANY_ID_PATTERN})")
+
+
+class IdGenerator:
+    """
+    UUIDv7 ids: 48 bits of unix milliseconds, then a 12 bit sequence and
+    62 random bits. The sequence starts at a random value every
+    millisecond and is incremented for ids of the same millisecond, so ids
+    of one process are strictly increasing.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.last_ms = 0
+        self.sequence = 0
+
+    def next_value(self) -> int:
+        with self.lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self.last_ms:
+                self.last_ms = now_ms
+                self.sequence = int.from_bytes(os.urandom(2), "big") & 0x7FF
+            else:
+                self.sequence += 1
+                if self.sequence > 0xFFF:
+                    # borrow the next millisecond instead of going backwards
+                    self.last_ms += 1
+                    self.sequence = 0
+            timestamp, sequence = self.last_ms, self.sequence
+        random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+        return (
+            (timestamp << 80)
+            | (0x7 << 76)
+            | (sequence << 64)
+            | (0b10 << 62)
+            | random_bits
+        )
+
+
+def encode(value: int) -> str:
+    chars = []
+    for _ in range(ID_LENGTH):
+        chars.append(ALPHABET[value & 0x1F])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def decode(id: str) -> int:
+    value = 0
+    for char in id:
+        value = (value << 5) | ALPHABET.index(char)
+    return value
+
+
+_generator = IdGenerator()
+
+
+def new_id() -> str:
+    """A new time ordered id, 26 characters instead of the 36 of a UUID."""
+    return encode(_generator.next_value())
+
+
+def id_timestamp(id: str) -> int | None:
+    """Unix milliseconds an id was generated at, None for legacy ids."""
+    if len(id) != ID_LENGTH:
+        return None
+    return decode(id) >> 80
+
+
+def is_valid_id(value) -> bool:
+    """Both generated ids and the UUID4 strings used before them are valid."""
+    return isinstance(value, str) and _any_id.fullmatch(value) is not None
+
+
+class IdConverter(BaseConverter):
+    """
+    URL converter matching document ids, requests with malformed ids get a
+    404 without querying the database.
+    """
+
+    regex = ANY_ID_PATTERN
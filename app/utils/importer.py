@@ -0,0 +1,197 @@
+from app.models import User, List, Gift
+from app.utils.user_cache import user_cache
+from app.utils.ids import is_valid_id
+from app.utils.validation import get_validator
+from app.schemas import EditUserSchema, LoginCodeSchema, ListSchema, GiftSchema
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import Any, Dict, Iterable, Iterator, List as ListType, Tuple
+import csv
+import json
+
+RECORD_TYPES = ("user", "list", "gift")
+
+CSV_INT_FIELDS = ("price",)
+
+
+# every schema validates the fields of the row it declares
+SCHEMAS = {
+    "user": (LoginCodeSchema, EditUserSchema),
+    "list": (LoginCodeSchema, ListSchema),
+    "gift": (GiftSchema,),
+}
+
+# fields of a row written to the document for every record type, the ones
+# referencing other documents are resolved before writing.
+DOCUMENT_FIELDS = {
+    "user": ("phone_number", "first_name", "last_name"),
+    "list": ("name",),
+    "gift": ("name", "price", "link"),
+}
+
+
+class ImportResult:
+    def __init__(self) -> None:
+        self.imported = 0
+        self.rejected: ListType[Dict[str, Any]] = []
+
+    def reject(self, line: int, row: Dict[str, Any], error: str) -> None:
+        self.rejected.append({"line": line, "row": row, "error": error})
+
+
+def read_ndjson(stream) -> Iterator[Tuple[int, Dict[str, Any] | None]]:
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def read_csv(stream) -> Iterator[Tuple[int, Dict[str, Any] | None]]:
+    reader = csv.DictReader(stream)
+    for row in reader:
+        data = {key: value for key, value in row.items() if value not in ("", None)}
+        for field in CSV_INT_FIELDS:
+            if field in data:
+                try:
+                    data[field] = int(data[field])
+                except ValueError:
+                    pass
+        yield reader.line_num, data
+
+
+def iter_chunks(rows: Iterable, chunk_size: int) -> Iterator[ListType]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_row(row: Dict[str, Any] | None) -> str | None:
+    if row is None:
+        return "malformed row"
+    record_type = row.get("type")
+    if record_type not in RECORD_TYPES:
+        return "unknown record type"
+    if not isinstance(row.get("id"), str) or not row["id"]:
+        return "missing id"
+    if not is_valid_id(row["id"]):
+        return "invalid id"
+    if record_type == "gift" and not isinstance(row.get("list"), str):
+        return "missing list"
+    for schema in SCHEMAS[record_type]:
+        validator = get_validator(schema)
+        fields = validator.schema["properties"]
+        payload = {field: row[field] for field in fields if field in row}
+        error = next(validator.iter_errors(payload), None)
+        if error is not None:
+            return error.message
+    return None
+
+
+def pick_fields(row: Dict[str, Any], record_type: str) -> Dict[str, Any]:
+    return {field: row[field] for field in DOCUMENT_FIELDS[record_type] if field in row}
+
+
+def make_upsert(
+    row: Dict[str, Any],
+    fields: Dict[str, Any],
+    shard_key: Dict[str, Any] | None = None,
+) -> UpdateOne:
+    """
+    Upserts into sharded collections must filter on the full shard key, it
+    is passed in `shard_key` and written by the upsert itself.
+    """
+    created_at = row.get("created_at")
+    try:
+        created_at = datetime.fromisoformat(created_at)
+    except (TypeError, ValueError):
+        created_at = datetime.utcnow()
+    query = {"_id": row["id"]}
+    if shard_key is not None:
+        query.update(shard_key)
+    return UpdateOne(
+        query,
+        {"$set": fields, "$setOnInsert": {"created_at": created_at}},
+        upsert=True,
+    )
+
+
+def bulk_upsert(model, rows, operations, result: ImportResult) -> None:
+    if not operations:
+        return
+    try:
+        model._get_collection().bulk_write(operations, ordered=False)
+        result.imported += len(operations)
+    except BulkWriteError as error:
+        write_errors = error.details.get("writeErrors", [])
+        for write_error in write_errors:
+            line, row = rows[write_error["index"]]
+            result.reject(line, row, write_error.get("errmsg", "write error"))
+        result.imported += len(operations) - len(write_errors)
+
+
+def import_chunk(chunk: ListType[Tuple[int, Dict[str, Any] | None]]) -> ImportResult:
+    """
+    Validate and upsert a chunk of rows with one bulk_write per collection.
+    Users are written first so lists and gifts of the same chunk can
+    reference them, phone numbers and list ids are resolved with one query
+    each.
+    """
+    result = ImportResult()
+    rows_by_type = {record_type: [] for record_type in RECORD_TYPES}
+    for line, row in chunk:
+        error = validate_row(row)
+        if error is not None:
+            result.reject(line, row, error)
+            continue
+        rows_by_type[row["type"]].append((line, row))
+
+    user_rows = rows_by_type["user"]
+    operations = [make_upsert(row, pick_fields(row, "user")) for _, row in user_rows]
+    bulk_upsert(User, user_rows, operations, result)
+    user_cache.invalidate(*[row["id"] for _, row in user_rows])
+
+    phone_numbers = {row["phone_number"] for _, row in rows_by_type["list"]}
+    user_ids = {
+        user["phone_number"]: user["_id"]
+        for user in User.objects(phone_number__in=list(phone_numbers))
+        .only("id", "phone_number")
+        .as_pymongo()
+    }
+    list_rows, operations = [], []
+    for line, row in rows_by_type["list"]:
+        user_id = user_ids.get(row["phone_number"])
+        if user_id is None:
+            result.reject(line, row, "user not found")
+            continue
+        list_rows.append((line, row))
+        operations.append(make_upsert(row, pick_fields(row, "list"), {"user": user_id}))
+    bulk_upsert(List, list_rows, operations, result)
+
+    list_ids = {row["list"] for _, row in rows_by_type["gift"]}
+    existing_list_ids = {
+        gift_list["_id"]
+        for gift_list in List.objects(id__in=list(list_ids)).only("id").as_pymongo()
+    }
+    gift_rows, operations = [], []
+    for line, row in rows_by_type["gift"]:
+        if row["list"] not in existing_list_ids:
+            result.reject(line, row, "list not found")
+            continue
+        gift_rows.append((line, row))
+        operations.append(
+            make_upsert(row, pick_fields(row, "gift"), {"list": row["list"]})
+        )
+    bulk_upsert(Gift, gift_rows, operations, result)
+
+    return result
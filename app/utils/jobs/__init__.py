@@ -0,0 +1,6 @@
+from app.utils.jobs.queue import JobQueue
+from app import redis_connection
+
+job_queue = JobQueue(redis_connection)
+
+from . import handlers
@@ -0,0 +1,46 @@
+from app.utils.jobs import job_queue
+from app.utils.cascade import delete_user_cascade
+from app.utils.sms import sms_dispatcher
+from app.utils.user_cache import user_cache
+from flask import current_app
+
+LOGIN_CODE_MESSAGE = "Kadoostan login code: {login_code}"
+
+
+@job_queue.handler("send_login_code")
+def send_login_code(user_id: str) -> None:
+    user = user_cache.get(user_id)
+    if user is None:
+        return
+    login_code = user.get_login_code()
+    if login_code is None or not user.mark_login_code_sent():
+        return
+    text = LOGIN_CODE_MESSAGE.format(login_code=login_code)
+    sms_dispatcher.queue_message(user.phone_number, text)
+    job_queue.enqueue("dispatch_sms", dedup_key="dispatch_sms")
+
+
+@job_queue.handler("dispatch_sms")
+def dispatch_sms() -> None:
+    try:
+        sent = sms_dispatcher.dispatch()
+    except Exception:
+        if not job_queue.is_local():
+            # retried by the worker, the failed batches are back in the outbox
+            raise
+        # run inline by the request which queued the message
+        current_app.logger.exception("dispatching SMS failed")
+        return
+    if sent is None:
+        # the dispatcher holding the lock checks the outbox once it is done
+        return
+    # a message queued after the last pop of the dispatcher found the dedup
+    # key of this job taken and added no job, release it and check again
+    job_queue.release_dedup_key("dispatch_sms")
+    if sms_dispatcher.pending():
+        job_queue.enqueue("dispatch_sms", dedup_key="dispatch_sms")
+
+
+@job_queue.handler("delete_user")
+def delete_user(user_id: str) -> None:
+    delete_user_cascade(user_id)
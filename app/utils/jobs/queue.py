@@ -0,0 +1,188 @@
+from flask import current_app
+from redis import Redis
+from typing import Any, Callable, Dict
+import json
+import time
+import uuid
+
+# Moves due delayed jobs and jobs whose visibility timeout expired back to the
+# queue, then pops one job and marks it as processing until now + timeout.
+CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, job_id in ipairs(due) do
+    redis.call('ZREM', KEYS[3], job_id)
+    redis.call('LPUSH', KEYS[1], job_id)
+end
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, job_id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], job_id)
+    redis.call('LPUSH', KEYS[1], job_id)
+end
+local job_id = redis.call('RPOP', KEYS[1])
+if job_id then
+    redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[2]), job_id)
+end
+return job_id
+"""
+
+# Deletes a dedup key only while it still belongs to the given job.
+RELEASE_DEDUP_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class JobQueue:
+    """
+    Redis backed job queue. Handlers are registered with `handler` and jobs
+    are added with `enqueue`, which returns immediately. A worker claims
+    jobs, retries failed ones with exponential backoff and requeues jobs
+    which were not finished within the visibility timeout.
+
+    When JOB_QUEUE_MODE is "local" jobs run inline when enqueued.
+    """
+
+    def __init__(
+        self,
+        connection: Redis,
+        prefix: str = "jobs",
+        visibility_timeout: int = 60,
+        max_retries: int = 3,
+        retry_delay: float = 5,
+    ) -> None:
+        self.connection = connection
+        self.visibility_timeout = visibility_timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.queue_key = f"{prefix}:queue"
+        self.processing_key = f"{prefix}:processing"
+        self.delayed_key = f"{prefix}:delayed"
+        self.failed_key = f"{prefix}:failed"
+        self.job_key_prefix = f"{prefix}:job"
+        self.dedup_key_prefix = f"{prefix}:dedup"
+        self.handlers: Dict[str, Callable] = {}
+        self._claim = connection.register_script(CLAIM_SCRIPT)
+        self._release_dedup = connection.register_script(RELEASE_DEDUP_SCRIPT)
+
+    def handler(self, name: str) -> Callable:
+        def decorator(f):
+            self.handlers[name] = f
+            return f
+
+        return decorator
+
+    def is_local(self) -> bool:
+        return current_app.config.get("JOB_QUEUE_MODE", "redis") == "local"
+
+    def job_key(self, job_id: str) -> str:
+        return f"{self.job_key_prefix}:{job_id}"
+
+    def enqueue(
+        self,
+        name: str,
+        *args: Any,
+        dedup_key: str | None = None,
+        **kwargs: Any,
+    ) -> str | None:
+        """
+        Add a job and return its id. With a dedup key, the job is not added
+        while another job with the same key is pending and the id of that
+        job is returned instead.
+        """
+        if name not in self.handlers:
+            raise KeyError(f"no handler registered for job {name}")
+        if self.is_local():
+            self.handlers[name](*args, **kwargs)
+            return None
+
+        job_id = str(uuid.uuid4())
+        if dedup_key is not None:
+            dedup_key = f"{self.dedup_key_prefix}:{dedup_key}"
+            added = self.connection.set(
+                dedup_key, job_id, nx=True, ex=self.visibility_timeout * 10
+            )
+            if not added:
+                return self.connection.get(dedup_key)
+
+        job = {
+            "name": name,
+            "args": args,
+            "kwargs": kwargs,
+            "dedup_key": dedup_key,
+        }
+        pipeline = self.connection.pipeline()
+        pipeline.hset(self.job_key(job_id), mapping={"data": json.dumps(job)})
+        pipeline.lpush(self.queue_key, job_id)
+        pipeline.execute()
+        return job_id
+
+    def release_dedup_key(self, dedup_key: str) -> None:
+        """
+        Let jobs with the dedup key be enqueued again while the running job
+        holding it has not finished yet.
+        """
+        self.connection.delete(f"{self.dedup_key_prefix}:{dedup_key}")
+
+    def claim(self) -> str | None:
+        return self._claim(
+            keys=[self.queue_key, self.processing_key, self.delayed_key],
+            args=[time.time(), self.visibility_timeout],
+        )
+
+    def finish(self, job_id: str, job: Dict[str, Any]) -> None:
+        pipeline = self.connection.pipeline()
+        pipeline.zrem(self.processing_key, job_id)
+        pipeline.delete(self.job_key(job_id))
+        if job.get("dedup_key") is not None:
+            # the key may have been released and taken by a newer job
+            self._release_dedup(keys=[job["dedup_key"]], args=[job_id], client=pipeline)
+        pipeline.execute()
+
+    def fail(self, job_id: str, job: Dict[str, Any], attempts: int) -> None:
+        pipeline = self.connection.pipeline()
+        pipeline.zrem(self.processing_key, job_id)
+        if attempts > self.max_retries:
+            pipeline.lpush(self.failed_key, job_id)
+            if job.get("dedup_key") is not None:
+                self._release_dedup(
+                    keys=[job["dedup_key"]], args=[job_id], client=pipeline
+                )
+        else:
+            run_at = time.time() + self.retry_delay * 2 ** (attempts - 1)
+            pipeline.zadd(self.delayed_key, {job_id: run_at})
+        pipeline.execute()
+
+    def process(self, job_id: str) -> None:
+        job_key = self.job_key(job_id)
+        data = self.connection.hget(job_key, "data")
+        if data is None:
+            self.connection.zrem(self.processing_key, job_id)
+            return
+        attempts = self.connection.hincrby(job_key, "attempts", 1)
+        job = json.loads(data)
+        handler = self.handlers.get(job["name"])
+        try:
+            if handler is None:
+                raise KeyError(f"no handler registered for job {job['name']}")
+            handler(*job["args"], **job["kwargs"])
+        except Exception:
+            current_app.logger.exception("job %s (%s) failed", job_id, job["name"])
+            self.fail(job_id, job, attempts)
+            return
+        self.finish(job_id, job)
+
+    def work(self, burst: bool = False, poll_interval: float = 1) -> None:
+        """
+        Process jobs until interrupted, or until the queue is empty when
+        `burst` is set.
+        """
+        while True:
+            job_id = self.claim()
+            if job_id is None:
+                if burst:
+                    return
+                time.sleep(poll_interval)
+                continue
+            self.process(job_id)
@@ -0,0 +1,59 @@
+from flask.json.provider import DefaultJSONProvider
+from flask import Response
+from datetime import date
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def default(o: Any) -> Any:
+    # same format orjson uses for dates, instead of Flask's HTTP date format
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider encoding compact output with orjson when it is installed.
+    Output is the same as the default provider's: keys are sorted, and when
+    `ensure_ascii` is set, output with non ASCII characters is encoded by
+    the standard library to keep the escapes. Dates are encoded in ISO
+    format.
+    """
+
+    default = staticmethod(default)
+
+    def fast_dumps(self, obj: Any) -> bytes | None:
+        if orjson is None:
+            return None
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        try:
+            data = orjson.dumps(obj, default=self.default, option=option)
+        except (orjson.JSONEncodeError, TypeError):
+            return None
+        if self.ensure_ascii and not data.isascii():
+            return None
+        return data
+
+    def is_compact(self, **kwargs: Any) -> bool:
+        return kwargs == {"separators": (",", ":")}
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if self.is_compact(**kwargs):
+            data = self.fast_dumps(obj)
+            if data is not None:
+                return data.decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        data = self.fast_dumps(obj)
+        if data is None:
+            return super().response(obj)
+        return self._app.response_class(data + b"\n", mimetype=self.mimetype)
@@ -1,5 +1,5 @@
 from flask import request, url_for
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from app.models import User, List, Gift
 from mongoengine.queryset.visitor import Q
 import math
@@ -19,6 +19,8 @@ def get_paginated_data(
     query: Q,
     endpoint: str,
     endpoint_params: Dict[str, str] = {},
+    fields: Tuple[str, ...] | None = None,
+    order_by: Tuple[str, ...] = (),
 ) -> Dict[str, Any] | None:
     parameters = request.args
     page = parameters.get("page", 1, type=int)
@@ -27,7 +29,13 @@ def get_paginated_data(
     if cur_start is None:
         return None
 
-    items = [item.to_dict() for item in model.objects(query)[cur_start:cur_stop]]
+    queryset = model.objects(query)
+    if order_by:
+        queryset = queryset.order_by(*order_by)
+    if fields is not None:
+        queryset = queryset.only(*fields)
+        endpoint_params = {**endpoint_params, "fields": ",".join(fields)}
+    items = [item.to_dict(fields=fields) for item in queryset[cur_start:cur_stop]]
     total_count = model.objects(query).count()
     total_pages = math.ceil(total_count / per_page)
 
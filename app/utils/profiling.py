@@ -0,0 +1,158 @@
+from app import redis_connection
+from collections import Counter
+from flask import current_app, g, request
+from redis import Redis
+from threading import Lock, Thread, get_ident
+from types import FrameType
+from typing import Any, Dict, Tuple
+import json
+import sys
+import time
+
+SETTINGS_KEY = "profiling:settings"
+ENDPOINTS_KEY = "profiling:endpoints"
+SAMPLES_TTL = 24 * 60 * 60
+
+
+def fold(frame: FrameType) -> str:
+    """Stack of the frame from the outermost call, in the folded format."""
+    names = []
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        # co_qualname is new in Python 3.11
+        code = frame.f_code
+        names.append(f"{module}:{getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the threads handling profiled requests from a
+    background thread and accumulates them per endpoint in Redis as folded
+    stacks, the input of flamegraph.pl and speedscope. Profiling is switched
+    on through Redis so it applies to every worker; while it is off a
+    request costs a clock read, the settings are fetched at most once per
+    `refresh` seconds.
+    """
+
+    def __init__(self, connection: Redis, refresh: float = 1) -> None:
+        self.connection = connection
+        self.refresh = refresh
+        self.lock = Lock()
+        self.tracked: Dict[int, Tuple[str, Counter]] = {}
+        self.thread = None
+        self.settings = None
+        self.settings_checked_at = float("-inf")
+
+    def stacks_key(self, endpoint: str) -> str:
+        return f"profiling:stacks:{endpoint}"
+
+    def start(
+        self, seconds: int, header: str | None = None, value: str | None = None
+    ) -> Dict[str, Any]:
+        """Profile requests for `seconds`, dropping the previous samples."""
+        settings = {"until": time.time() + seconds, "header": header, "value": value}
+        endpoints = self.connection.smembers(ENDPOINTS_KEY)
+        pipeline = self.connection.pipeline()
+        pipeline.delete(ENDPOINTS_KEY, *[self.stacks_key(name) for name in endpoints])
+        pipeline.set(SETTINGS_KEY, json.dumps(settings), ex=seconds)
+        pipeline.execute()
+        self.settings_checked_at = float("-inf")
+        return settings
+
+    def stop(self) -> None:
+        self.connection.delete(SETTINGS_KEY)
+        self.settings_checked_at = float("-inf")
+
+    def get_settings(self) -> Dict[str, Any] | None:
+        now = time.monotonic()
+        if now - self.settings_checked_at >= self.refresh:
+            data = self.connection.get(SETTINGS_KEY)
+            self.settings = json.loads(data) if data is not None else None
+            self.settings_checked_at = now
+        settings = self.settings
+        if settings is None or settings["until"] <= time.time():
+            return None
+        return settings
+
+    def should_profile(self) -> bool:
+        settings = self.get_settings()
+        if settings is None:
+            return False
+        if settings["header"] is None:
+            return True
+        received = request.headers.get(settings["header"])
+        if received is None:
+            return False
+        return settings["value"] is None or received == settings["value"]
+
+    def begin(self, endpoint: str, interval: float) -> None:
+        with self.lock:
+            self.tracked[get_ident()] = (endpoint, Counter())
+            if self.thread is None:
+                self.thread = Thread(target=self.run, args=(interval,), daemon=True)
+                self.thread.start()
+
+    def end(self) -> None:
+        with self.lock:
+            entry = self.tracked.pop(get_ident(), None)
+        if entry is None or not entry[1]:
+            return
+        endpoint, stacks = entry
+        key = self.stacks_key(endpoint)
+        pipeline = self.connection.pipeline(transaction=False)
+        for stack, count in stacks.items():
+            pipeline.hincrby(key, stack, count)
+        pipeline.expire(key, SAMPLES_TTL)
+        pipeline.sadd(ENDPOINTS_KEY, endpoint)
+        pipeline.expire(ENDPOINTS_KEY, SAMPLES_TTL)
+        pipeline.execute()
+
+    def run(self, interval: float) -> None:
+        # the thread stops once no request is profiled, `begin` restarts it
+        while True:
+            time.sleep(interval)
+            with self.lock:
+                if not self.tracked:
+                    self.thread = None
+                    return
+                frames = sys._current_frames()
+                for thread_id, (_, stacks) in self.tracked.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[fold(frame)] += 1
+
+    def sample_counts(self) -> Dict[str, int]:
+        endpoints = sorted(self.connection.smembers(ENDPOINTS_KEY))
+        pipeline = self.connection.pipeline(transaction=False)
+        for endpoint in endpoints:
+            pipeline.hvals(self.stacks_key(endpoint))
+        counts = pipeline.execute()
+        return {
+            endpoint: sum(int(count) for count in values)
+            for endpoint, values in zip(endpoints, counts)
+        }
+
+    def folded(self, endpoint: str) -> str | None:
+        stacks = self.connection.hgetall(self.stacks_key(endpoint))
+        if not stacks:
+            return None
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+profiler = SamplingProfiler(redis_connection)
+
+
+def start_profiling() -> None:
+    if not current_app.config.get("PROFILING_ENABLED", True):
+        return
+    if profiler.should_profile():
+        interval = current_app.config.get("PROFILING_INTERVAL", 0.005)
+        profiler.begin(request.endpoint or "unknown", interval)
+        g.profiled = True
+
+
+def stop_profiling(exception: BaseException | None = None) -> None:
+    if g.get("profiled", False):
+        profiler.end()
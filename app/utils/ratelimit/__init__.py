@@ -0,0 +1,10 @@
+from app.utils.ratelimit.limiter import RateLimiter
+from app.utils.ratelimit import keys
+from app import redis_connection
+
+limiter = RateLimiter(redis_connection)
+
+__all__ = [
+    "limiter",
+    "keys",
+]
@@ -0,0 +1,20 @@
+from flask import request
+
+
+def remote_address() -> str:
+    return request.remote_addr or "127.0.0.1"
+
+
+def phone_number() -> str:
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and isinstance(data.get("phone_number"), str):
+        return data["phone_number"]
+    return remote_address()
+
+
+def token() -> str:
+    authorization = request.headers.get("Authorization", "")
+    auth_type, _, auth_token = authorization.partition(" ")
+    if auth_type == "Bearer" and auth_token:
+        return auth_token
+    return remote_address()
@@ -0,0 +1,207 @@
+from app.utils.errors import rate_limit_exeeded
+from flask import current_app
+from functools import wraps
+from redis import Redis
+from threading import Lock
+from typing import Callable, Dict, NamedTuple, Tuple
+import time
+
+PERIODS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 60 * 60,
+    "day": 24 * 60 * 60,
+}
+
+# Sliding window counter: the count of the previous window is weighted by
+# the part of it still inside the sliding window. First gives back ARGV[5]
+# unused requests of an expired lease to the window KEYS[3] they were
+# counted in, then reserves up to ARGV[4] requests and returns the number
+# granted and, when nothing is granted, the seconds until the current
+# window ends.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3]) % window
+local requested = tonumber(ARGV[4])
+local refund = tonumber(ARGV[5])
+if refund > 0 and redis.call('EXISTS', KEYS[3]) == 1 then
+    local count = tonumber(redis.call('GET', KEYS[3]))
+    redis.call('SET', KEYS[3], math.max(0, count - refund), 'KEEPTTL')
+end
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local used = previous * (window - elapsed) / window + current
+local available = math.floor(limit - used)
+if available <= 0 then
+    return {0, math.ceil(window - elapsed)}
+end
+local granted = math.min(available, requested)
+redis.call('INCRBY', KEYS[1], granted)
+redis.call('EXPIRE', KEYS[1], window * 2)
+return {granted, 0}
+"""
+
+
+def parse_limit(limit: str) -> Tuple[int, int]:
+    amount, period = limit.split("/")
+    return int(amount), PERIODS[period.strip()]
+
+
+class Lease(NamedTuple):
+    """Requests reserved in the window `window_key`, `tokens` are unused."""
+
+    tokens: int
+    granted: int
+    expires_at: float
+    window_key: str | None
+
+
+class LocalLeases:
+    """
+    Per process cache of requests reserved in Redis but not used yet, and of
+    keys which were denied recently. Both expire after a short time so the
+    process never holds on to reservations of an idle key.
+    """
+
+    max_entries = 10000
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.leases: Dict[str, Lease] = {}
+
+    def take(self, key: str) -> Tuple[bool | None, Lease | None]:
+        """
+        Return True when a reserved request was used, False when the key is
+        blocked and None when Redis must be asked, with the lease that
+        ran out or expired.
+        """
+        now = time.monotonic()
+        with self.lock:
+            lease = self.leases.get(key)
+            if lease is None:
+                return None, None
+            if lease.expires_at <= now or lease.tokens == 0:
+                del self.leases[key]
+                return None, lease
+            if lease.tokens < 0:
+                return False, None
+            self.leases[key] = lease._replace(tokens=lease.tokens - 1)
+            return True, None
+
+    def put(self, key: str, lease: Lease) -> None:
+        """Store reserved requests, or block the key when tokens is -1."""
+        now = time.monotonic()
+        with self.lock:
+            if len(self.leases) >= self.max_entries:
+                self.leases = {
+                    k: lease
+                    for k, lease in self.leases.items()
+                    if lease.expires_at > now
+                }
+            # another thread may have stored a lease since this one ran out,
+            # keep its requests instead of dropping them
+            existing = self.leases.get(key)
+            if (
+                existing is not None
+                and existing.tokens > 0
+                and existing.expires_at > now
+            ):
+                if lease.tokens < 0:
+                    return
+                if lease.window_key == existing.window_key:
+                    lease = lease._replace(
+                        tokens=lease.tokens + existing.tokens,
+                        granted=lease.granted + existing.granted,
+                    )
+            self.leases[key] = lease
+
+
+class RateLimiter:
+    """
+    Keyed rate limits checked with an atomic sliding window in Redis. To
+    avoid a round trip on every request, a process reserves a batch of
+    requests at once and serves them from `LocalLeases`. The batch follows
+    the rate the process sees, starting at one request and doubling while
+    leases run out before they expire, up to a small fraction of the limit.
+    Requests left when a lease expires are given back to the window, so
+    sparse traffic is never charged for requests it did not make.
+    """
+
+    def __init__(
+        self,
+        connection: Redis,
+        prefix: str = "ratelimit",
+        batch_fraction: float = 0.05,
+        max_batch_size: int = 50,
+        lease_ttl: float = 1,
+    ) -> None:
+        self.connection = connection
+        self.prefix = prefix
+        self.batch_fraction = batch_fraction
+        self.max_batch_size = max_batch_size
+        self.lease_ttl = lease_ttl
+        self.leases = LocalLeases()
+        self._sliding_window = connection.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def batch_size(self, amount: int) -> int:
+        return max(1, min(self.max_batch_size, int(amount * self.batch_fraction)))
+
+    def next_batch_size(self, amount: int, previous: Lease | None) -> int:
+        if previous is None or previous.tokens < 0:
+            return 1
+        if previous.tokens == 0 and previous.expires_at > time.monotonic():
+            # used up within the lease time, the rate is higher
+            size = previous.granted * 2
+        else:
+            size = previous.granted - previous.tokens
+        return max(1, min(self.batch_size(amount), size))
+
+    def hit(self, key: str, amount: int, window: int) -> bool:
+        allowed, previous = self.leases.take(key)
+        if allowed is not None:
+            return allowed
+
+        refund = previous.tokens if previous is not None else 0
+        now = time.time()
+        window_index = int(now // window)
+        window_key = f"{key}:{window_index}"
+        granted, retry_after = self._sliding_window(
+            keys=[
+                window_key,
+                f"{key}:{window_index - 1}",
+                previous.window_key if refund > 0 else window_key,
+            ],
+            args=[
+                amount,
+                window,
+                now,
+                self.next_batch_size(amount, previous),
+                max(refund, 0),
+            ],
+        )
+        if granted <= 0:
+            ttl = min(retry_after, self.lease_ttl)
+            self.leases.put(key, Lease(-1, 0, time.monotonic() + ttl, None))
+            return False
+        expires_at = time.monotonic() + self.lease_ttl
+        self.leases.put(key, Lease(granted - 1, granted, expires_at, window_key))
+        return True
+
+    def limit(self, limit: str, key_func: Callable[[], str]) -> Callable:
+        amount, window = parse_limit(limit)
+
+        def decorator(f):
+            scope = f"{self.prefix}:{f.__name__}:{key_func.__name__}:{limit}"
+
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if current_app.config.get("RATELIMIT_ENABLED", True):
+                    key = f"{scope}:{key_func()}"
+                    if not self.hit(key, amount, window):
+                        return rate_limit_exeeded(limit)
+                return f(*args, **kwargs)
+
+            return decorated
+
+        return decorator
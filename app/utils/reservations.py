@@ -0,0 +1,98 @@
+from app.models import Gift
+from app.utils.sync import sync_write
+from app.utils.transactions import run_in_transaction
+from flask import current_app
+from pymongo import UpdateOne
+from typing import Dict, Iterable, List as ListType, Tuple
+
+RESERVED = "reserved"
+UNRESERVED = "unreserved"
+CONFLICT = "conflict"
+NOT_FOUND = "not_found"
+
+
+def reservation_updates(
+    list_id: str,
+    buyer_id: str,
+    reserve: Iterable[str],
+    unreserve: Iterable[str],
+    sync_version: int,
+) -> ListType[UpdateOne]:
+    """
+    Updates that only match the gifts they change: free gifts to reserve
+    and gifts reserved by the buyer to unreserve.
+    """
+    updates = []
+    for gift_id in reserve:
+        updates.append(
+            UpdateOne(
+                {"_id": gift_id, "list": list_id, "expected_buyer": None},
+                {"$set": {"expected_buyer": buyer_id, "sync_version": sync_version}},
+            )
+        )
+    for gift_id in unreserve:
+        updates.append(
+            UpdateOne(
+                {"_id": gift_id, "list": list_id, "expected_buyer": buyer_id},
+                {
+                    "$unset": {"expected_buyer": 1},
+                    "$set": {"sync_version": sync_version},
+                },
+            )
+        )
+    return updates
+
+
+def apply_reservations(
+    list_id: str,
+    owner_id: str,
+    buyer_id: str,
+    reserve: ListType[str],
+    unreserve: ListType[str],
+    use_transaction: bool | None = None,
+) -> Tuple[Dict[str, str], ListType[Gift]]:
+    """
+    Reserve and unreserve gifts of one list with a single bulk_write, then
+    read the gifts back to report the outcome of each: reserved or
+    unreserved when the gift ends up in the requested state, conflict when
+    another user holds it and not_found when it is not in the list. Also
+    return the gifts changed by the call.
+
+    The writes run in one transaction when enabled by the argument or the
+    RESERVATION_TRANSACTIONS setting.
+    """
+    state = {}
+
+    def operations(session):
+        with sync_write(list_id, owner_id, session) as sync_version:
+            updates = reservation_updates(
+                list_id, buyer_id, reserve, unreserve, sync_version
+            )
+            Gift._get_collection().bulk_write(updates, ordered=False, session=session)
+        documents = Gift._get_collection().find(
+            {"list": list_id, "_id": {"$in": [*reserve, *unreserve]}},
+            session=session,
+        )
+        state["sync_version"] = sync_version
+        state["documents"] = {document["_id"]: document for document in documents}
+
+    if use_transaction is None:
+        use_transaction = current_app.config.get("RESERVATION_TRANSACTIONS", False)
+    run_in_transaction(operations, use_transaction)
+
+    outcomes, changed = {}, []
+    requested = [(gift_id, RESERVED) for gift_id in reserve]
+    requested += [(gift_id, UNRESERVED) for gift_id in unreserve]
+    for gift_id, wanted in requested:
+        document = state["documents"].get(gift_id)
+        if document is None:
+            outcomes[gift_id] = NOT_FOUND
+            continue
+        holder = document.get("expected_buyer")
+        if wanted == RESERVED:
+            outcomes[gift_id] = RESERVED if holder == buyer_id else CONFLICT
+        else:
+            outcomes[gift_id] = UNRESERVED if holder is None else CONFLICT
+        if document.get("sync_version") == state["sync_version"]:
+            changed.append(Gift._from_son(document, created=False))
+    return outcomes, changed
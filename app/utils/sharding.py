@@ -0,0 +1,120 @@
+from collections import Counter
+from pymongo import monitoring
+from typing import Any, Dict, Iterator, List as ListType, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# commands whose filter decides which shards they are sent to, with the
+# key of the filter in the command. Inserts always carry the shard key.
+FILTERED_COMMANDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+}
+
+
+def sharded_models() -> ListType:
+    from app.models import List, Gift
+
+    return [List, Gift]
+
+
+def get_shard_keys() -> Dict[str, Tuple[str, ...]]:
+    """Collection name to the db fields of its shard key."""
+    shard_keys = {}
+    for model in sharded_models():
+        shard_keys[model._get_collection_name()] = tuple(
+            model._fields[field].db_field for field in model._meta["shard_key"]
+        )
+    return shard_keys
+
+
+def is_targeted(query: Dict[str, Any], shard_key: Tuple[str, ...]) -> bool:
+    """
+    A query is routed to the shards owning the matching chunks when it
+    restricts the shard key prefix to a value or a set of values.
+    """
+    condition = query.get(shard_key[0])
+    if condition is None:
+        return False
+    if isinstance(condition, dict):
+        return "$eq" in condition or "$in" in condition
+    return True
+
+
+def iter_queries(command_name: str, command: Dict[str, Any]) -> Iterator[Dict]:
+    if command_name in FILTERED_COMMANDS:
+        yield command.get(FILTERED_COMMANDS[command_name]) or {}
+    elif command_name == "update":
+        for update in command.get("updates", []):
+            yield update.get("q", {})
+    elif command_name == "delete":
+        for delete in command.get("deletes", []):
+            yield delete.get("q", {})
+    elif command_name == "aggregate":
+        pipeline = command.get("pipeline", [])
+        yield pipeline[0].get("$match", {}) if pipeline else {}
+
+
+class ShardRoutingAudit(monitoring.CommandListener):
+    """
+    Command listener reporting queries on sharded collections that do not
+    include the shard key, which mongos has to broadcast to every shard.
+    Registered on the connection when SHARD_AUDIT_ENABLED is set.
+    """
+
+    def __init__(self) -> None:
+        self.shard_keys = None
+        self.untargeted = Counter()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if self.shard_keys is None:
+            self.shard_keys = get_shard_keys()
+        command = event.command
+        collection = command.get(event.command_name)
+        shard_key = (
+            self.shard_keys.get(collection) if isinstance(collection, str) else None
+        )
+        if shard_key is None:
+            return
+        for query in iter_queries(event.command_name, command):
+            if is_targeted(query, shard_key):
+                continue
+            shape = (collection, event.command_name, tuple(sorted(query)))
+            if shape not in self.untargeted:
+                logger.warning(
+                    "untargeted %s on %s with filter fields %s, shard key is %s",
+                    event.command_name,
+                    collection,
+                    list(shape[2]),
+                    list(shard_key),
+                )
+            self.untargeted[shape] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        pass
+
+    def report(self) -> ListType[Tuple[Tuple[str, str, Tuple[str, ...]], int]]:
+        return self.untargeted.most_common()
+
+
+def shard_collection_commands(database: str) -> ListType[Dict[str, Any]]:
+    """Admin commands that shard the database with the declared shard keys."""
+    commands = [{"enableSharding": database}]
+    for model in sharded_models():
+        key = {model._fields[field].db_field: 1 for field in model._meta["shard_key"]}
+        commands.append(
+            {
+                "shardCollection": f"{database}.{model._get_collection_name()}",
+                "key": key,
+            }
+        )
+    return commands
+
+
+shard_audit = ShardRoutingAudit()
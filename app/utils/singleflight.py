@@ -0,0 +1,166 @@
+from app import redis_connection
+from concurrent.futures import Future, InvalidStateError, TimeoutError
+from flask import current_app
+from redis import Redis
+from threading import Lock
+from typing import Any, Callable, Dict
+import json
+import os
+import time
+
+CHANNEL_PREFIX = "singleflight:"
+
+# releases the lock only if it is still held by the caller
+RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical computations. In a process, callers of
+    a key already being computed wait on the future of the first caller.
+    Across processes, the first caller takes a short Redis lock, stores the
+    result for `result_ttl` milliseconds and broadcasts it over pub/sub; the
+    first caller of each other process subscribes to the channel of the key
+    while it waits for the broadcast, and computes the result itself only if
+    none arrives within `wait_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        connection: Redis,
+        lock_ttl: int = 5000,
+        result_ttl: int = 250,
+        wait_timeout: float = 2,
+    ) -> None:
+        self.connection = connection
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        self.lock = Lock()
+        self.calls: Dict[str, Future] = {}
+        self.release_script = connection.register_script(RELEASE_SCRIPT)
+        self.stats = {"computed": 0, "shared_local": 0, "shared_remote": 0}
+
+    def channel(self, key: str) -> str:
+        return f"{CHANNEL_PREFIX}{key}"
+
+    def lock_key(self, key: str) -> str:
+        return f"{CHANNEL_PREFIX}{key}:lock"
+
+    def result_key(self, key: str) -> str:
+        return f"{CHANNEL_PREFIX}{key}:result"
+
+    def count(self, stat: str) -> None:
+        with self.lock:
+            self.stats[stat] += 1
+
+    def do(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the result of `compute`, shared with concurrent callers of
+        the same key. Results must be JSON serializable, callers receiving
+        a broadcast result get it as decoded JSON.
+        """
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.calls[key] = future
+        if not leader:
+            # the leader may wait up to wait_timeout for its subscription to
+            # be confirmed and as long again for a remote result
+            try:
+                result = future.result(timeout=2 * self.wait_timeout)
+                self.count("shared_local")
+                return result
+            except TimeoutError:
+                self.count("computed")
+                return compute()
+
+        try:
+            result = self.lead(key, compute)
+            resolve(future, result=result)
+            return result
+        except BaseException as error:
+            resolve(future, error=error)
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+
+    def lead(self, key: str, compute: Callable[[], Any]) -> Any:
+        token = os.urandom(8).hex()
+        if not self.connection.set(
+            self.lock_key(key), token, nx=True, px=self.lock_ttl
+        ):
+            payload = self.wait_remote(key)
+            if payload is not None and "result" in payload:
+                self.count("shared_remote")
+                return payload["result"]
+            # the remote computation failed or timed out
+            self.count("computed")
+            return compute()
+
+        self.count("computed")
+        payload = None
+        try:
+            result = compute()
+            payload = current_app.json.dumps({"result": result}, separators=(",", ":"))
+            return result
+        finally:
+            self.release(key, token, payload)
+
+    def wait_remote(self, key: str) -> Dict[str, Any] | None:
+        """
+        Wait for the broadcast of the process holding the lock of the key
+        and return its decoded payload, or None on timeout.
+        """
+        pubsub = self.connection.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.channel(key))
+            # read the confirmation so the subscription is active before
+            # looking for a result published earlier
+            pubsub.get_message(timeout=self.wait_timeout)
+            stored = self.connection.get(self.result_key(key))
+            if stored is not None:
+                return json.loads(stored)
+            deadline = time.monotonic() + self.wait_timeout
+            while (remaining := deadline - time.monotonic()) > 0:
+                message = pubsub.get_message(timeout=remaining)
+                if message is not None:
+                    return json.loads(message["data"])
+            return None
+        finally:
+            pubsub.close()
+
+    def release(self, key: str, token: str, payload: str | None) -> None:
+        """
+        Store and broadcast the result and release the lock in one round
+        trip. The lock is held until the result is stored, so callers that
+        miss the broadcast find the stored result instead of recomputing.
+        """
+        pipeline = self.connection.pipeline()
+        if payload is not None:
+            pipeline.set(self.result_key(key), payload, px=self.result_ttl)
+        pipeline.publish(self.channel(key), payload or "{}")
+        self.release_script(keys=[self.lock_key(key)], args=[token], client=pipeline)
+        pipeline.execute()
+
+
+def resolve(future: Future, result: Any = None, error: BaseException | None = None):
+    try:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+    except InvalidStateError:
+        # already resolved by a broadcast
+        pass
+
+
+single_flight = SingleFlight(redis_connection)
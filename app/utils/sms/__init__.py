@@ -0,0 +1,12 @@
+from app.utils.sms.dispatcher import SMSDispatcher
+from app.utils.sms.providers import SMSProvider, FakeSMSProvider, register_provider
+from app import redis_connection
+
+sms_dispatcher = SMSDispatcher(redis_connection)
+
+__all__ = [
+    "sms_dispatcher",
+    "SMSProvider",
+    "FakeSMSProvider",
+    "register_provider",
+]
@@ -0,0 +1,107 @@
+from app.utils.sms.providers import SMSProvider, Message, providers
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from redis import Redis
+from typing import Dict, List
+import json
+import time
+
+
+class SMSDispatcher:
+    """
+    Outgoing messages are queued per provider in Redis and sent by
+    `dispatch` in batches. A dispatch lock keeps one dispatcher per provider,
+    which sends at most `provider.concurrency` batches in parallel and at
+    most `provider.rate_limit` messages per second.
+    """
+
+    def __init__(self, connection: Redis, prefix: str = "sms") -> None:
+        self.connection = connection
+        self.prefix = prefix
+        self._providers: Dict[str, SMSProvider] = {}
+
+    def get_provider(self) -> SMSProvider:
+        name = current_app.config.get("SMS_PROVIDER", "fake")
+        if name not in self._providers:
+            self._providers[name] = providers[name]()
+        return self._providers[name]
+
+    def outbox_key(self, provider: SMSProvider) -> str:
+        return f"{self.prefix}:{provider.name}:outbox"
+
+    def queue_message(self, phone_number: str, text: str) -> None:
+        message = json.dumps([phone_number, text])
+        self.connection.lpush(self.outbox_key(self.get_provider()), message)
+
+    def pending(self) -> int:
+        return self.connection.llen(self.outbox_key(self.get_provider()))
+
+    def pop_batch(self, provider: SMSProvider, count: int) -> List[Message]:
+        messages = self.connection.rpop(self.outbox_key(provider), count)
+        return [tuple(json.loads(message)) for message in messages or []]
+
+    def requeue(self, provider: SMSProvider, batch: List[Message]) -> None:
+        messages = [json.dumps(list(message)) for message in batch]
+        self.connection.rpush(self.outbox_key(provider), *messages)
+
+    def dispatch(self, lock_timeout: int = 60) -> int | None:
+        """
+        Send queued messages until the outbox is empty and return the number
+        of messages sent, or None when another dispatcher holds the lock.
+        Failed batches are put back in the outbox and the first error is
+        raised once the others are sent.
+        """
+        provider = self.get_provider()
+        lock = self.connection.lock(
+            f"{self.prefix}:{provider.name}:dispatch", timeout=lock_timeout
+        )
+        if not lock.acquire(blocking=False):
+            return None
+
+        sent = 0
+        error = None
+        # messages sent in the current one second window
+        window_start, window_sent = time.monotonic(), 0
+        try:
+            with ThreadPoolExecutor(max_workers=provider.concurrency) as executor:
+                while True:
+                    if time.monotonic() - window_start >= 1:
+                        window_start, window_sent = time.monotonic(), 0
+                    if window_sent >= provider.rate_limit:
+                        if not self.connection.llen(self.outbox_key(provider)):
+                            break
+                        time.sleep(max(0, 1 - (time.monotonic() - window_start)))
+                        window_start, window_sent = time.monotonic(), 0
+
+                    batches = []
+                    budget = provider.rate_limit - window_sent
+                    while len(batches) < provider.concurrency and budget > 0:
+                        count = min(provider.max_batch_size, budget)
+                        batch = self.pop_batch(provider, count)
+                        if not batch:
+                            break
+                        batches.append(batch)
+                        budget -= len(batch)
+                    if not batches:
+                        break
+                    window_sent = provider.rate_limit - budget
+
+                    futures = [
+                        executor.submit(provider.send_batch, batch) for batch in batches
+                    ]
+                    for batch, future in zip(batches, futures):
+                        try:
+                            future.result()
+                            sent += len(batch)
+                        except Exception as e:
+                            self.requeue(provider, batch)
+                            error = error or e
+                    if error is not None:
+                        break
+                    lock.extend(lock_timeout, replace_ttl=True)
+        finally:
+            lock.release()
+
+        if error is not None:
+            raise error
+        return sent
@@ -0,0 +1,52 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (phone_number, text)
+Message = Tuple[str, str]
+
+
+class SMSProvider(ABC):
+    """
+    Interface of SMS gateways. `send_batch` sends up to `max_batch_size`
+    messages in one call and raises on failure. `concurrency` is the number
+    of batches sent in parallel and `rate_limit` the number of messages
+    allowed per second.
+    """
+
+    name = "base"
+    max_batch_size = 100
+    concurrency = 1
+    rate_limit = 100
+
+    @abstractmethod
+    def send_batch(self, messages: List[Message]) -> None:
+        pass
+
+
+class FakeSMSProvider(SMSProvider):
+    name = "fake"
+    concurrency = 4
+    # sent messages kept for inspection
+    outbox_size = 1000
+
+    def __init__(self) -> None:
+        self.outbox: Deque[Message] = deque(maxlen=self.outbox_size)
+
+    def send_batch(self, messages: List[Message]) -> None:
+        for phone_number, text in messages:
+            logger.info("SMS to %s: %s", phone_number, text)
+        self.outbox.extend(messages)
+
+
+providers: Dict[str, type] = {
+    FakeSMSProvider.name: FakeSMSProvider,
+}
+
+
+def register_provider(provider_class: type) -> type:
+    providers[provider_class.name] = provider_class
+    return provider_class
@@ -0,0 +1,133 @@
+from app.models import List, Gift, GiftTombstone
+from app.models.tombstone import TOMBSTONE_TTL_SECONDS
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+import time
+
+# a pending version older than this belongs to a writer that died before
+# finishing, readers stop waiting for it
+SYNC_WRITE_TIMEOUT_SECONDS = 60
+
+
+def begin_sync_write(list_id: str, user_id: str, session=None) -> int:
+    """
+    Increment the sync version of the list and record the new value as
+    pending in the same update, so readers never hand out a token past a
+    version that is not written yet. The owner is part of the filter so the
+    write is routed by the shard key.
+    """
+    collection = List._get_collection()
+    query = {"_id": list_id, "user": user_id}
+    while True:
+        document = collection.find_one(query, {"sync_version": True}, session=session)
+        if document is None:
+            raise LookupError(f"list {list_id} not found")
+        current = document.get("sync_version")
+        version = (current or 0) + 1
+        # compare and set, retried when another writer took the version
+        result = collection.update_one(
+            {**query, "sync_version": current},
+            {
+                "$set": {"sync_version": version},
+                "$push": {"sync_pending": {"version": version, "at": time.time()}},
+            },
+            session=session,
+        )
+        if result.modified_count:
+            return version
+
+
+def end_sync_write(list_id: str, user_id: str, version: int, session=None) -> None:
+    List._get_collection().update_one(
+        {"_id": list_id, "user": user_id},
+        {"$pull": {"sync_pending": {"version": version}}},
+        session=session,
+    )
+
+
+@contextmanager
+def sync_write(list_id: str, user_id: str, session=None) -> Iterator[int]:
+    """
+    Yield the sync version for the changes written in the block, the
+    version stays pending until the block exits.
+    """
+    version = begin_sync_write(list_id, user_id, session)
+    try:
+        yield version
+    finally:
+        end_sync_write(list_id, user_id, version, session)
+
+
+def record_gift_deletion(gift: Gift, list_id: str, user_id: str) -> None:
+    with sync_write(list_id, user_id) as sync_version:
+        tombstone = GiftTombstone()
+        tombstone.id = gift.id
+        tombstone.list = list_id
+        tombstone.sync_version = sync_version
+        tombstone.save()
+
+
+def written_version(gift_list: List) -> int:
+    """
+    The highest version up to which every change of the list is written:
+    the version of the list, or the version before the oldest one still
+    being written.
+    """
+    version = gift_list.sync_version or 0
+    now = time.time()
+    for entry in gift_list.sync_pending:
+        if now - entry["at"] < SYNC_WRITE_TIMEOUT_SECONDS:
+            version = min(version, entry["version"] - 1)
+    return version
+
+
+def make_sync_token(version: int) -> str:
+    return f"{version}.{int(time.time())}"
+
+
+def parse_sync_token(token: str | None) -> int | None:
+    """
+    Return the version of a sync token, or None when changes can not be
+    computed from it because the tombstones issued since may have expired.
+    Raise ValueError on malformed tokens.
+    """
+    if token is None:
+        return None
+    version, _, issued_at = token.partition(".")
+    version, issued_at = int(version), int(issued_at)
+    if version < 0:
+        raise ValueError("invalid sync token")
+    if time.time() - issued_at > TOMBSTONE_TTL_SECONDS:
+        return None
+    return version
+
+
+def get_list_changes(gift_list: List, since: int | None) -> Dict[str, Any]:
+    """
+    Return the gifts of the list changed after the `since` version and the
+    ids of the gifts deleted since then. Without a version every gift is
+    returned and `reset` tells the client to drop its copy.
+
+    The version of the returned token is the written version of the list
+    read before the gifts, so every change up to it is found by this call.
+    Changes written after it may be returned again by the next call.
+    """
+    version = written_version(gift_list)
+    reset = since is None or since > (gift_list.sync_version or 0)
+    if reset:
+        gifts = Gift.objects(list=gift_list)
+        deleted = []
+    else:
+        gifts = Gift.objects(list=gift_list, sync_version__gt=since)
+        tombstones = GiftTombstone.objects(
+            list=gift_list.id, sync_version__gt=since
+        ).only("id")
+        deleted = [tombstone.id for tombstone in tombstones]
+
+    return {
+        "list": gift_list.to_dict(),
+        "gifts": [gift.to_dict() for gift in gifts],
+        "deleted": deleted,
+        "reset": reset,
+        "sync_token": make_sync_token(version),
+    }
@@ -0,0 +1,15 @@
+from mongoengine.connection import get_connection
+from typing import Callable
+
+
+def run_in_transaction(operations: Callable, use_transaction: bool) -> None:
+    """
+    Call `operations` with the session of a transaction when
+    `use_transaction` is set, or with None to run without one. Transactions
+    need MongoDB to run as a replica set.
+    """
+    if not use_transaction:
+        operations(None)
+        return
+    with get_connection().start_session() as session:
+        session.with_transaction(operations)
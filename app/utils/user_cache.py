@@ -0,0 +1,152 @@
+from app.models import User
+from app import redis_connection
+from collections import OrderedDict
+from datetime import datetime
+from pymongo import ReadPreference
+from redis import Redis
+from threading import Lock
+from typing import Any, Dict
+import json
+import time
+
+INVALIDATION_CHANNEL = "user_cache:invalidate"
+
+# stores the entry only if the user was not invalidated since the
+# generation in ARGV[1] was read, so a fill racing an update can not write
+# the old document back
+FILL_SCRIPT = """
+if (redis.call("GET", KEYS[2]) or "0") ~= ARGV[1] then
+    return 0
+end
+redis.call("SET", KEYS[1], ARGV[2], "EX", ARGV[3])
+return 1
+"""
+
+
+class UserCache:
+    """
+    Read-through cache of User documents: a per process LRU in front of
+    Redis in front of MongoDB. Invalidations delete the Redis entry and are
+    broadcast over pub/sub so every process drops its local copy; the short
+    local TTL bounds staleness if a message is lost. Invalidations also bump
+    a generation key, fills started before the bump are discarded.
+    """
+
+    def __init__(
+        self,
+        connection: Redis,
+        max_entries: int = 10000,
+        local_ttl: float = 60,
+        redis_ttl: int = 60 * 60,
+    ) -> None:
+        self.connection = connection
+        self.max_entries = max_entries
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.lock = Lock()
+        self.entries: OrderedDict = OrderedDict()
+        self.thread = None
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+        self._fill = connection.register_script(FILL_SCRIPT)
+
+    def key(self, user_id: str) -> str:
+        return f"user:{user_id}:profile"
+
+    def generation_key(self, user_id: str) -> str:
+        return f"user:{user_id}:profile:generation"
+
+    def start(self) -> None:
+        pubsub = self.connection.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: self.on_invalidate})
+        self.thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def on_invalidate(self, message: Dict[str, Any]) -> None:
+        for user_id in message["data"].split(","):
+            self.drop_local(user_id)
+
+    def drop_local(self, user_id: str) -> None:
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def get_local(self, user_id: str) -> Dict[str, Any] | None:
+        with self.lock:
+            if self.thread is None:
+                self.start()
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            son, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return son
+
+    def set_local(self, user_id: str, son: Dict[str, Any]) -> None:
+        with self.lock:
+            self.entries[user_id] = (son, time.monotonic() + self.local_ttl)
+            self.entries.move_to_end(user_id)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def count(self, stat: str) -> None:
+        with self.lock:
+            self.stats[stat] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counters of this process since it started."""
+        with self.lock:
+            return {**self.stats, "local_entries": len(self.entries)}
+
+    def get(self, user_id: str) -> User | None:
+        son = self.get_local(user_id)
+        if son is not None:
+            self.count("local_hits")
+            return User._from_son(son, created=False)
+
+        data = self.connection.get(self.key(user_id))
+        if data is not None:
+            self.count("redis_hits")
+            son = json.loads(data)
+            if son.get("created_at") is not None:
+                son["created_at"] = datetime.fromisoformat(son["created_at"])
+        else:
+            self.count("misses")
+            generation = self.connection.get(self.generation_key(user_id)) or "0"
+            # never fill the cache from a possibly stale secondary
+            son = (
+                User.objects(id=user_id)
+                .read_preference(ReadPreference.PRIMARY)
+                .as_pymongo()
+                .first()
+            )
+            if son is None:
+                return None
+            data = json.dumps(son, default=datetime.isoformat)
+            stored = self._fill(
+                keys=[self.key(user_id), self.generation_key(user_id)],
+                args=[generation, data, self.redis_ttl],
+            )
+            if not stored:
+                # invalidated while reading, the document may be outdated
+                return User._from_son(son, created=False)
+
+        self.set_local(user_id, son)
+        return User._from_son(son, created=False)
+
+    def invalidate(self, *user_ids: str) -> None:
+        if not user_ids:
+            return
+        for user_id in user_ids:
+            self.drop_local(user_id)
+        pipeline = self.connection.pipeline()
+        for user_id in user_ids:
+            # outlives any fill that read the previous generation
+            pipeline.incr(self.generation_key(user_id))
+            pipeline.expire(self.generation_key(user_id), self.redis_ttl)
+        pipeline.delete(*[self.key(user_id) for user_id in user_ids])
+        pipeline.publish(INVALIDATION_CHANNEL, ",".join(user_ids))
+        pipeline.execute()
+
+
+user_cache = UserCache(redis_connection)
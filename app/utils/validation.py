@@ -0,0 +1,35 @@
+from threading import Lock
+from typing import Any, Dict
+
+_validators: Dict[Any, Any] = {}
+_lock = Lock()
+
+
+class ValidationError(ValueError):
+    pass
+
+
+def get_validator(schema) -> Any:
+    """
+    Validator of a jsl schema, the JSON schema is generated and compiled on
+    first use only. jsonschema is imported here rather than at startup, it
+    is by far the slowest import of the app.
+    """
+    validator = _validators.get(schema)
+    if validator is None:
+        from jsonschema.validators import validator_for
+
+        raw_schema = schema.get_schema()
+        validator_class = validator_for(raw_schema)
+        validator_class.check_schema(raw_schema)
+        validator = validator_class(raw_schema)
+        with _lock:
+            _validators[schema] = validator
+    return validator
+
+
+def validate(data: Any, schema) -> None:
+    """Raise ValidationError when data does not match the jsl schema."""
+    error = next(get_validator(schema).iter_errors(data), None)
+    if error is not None:
+        raise ValidationError(error.message)
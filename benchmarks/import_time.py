@@ -0,0 +1,79 @@
+"""
+Measure the cold import time of the app package and check it against a
+budget. Every run imports the app in a fresh interpreter with
+`python -X importtime`; the median over the runs is reported with the
+slowest modules.
+
+    python benchmarks/import_time.py --runs 7 --budget-ms 700
+
+Exits with status 1 when the median exceeds the budget or when a module
+that must load on demand is imported at startup.
+"""
+
+from pathlib import Path
+import argparse
+import statistics
+import subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# modules only some requests need, importing them at startup is a regression
+LAZY_MODULES = ("jsonschema",)
+
+
+def measure(module: str) -> dict:
+    """Cumulative import time in microseconds of every imported module."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=700)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    total_ms = statistics.median(run[args.module][1] for run in runs) / 1000
+    self_ms = {}
+    for run in runs:
+        for name, (self_us, _) in run.items():
+            self_ms.setdefault(name, []).append(self_us / 1000)
+    slowest = sorted(
+        ((statistics.median(values), name) for name, values in self_ms.items()),
+        reverse=True,
+    )[: args.top]
+
+    print(f"import {args.module}: {total_ms:.1f} ms median of {args.runs} runs")
+    print("slowest modules by self time:")
+    for milliseconds, name in slowest:
+        print(f"  {milliseconds:8.1f} ms  {name}")
+
+    failed = False
+    eager = [name for name in LAZY_MODULES if name in runs[0]]
+    if eager:
+        print(f"FAIL: imported at startup: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: over the budget of {args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,537 @@
+"""
+Replay a recorded request log against a build of the API and compare the
+results of two builds.
+
+    python benchmarks/replay.py run traffic.ndjson --target http://localhost:5000 \
+        --speed 2 --concurrency 16 -o build-a.ndjson
+    python benchmarks/replay.py run traffic.ndjson --target http://localhost:5001 \
+        --speed 2 --concurrency 16 -o build-b.ndjson
+    python benchmarks/replay.py compare build-a.ndjson build-b.ndjson
+
+The log has one JSON object per line, `user_id`, `body` and `status` are
+optional and `ts` is in seconds:
+
+    {"ts": 1697712000.25, "method": "GET", "path": "/api/list/<id>?page=1",
+     "user_id": "<id>", "body": null, "status": 200}
+
+The access log written with ACCESS_LOG_ENABLED is a request log. Its
+records carry the JSON body of writes only with ACCESS_LOG_REQUEST_BODIES
+set, writes recorded without a `body` key are skipped and counted in the
+summary, as the request could not be rebuilt. Login requests are never
+recorded with their body.
+
+The recorded users, lists and gifts do not exist on the target, so each of
+them is mapped onto a fixture seeded before the replay starts and the ids in
+paths and bodies and the auth tokens are rewritten. Each build should be
+replayed against a fresh database so both start from the same fixtures.
+
+`--target app` replays in-process with the Flask test client on the backend
+selected by the FLASK_* environment. Users are created through the models
+and rate limiting is disabled.
+
+With a URL, users are seeded by logging in through the API with the code
+it returns, so the target has to run with FLASK_SMS_PROVIDER=fake and
+FLASK_RATELIMIT_ENABLED=false: the login endpoints allow 20 codes a minute
+per address, seeding fails past 20 users and replayed requests would be
+answered with 429 instead of measuring the build.
+
+Results keep a digest of each response body with the seeded ids mapped
+back to the recorded ones and ids created by the replay, timestamps and
+tokens masked; `compare` reports requests whose status or body differ.
+Requests replayed concurrently may run in another order than recorded, so
+reads racing writes can differ between two replays of the same build.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from pathlib import Path
+from hashlib import blake2b
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# path segments followed by an id, unless the next segment is a route name
+ID_PARENTS = ("user", "list", "gift")
+ROUTE_NAMES = {"auth", "logout", "search", "feed", "gifts", "export", "reservations"}
+
+SEED_PHONE_PREFIX = "0990"
+SEED_GIFT = {"price": 1, "link": "https://example.com"}
+REFERENCE_KEYS = {"user_id", "list_id", "gift_id"}
+WRITE_METHODS = {"POST", "PUT", "PATCH"}
+
+# masked in response bodies, they change from one replay to the next
+VOLATILE_KEYS = {"created_at", "updated_at", "token", "login_code", "sync_token"}
+ID_RE = re.compile(
+    r"[0-9a-hjkmnp-tv-z]{26}"
+    r"|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+)
+
+
+class PreparedRequest(NamedTuple):
+    index: int
+    ts: float
+    method: str
+    path: str
+    endpoint: str
+    headers: Dict[str, str]
+    body: Any
+    recorded_status: Optional[int]
+
+
+class HttpTarget:
+    def __init__(self, base_url: str, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def send(self, method: str, path: str, headers: Dict[str, str], body: Any):
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers = {**headers, "Content-Type": "application/json"}
+        request = Request(self.base_url + path, data, headers, method=method)
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except HTTPError as error:
+            return error.code, error.read()
+        except URLError:
+            # connection failures are reported as status 0
+            return 0, b""
+
+    def create_user(self, phone_number: str) -> Tuple[str, str]:
+        """Log in through the API and return the id and token of the user."""
+        data = {"phone_number": phone_number}
+        response = call(self, "POST", "/api/user/auth/login/code", body=data)
+        data["login_code"] = response["login_code"]
+        token = call(self, "POST", "/api/user/auth/login", body=data)["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        return call(self, "GET", "/api/user", headers)["id"], token
+
+
+class AppTarget:
+    def __init__(self):
+        sys.path.insert(0, str(ROOT))
+        from app import app
+
+        self.app = app
+        # the replay sends every request from the same address
+        self.app.config["RATELIMIT_ENABLED"] = False
+
+    def send(self, method: str, path: str, headers: Dict[str, str], body: Any):
+        # a client per request, test clients keep cookie state
+        response = self.app.test_client().open(
+            path, method=method, headers=headers, json=body
+        )
+        return response.status_code, response.get_data()
+
+    def create_user(self, phone_number: str) -> Tuple[str, str]:
+        from app.models import User, Token
+        from app.utils.ids import new_id
+
+        with self.app.app_context():
+            user = User.objects(phone_number=phone_number).first()
+            if user is None:
+                user = User()
+                user.from_dict({"id": new_id(), "phone_number": phone_number})
+                user.save()
+            Token.generate_and_save_token(user)
+            return user.id, Token.get_token(user)
+
+
+def call(target, method: str, path: str, headers=None, body=None) -> dict:
+    status, content = target.send(method, path, headers or {}, body)
+    if status not in (200, 201):
+        raise RuntimeError(f"seeding {method} {path} failed with {status}")
+    return json.loads(content)
+
+
+class Fixtures:
+    """
+    Seeded users, lists and gifts keyed by the ids recorded in the log.
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self.users: Dict[str, Tuple[str, Dict[str, str]]] = {}
+        self.lists: Dict[str, str] = {}
+        self.gifts: Dict[str, str] = {}
+
+    def call(self, method: str, path: str, headers=None, body=None) -> dict:
+        return call(self.target, method, path, headers, body)
+
+    def user(self, recorded_id: str) -> Tuple[str, Dict[str, str]]:
+        if recorded_id not in self.users:
+            phone_number = f"{SEED_PHONE_PREFIX}{len(self.users):07d}"
+            user_id, token = self.target.create_user(phone_number)
+            headers = {"Authorization": f"Bearer {token}"}
+            self.users[recorded_id] = (user_id, headers)
+        return self.users[recorded_id]
+
+    def list(self, recorded_id: str, owner: str) -> str:
+        if recorded_id not in self.lists:
+            _, headers = self.user(owner)
+            body = {"name": f"replay list {len(self.lists)}"}
+            response = self.call("POST", "/api/list", headers, body)
+            self.lists[recorded_id] = response["id"]
+        return self.lists[recorded_id]
+
+    def gift(self, recorded_id: str, recorded_list_id: str, owner: str) -> str:
+        if recorded_id not in self.gifts:
+            list_id = self.list(recorded_list_id, owner)
+            _, headers = self.user(owner)
+            body = {"name": f"replay gift {len(self.gifts)}", **SEED_GIFT}
+            self.gifts[recorded_id] = self.call(
+                "POST", f"/api/list/{list_id}/gift", headers, body
+            )["id"]
+        return self.gifts[recorded_id]
+
+    def rewrite(self, recorded_id: str) -> str:
+        if recorded_id in self.users:
+            return self.users[recorded_id][0]
+        return self.lists.get(recorded_id) or self.gifts.get(recorded_id, recorded_id)
+
+    def recorded_ids(self) -> Dict[str, str]:
+        """Recorded ids by the id of the fixture they are mapped onto."""
+        ids = {user_id: recorded for recorded, (user_id, _) in self.users.items()}
+        for fixtures in (self.lists, self.gifts):
+            ids.update({seeded: recorded for recorded, seeded in fixtures.items()})
+        return ids
+
+
+def path_ids(path: str) -> Dict[str, str]:
+    """Ids in the path by the segment they follow."""
+    segments = path.split("/")
+    ids = {}
+    for parent, segment in zip(segments, segments[1:]):
+        if parent in ID_PARENTS and segment and segment not in ROUTE_NAMES:
+            ids[parent] = segment
+    return ids
+
+
+def seed_path(fixtures: Fixtures, ids: Dict[str, str], user_id: str):
+    # /api/user/<user>/list/... is a list of that user, /api/list/... is
+    # a list of the caller
+    owner = ids.get("user", user_id)
+    if "user" in ids:
+        fixtures.user(ids["user"])
+    if "gift" in ids:
+        fixtures.gift(ids["gift"], ids["list"], owner)
+    elif "list" in ids:
+        fixtures.list(ids["list"], owner)
+
+
+def seed_body(fixtures: Fixtures, body: Any, ids: Dict[str, str], user_id: str):
+    if not isinstance(body, dict):
+        return
+    # gift references of the batch endpoint
+    for reference in body.get("gifts", []):
+        if isinstance(reference, dict) and reference.keys() >= REFERENCE_KEYS:
+            fixtures.gift(
+                reference["gift_id"], reference["list_id"], reference["user_id"]
+            )
+    # gift ids of the bulk reservation endpoint, all in the list of the path
+    if "list" in ids:
+        owner = ids.get("user", user_id)
+        for key in ("reserve", "unreserve"):
+            for gift_id in body.get(key, []):
+                if isinstance(gift_id, str):
+                    fixtures.gift(gift_id, ids["list"], owner)
+
+
+def rewrite_body(fixtures: Fixtures, body: Any) -> Any:
+    if isinstance(body, dict):
+        return {key: rewrite_body(fixtures, value) for key, value in body.items()}
+    if isinstance(body, list):
+        return [rewrite_body(fixtures, value) for value in body]
+    if isinstance(body, str):
+        return fixtures.rewrite(body)
+    return body
+
+
+def is_replayable(record: dict) -> bool:
+    # `"body": null` is a write recorded without a body
+    method = record.get("method", "GET").upper()
+    return method not in WRITE_METHODS or "body" in record
+
+
+def prepare(index: int, record: dict, fixtures: Fixtures) -> PreparedRequest:
+    url = urlsplit(record["path"])
+    user_id = record.get("user_id") or ""
+    ids = path_ids(url.path)
+    seed_path(fixtures, ids, user_id)
+    seed_body(fixtures, record.get("body"), ids, user_id)
+
+    segments = url.path.split("/")
+    endpoint = list(segments)
+    for position, (parent, segment) in enumerate(zip(segments, segments[1:]), 1):
+        if parent in ID_PARENTS and ids.get(parent) == segment:
+            segments[position] = fixtures.rewrite(segment)
+            endpoint[position] = "<id>"
+    path = "/".join(segments) + (f"?{url.query}" if url.query else "")
+
+    headers = {}
+    if record.get("user_id"):
+        headers = fixtures.user(record["user_id"])[1]
+    return PreparedRequest(
+        index=index,
+        ts=float(record.get("ts", 0)),
+        method=record.get("method", "GET").upper(),
+        path=path,
+        endpoint="/".join(endpoint),
+        headers=headers,
+        body=rewrite_body(fixtures, record.get("body")),
+        recorded_status=record.get("status"),
+    )
+
+
+def mask(value: Any, recorded_ids: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: "<volatile>" if key in VOLATILE_KEYS else mask(item, recorded_ids)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [mask(item, recorded_ids) for item in value]
+    if isinstance(value, str):
+        if value in recorded_ids:
+            return recorded_ids[value]
+        if ID_RE.fullmatch(value):
+            return "<id>"
+    return value
+
+
+def body_digest(content: bytes, recorded_ids: Dict[str, str]) -> str:
+    """
+    Digest of the response body comparable between replays of two builds.
+    """
+    try:
+        body = mask(json.loads(content), recorded_ids)
+        content = json.dumps(body, sort_keys=True, separators=(",", ":")).encode()
+    except ValueError:
+        pass
+    return blake2b(content, digest_size=8).hexdigest()
+
+
+def send(target, request: PreparedRequest, recorded_ids: Dict[str, str]) -> dict:
+    start = time.perf_counter()
+    status, content = target.send(
+        request.method, request.path, request.headers, request.body
+    )
+    latency = time.perf_counter() - start
+    return {
+        "index": request.index,
+        "method": request.method,
+        "endpoint": request.endpoint,
+        "status": status,
+        "recorded_status": request.recorded_status,
+        "latency_ms": round(latency * 1000, 3),
+        "bytes": len(content),
+        "body": body_digest(content, recorded_ids),
+    }
+
+
+def replay(
+    requests: List[PreparedRequest],
+    target,
+    speed: float,
+    concurrency: int,
+    recorded_ids: Dict[str, str],
+) -> List[dict]:
+    """
+    Send the requests keeping their recorded spacing divided by `speed`,
+    a speed of 0 sends them as fast as the workers allow.
+    """
+    if not requests:
+        return []
+    first_ts = requests[0].ts
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+        for request in requests:
+            if speed > 0:
+                delay = (request.ts - first_ts) / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(pool.submit(send, target, request, recorded_ids))
+        return [future.result() for future in futures]
+
+
+def read_ndjson(path: str) -> Iterator[dict]:
+    with open(path) as stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def percentile(values: List[float], percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def is_error(status: int) -> bool:
+    return status == 0 or status >= 500
+
+
+def latency_summary(results: List[dict]) -> Dict[str, dict]:
+    by_endpoint: Dict[str, List[dict]] = {}
+    for result in results:
+        key = f"{result['method']} {result['endpoint']}"
+        by_endpoint.setdefault(key, []).append(result)
+    summary = {}
+    for key, group in sorted(by_endpoint.items()):
+        latencies = [result["latency_ms"] for result in group]
+        summary[key] = {
+            "count": len(group),
+            "errors": sum(is_error(result["status"]) for result in group),
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+        }
+    return summary
+
+
+def print_summary(results: List[dict], elapsed: Optional[float] = None):
+    print(
+        f"{'endpoint':50} {'count':>6} {'errors':>6} "
+        f"{'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"
+    )
+    for key, row in latency_summary(results).items():
+        print(
+            f"{key:50} {row['count']:6d} {row['errors']:6d} {row['p50']:8.1f} "
+            f"{row['p90']:8.1f} {row['p99']:8.1f} {row['max']:8.1f}"
+        )
+    if elapsed:
+        print(f"{len(results)} requests in {elapsed:.1f} s")
+    changed = sum(
+        result["recorded_status"] not in (None, result["status"]) for result in results
+    )
+    if changed:
+        print(f"{changed} responses differ from the recorded status")
+
+
+def run(args) -> int:
+    target = AppTarget() if args.target == "app" else HttpTarget(args.target)
+    records = list(read_ndjson(args.log))
+    if args.limit:
+        records = records[: args.limit]
+    records.sort(key=lambda record: float(record.get("ts", 0)))
+    replayable = [record for record in records if is_replayable(record)]
+    skipped = len(records) - len(replayable)
+    if skipped:
+        print(f"skipped {skipped} writes recorded without a body")
+
+    fixtures = Fixtures(target)
+    requests = [
+        prepare(index, record, fixtures) for index, record in enumerate(replayable)
+    ]
+    print(
+        f"seeded {len(fixtures.users)} users, {len(fixtures.lists)} lists "
+        f"and {len(fixtures.gifts)} gifts"
+    )
+
+    start = time.perf_counter()
+    results = replay(
+        requests, target, args.speed, args.concurrency, fixtures.recorded_ids()
+    )
+    elapsed = time.perf_counter() - start
+    with open(args.output, "w") as stream:
+        for result in results:
+            stream.write(json.dumps(result, separators=(",", ":")) + "\n")
+    print_summary(results, elapsed)
+    return 0
+
+
+def compare(args) -> int:
+    baseline = list(read_ndjson(args.baseline))
+    candidate = list(read_ndjson(args.candidate))
+    baseline_summary = latency_summary(baseline)
+    candidate_summary = latency_summary(candidate)
+
+    print(
+        f"{'endpoint':50} {'p50 a':>8} {'p50 b':>8} {'p99 a':>8} {'p99 b':>8}"
+        f" {'p99':>7}"
+    )
+    for key in sorted(baseline_summary.keys() | candidate_summary.keys()):
+        a = baseline_summary.get(key)
+        b = candidate_summary.get(key)
+        if a is None or b is None:
+            print(f"{key:50} only in {'candidate' if a is None else 'baseline'}")
+            continue
+        change = (b["p99"] - a["p99"]) / a["p99"] * 100 if a["p99"] else 0
+        print(
+            f"{key:50} {a['p50']:8.1f} {b['p50']:8.1f} "
+            f"{a['p99']:8.1f} {b['p99']:8.1f} {change:+6.0f}%"
+        )
+
+    # results are matched by their position in the replayed log
+    candidate_by_index = {result["index"]: result for result in candidate}
+    status_diffs, body_diffs = Counter(), Counter()
+    for result in baseline:
+        other = candidate_by_index.get(result["index"])
+        if other is None:
+            continue
+        if other["status"] != result["status"]:
+            key = (result["method"], result["endpoint"], result["status"])
+            status_diffs[(*key, other["status"])] += 1
+        elif other.get("body") != result.get("body"):
+            body_diffs[(result["method"], result["endpoint"], result["status"])] += 1
+
+    if status_diffs:
+        print("status differences:")
+        for (method, endpoint, status_a, status_b), count in status_diffs.most_common():
+            print(f"  {count:6d}  {method} {endpoint}: {status_a} -> {status_b}")
+    else:
+        print("no status differences")
+    if body_diffs:
+        print("body differences:")
+        for (method, endpoint, status), count in body_diffs.most_common():
+            print(f"  {count:6d}  {method} {endpoint} ({status})")
+    else:
+        print("no body differences")
+    return 1 if (status_diffs or body_diffs) and args.strict else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Replay a request log.")
+    run_parser.add_argument("log")
+    run_parser.add_argument(
+        "--target", default="app", help="Base URL of the build, or 'app'."
+    )
+    run_parser.add_argument(
+        "--speed", type=float, default=1, help="Time scale, 0 for no delays."
+    )
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--limit", type=int, default=None)
+    run_parser.add_argument("-o", "--output", default="replay-results.ndjson")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare two replays.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Exit with 1 on status or body differences.",
+    )
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
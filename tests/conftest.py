@@ -0,0 +1,139 @@
+import os
+
+# Select the in-memory backend before the app is imported. Every xdist
+# worker is a separate process with its own mongomock and fakeredis
+# stores, the database name is per worker as well so the suite can also
+# run against a shared live MongoDB with DATA_BACKEND=live.
+WORKER = os.environ.get("PYTEST_XDIST_WORKER", "main")
+os.environ.setdefault("FLASK_DATA_BACKEND", "memory")
+os.environ.setdefault("FLASK_MONGODB_DB", f"kadoostan_test_{WORKER}")
+os.environ.setdefault("FLASK_JOB_QUEUE_MODE", "local")
+os.environ.setdefault("FLASK_SMS_PROVIDER", "fake")
+os.environ.setdefault("FLASK_RATELIMIT_ENABLED", "false")
+os.environ.setdefault("FLASK_ACCESS_LOG_ENABLED", "false")
+
+from app import app as flask_app, redis_connection
+from app.models import User, List, Gift, Token, GiftTombstone
+from app.utils.access_log import logger as access_logger
+from app.utils.user_cache import user_cache
+from typing import Dict, NamedTuple
+import pytest
+
+PHONE_NUMBER_1 = "09123456789"
+PHONE_NUMBER_2 = "09987654321"
+PHONE_NUMBER_3 = "09192837465"
+INVALID_PHONE_NUMBER = "1234"
+NOT_USED_PHONE_NUMBER = "09000000000"
+INVALID_LOGIN_CODE = "1234"
+INVALID_TOKEN = "abcd"
+INVALID_ID = "abcd"
+INVALID_GIFT_LINK = "abcd"
+
+
+class LoggedInUser(NamedTuple):
+    id: str
+    phone_number: str
+    headers: Dict[str, str]
+
+
+def auth_headers(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def app():
+    flask_app.config["TESTING"] = True
+    yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def clean_backend():
+    yield
+    # delete the documents but keep the collections and their indexes
+    for model in (User, List, Gift, Token, GiftTombstone):
+        model._get_collection().delete_many({})
+    redis_connection.flushdb()
+    with user_cache.lock:
+        user_cache.entries.clear()
+
+
+@pytest.fixture
+def access_records(app, caplog):
+    app.config["ACCESS_LOG_ENABLED"] = True
+    access_logger.addHandler(caplog.handler)
+    yield lambda: [
+        record.msg for record in caplog.records if record.name == access_logger.name
+    ]
+    access_logger.removeHandler(caplog.handler)
+    app.config["ACCESS_LOG_ENABLED"] = False
+
+
+def forbid_save(monkeypatch) -> None:
+    """
+    Fail on save() of sharded documents, it dereferences the shard key
+    reference to build the update filter.
+    """
+
+    def save(self, *args, **kwargs):
+        raise AssertionError(f"{type(self).__name__}.save() called")
+
+    monkeypatch.setattr(List, "save", save)
+    monkeypatch.setattr(Gift, "save", save)
+
+
+def login(client, phone_number: str) -> LoggedInUser:
+    response = client.post(
+        "/api/user/auth/login/code", json={"phone_number": phone_number}
+    )
+    login_code = response.get_json()["login_code"]
+    response = client.post(
+        "/api/user/auth/login",
+        json={"phone_number": phone_number, "login_code": login_code},
+    )
+    headers = auth_headers(response.get_json()["token"])
+    user_id = client.get("/api/user", headers=headers).get_json()["id"]
+    return LoggedInUser(user_id, phone_number, headers)
+
+
+@pytest.fixture
+def user_1(client) -> LoggedInUser:
+    return login(client, PHONE_NUMBER_1)
+
+
+@pytest.fixture
+def user_2(client) -> LoggedInUser:
+    return login(client, PHONE_NUMBER_2)
+
+
+@pytest.fixture
+def user_3(client) -> LoggedInUser:
+    return login(client, PHONE_NUMBER_3)
+
+
+@pytest.fixture
+def list_1(client, user_1) -> str:
+    response = client.post("/api/list", json={"name": "list1"}, headers=user_1.headers)
+    return response.get_json()["id"]
+
+
+@pytest.fixture
+def list_2(client, user_1) -> str:
+    response = client.post(
+        "/api/list", json={"name": "second list"}, headers=user_1.headers
+    )
+    return response.get_json()["id"]
+
+
+@pytest.fixture
+def gift_1(client, user_1, list_1) -> str:
+    response = client.post(
+        f"/api/list/{list_1}/gift",
+        json={"name": "gift1", "price": 50, "link": "https://www.amazon.com"},
+        headers=user_1.headers,
+    )
+    return response.get_json()["id"]
@@ -0,0 +1,69 @@
+from app.utils.access_log import query_tracer
+from types import SimpleNamespace
+
+
+def test_access_log_record(client, user_1, access_records):
+    # buffered responses are closed by the client, which emits the record
+    response = client.get("/api/user", headers=user_1.headers, buffered=True)
+    record = access_records()[-1]
+    assert record["method"] == "GET"
+    assert record["path"] == "/api/user"
+    assert record["endpoint"] == "user_bp.get_user"
+    assert record["user_id"] == user_1.id
+    assert record["status"] == 200
+    assert record["bytes"] == len(response.get_data())
+    assert record["latency_ms"] >= 0
+    assert "trace" not in record
+
+
+def test_access_log_anonymous_request(client, access_records):
+    client.get("/api/user?fields=id", buffered=True)
+    record = access_records()[-1]
+    assert record["path"] == "/api/user?fields=id"
+    assert record["user_id"] is None
+    assert record["status"] == 401
+
+
+def test_access_log_request_bodies(app, client, monkeypatch, user_1, access_records):
+    client.post(
+        "/api/list", json={"name": "list"}, headers=user_1.headers, buffered=True
+    )
+    assert "body" not in access_records()[-1]
+
+    monkeypatch.setitem(app.config, "ACCESS_LOG_REQUEST_BODIES", True)
+    client.post(
+        "/api/list", json={"name": "list2"}, headers=user_1.headers, buffered=True
+    )
+    # recorded as sent, not as changed by the endpoint
+    assert access_records()[-1]["body"] == {"name": "list2"}
+    client.get("/api/user", headers=user_1.headers, buffered=True)
+    assert "body" not in access_records()[-1]
+    client.post(
+        "/api/user/auth/login",
+        json={"phone_number": user_1.phone_number, "login_code": "1234"},
+        buffered=True,
+    )
+    assert "body" not in access_records()[-1]
+
+
+def test_query_tracer_traces_sampled_requests():
+    command = {"find": "gift", "filter": {"list": "a", "_id": "b"}}
+    started = SimpleNamespace(command_name="find", command=command, request_id=1)
+    succeeded = SimpleNamespace(request_id=1, duration_micros=1500)
+
+    query_tracer.started(started)
+    assert query_tracer.end() == (0, None)
+
+    query_tracer.begin(trace=False)
+    query_tracer.started(started)
+    query_tracer.succeeded(succeeded)
+    assert query_tracer.end() == (1, None)
+
+    query_tracer.begin(trace=True)
+    query_tracer.started(started)
+    query_tracer.succeeded(succeeded)
+    count, trace = query_tracer.end()
+    assert count == 1
+    assert trace == [
+        {"command": "find", "collection": "gift", "fields": ["_id", "list"], "ms": 1.5}
+    ]
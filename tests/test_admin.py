@@ -0,0 +1,114 @@
+from tests.conftest import PHONE_NUMBER_1
+from app.utils.profiling import fold, profiler
+from app.utils.user_cache import user_cache
+from types import SimpleNamespace
+import pytest
+import time
+
+URL = "/api/admin/profiling"
+
+
+@pytest.fixture
+def admin(app, monkeypatch, user_1):
+    monkeypatch.setitem(app.config, "ADMIN_PHONE_NUMBERS", [PHONE_NUMBER_1])
+    monkeypatch.setitem(app.config, "PROFILING_INTERVAL", 0.001)
+    yield user_1
+    profiler.stop()
+
+
+def slow_endpoint():
+    time.sleep(0.05)
+
+
+def test_profiling_requires_admin(client, admin, user_2):
+    assert client.get(URL, headers=user_2.headers).status_code == 403
+    response = client.post(URL, json={"seconds": 10}, headers=user_2.headers)
+    assert response.status_code == 403
+    assert client.get(URL).status_code == 401
+
+
+@pytest.mark.parametrize("data", [{}, {"seconds": 0}, {"seconds": 3601}])
+def test_start_profiling_invalid_data(client, admin, data):
+    assert client.post(URL, json=data, headers=admin.headers).status_code == 400
+
+
+def test_profiling(client, admin):
+    response = client.post(URL, json={"seconds": 10}, headers=admin.headers)
+    assert response.status_code == 200
+    assert response.get_json()["header"] is None
+
+    # the stacks of a profiled request thread are sampled until it ends
+    profiler.begin("list_bp.create_gift", 0.001)
+    slow_endpoint()
+    profiler.end()
+
+    status = client.get(URL, headers=admin.headers).get_json()
+    assert status["settings"]["until"] > time.time()
+    assert status["endpoints"]["list_bp.create_gift"] > 0
+
+    response = client.get(f"{URL}/list_bp.create_gift", headers=admin.headers)
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    stacks = dict(
+        line.rsplit(" ", 1) for line in response.get_data(as_text=True).splitlines()
+    )
+    assert any(stack.endswith(":slow_endpoint") for stack in stacks)
+    assert all(int(count) > 0 for count in stacks.values())
+
+    assert client.delete(URL, headers=admin.headers).status_code == 200
+    assert client.get(URL, headers=admin.headers).get_json()["settings"] is None
+
+
+def test_profiling_header_filter(app, client, admin):
+    client.post(
+        URL,
+        json={"seconds": 10, "header": "X-Profile", "value": "1"},
+        headers=admin.headers,
+    )
+    with app.test_request_context(headers={"X-Profile": "1"}):
+        assert profiler.should_profile()
+    with app.test_request_context(headers={"X-Profile": "2"}):
+        assert not profiler.should_profile()
+    with app.test_request_context():
+        assert not profiler.should_profile()
+
+
+def test_get_profile_not_found(client, admin):
+    response = client.get(f"{URL}/list_bp.get_list", headers=admin.headers)
+    assert response.status_code == 404
+
+
+def test_user_cache_stats(client, admin, user_2):
+    url = "/api/admin/user-cache"
+    assert client.get(url, headers=user_2.headers).status_code == 403
+    before = client.get(url, headers=admin.headers).get_json()
+
+    user_cache.invalidate(user_2.id)
+    user_cache.get(user_2.id)
+    user_cache.get(user_2.id)
+    user_cache.drop_local(user_2.id)
+    user_cache.get(user_2.id)
+
+    response = client.get(url, headers=admin.headers)
+    assert response.status_code == 200
+    after = response.get_json()
+    # the admin is found in the process cache when authorizing the request
+    assert after["local_hits"] - before["local_hits"] == 2
+    assert after["redis_hits"] - before["redis_hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+    assert after["local_entries"] == len(user_cache.entries)
+
+
+def test_fold_without_qualified_names():
+    # code objects before Python 3.11 have no co_qualname
+    outer = SimpleNamespace(
+        f_globals={"__name__": "app.api.lists.api"},
+        f_code=SimpleNamespace(co_name="create_gift"),
+        f_back=None,
+    )
+    inner = SimpleNamespace(
+        f_globals={},
+        f_code=SimpleNamespace(co_name="save", co_qualname="Gift.save"),
+        f_back=outer,
+    )
+    assert fold(inner) == "app.api.lists.api:create_gift;?:Gift.save"
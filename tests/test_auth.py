@@ -0,0 +1,77 @@
+from tests.conftest import (
+    PHONE_NUMBER_1,
+    INVALID_PHONE_NUMBER,
+    NOT_USED_PHONE_NUMBER,
+    INVALID_LOGIN_CODE,
+    INVALID_TOKEN,
+    auth_headers,
+)
+
+
+def receive_login_code(client, phone_number):
+    return client.post("/api/user/auth/login/code", json={"phone_number": phone_number})
+
+
+def test_receive_login_code(client):
+    response = receive_login_code(client, PHONE_NUMBER_1)
+    assert response.status_code == 200
+    assert isinstance(response.get_json()["login_code"], str)
+
+
+def test_receive_login_code_invalid_phone_number(client):
+    response = receive_login_code(client, INVALID_PHONE_NUMBER)
+    assert response.status_code == 400
+
+
+def test_login(client):
+    login_code = receive_login_code(client, PHONE_NUMBER_1).get_json()["login_code"]
+    response = client.post(
+        "/api/user/auth/login",
+        json={"phone_number": PHONE_NUMBER_1, "login_code": login_code},
+    )
+    assert response.status_code == 200
+    assert isinstance(response.get_json()["token"], str)
+
+
+def test_login_invalid_phone_number(client):
+    login_code = receive_login_code(client, PHONE_NUMBER_1).get_json()["login_code"]
+    response = client.post(
+        "/api/user/auth/login",
+        json={"phone_number": INVALID_PHONE_NUMBER, "login_code": login_code},
+    )
+    assert response.status_code == 400
+
+
+def test_login_without_login_code(client):
+    response = client.post(
+        "/api/user/auth/login", json={"phone_number": PHONE_NUMBER_1}
+    )
+    assert response.status_code == 400
+
+
+def test_login_unknown_phone_number(client):
+    login_code = receive_login_code(client, PHONE_NUMBER_1).get_json()["login_code"]
+    response = client.post(
+        "/api/user/auth/login",
+        json={"phone_number": NOT_USED_PHONE_NUMBER, "login_code": login_code},
+    )
+    assert response.status_code == 401
+
+
+def test_login_invalid_login_code(client):
+    receive_login_code(client, PHONE_NUMBER_1)
+    response = client.post(
+        "/api/user/auth/login",
+        json={"phone_number": PHONE_NUMBER_1, "login_code": INVALID_LOGIN_CODE},
+    )
+    assert response.status_code == 401
+
+
+def test_logout(client, user_1):
+    assert client.get("/api/user/logout", headers=user_1.headers).status_code == 200
+    assert client.get("/api/user", headers=user_1.headers).status_code == 401
+
+
+def test_logout_invalid_token(client):
+    response = client.get("/api/user/logout", headers=auth_headers(INVALID_TOKEN))
+    assert response.status_code == 401
@@ -0,0 +1,111 @@
+from tests.conftest import INVALID_TOKEN, INVALID_ID, auth_headers
+from app.schemas.gift import MAX_BATCH_SIZE
+from app.utils.ids import new_id
+import pytest
+
+URL = "/api/user/gifts/batch"
+
+
+def reference(user_id, list_id, gift_id):
+    return {"user_id": user_id, "list_id": list_id, "gift_id": gift_id}
+
+
+@pytest.fixture
+def gift_2(client, user_2):
+    response = client.post("/api/list", json={"name": "list2"}, headers=user_2.headers)
+    list_id = response.get_json()["id"]
+    response = client.post(
+        f"/api/list/{list_id}/gift",
+        json={"name": "gift2", "price": 10},
+        headers=user_2.headers,
+    )
+    return list_id, response.get_json()["id"]
+
+
+def test_get_gifts_batch(client, user_1, user_2, user_3, list_1, gift_1, gift_2):
+    list_2, gift_2 = gift_2
+    response = client.post(
+        f"/api/user/{user_1.id}/list/{list_1}/gift/{gift_1}/buy",
+        headers=user_2.headers,
+    )
+    assert response.status_code == 200
+    references = [
+        reference(user_2.id, list_2, gift_2),
+        reference(user_1.id, list_1, gift_1),
+    ]
+    response = client.post(URL, json={"gifts": references}, headers=user_3.headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["not_found"] == []
+    assert [(gift["list_id"], gift["id"]) for gift in data["gifts"]] == [
+        (list_2, gift_2),
+        (list_1, gift_1),
+    ]
+    assert data["gifts"][0]["expected_buyer"] is None
+    assert data["gifts"][1]["expected_buyer"]["id"] == user_2.id
+    assert data["gifts"][1]["name"] == "gift1"
+
+
+def test_get_gifts_batch_fields(client, user_1, user_2, list_1, gift_1):
+    response = client.post(
+        f"{URL}?fields=name,price",
+        json={"gifts": [reference(user_1.id, list_1, gift_1)]},
+        headers=user_2.headers,
+    )
+    assert response.status_code == 200
+    assert response.get_json()["gifts"] == [
+        {"name": "gift1", "price": 50, "list_id": list_1}
+    ]
+
+
+def test_get_gifts_batch_partially_found(
+    client, user_1, user_2, list_1, gift_1, gift_2
+):
+    list_2, gift_2 = gift_2
+    references = [
+        reference(user_1.id, list_1, gift_1),
+        # the gift exists but the list belongs to another user
+        reference(user_1.id, list_2, gift_2),
+        # the gift belongs to another list
+        reference(user_2.id, list_2, gift_1),
+        reference(user_1.id, list_1, new_id()),
+        reference(new_id(), list_1, gift_1),
+    ]
+    response = client.post(URL, json={"gifts": references}, headers=user_1.headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [gift["id"] for gift in data["gifts"]] == [gift_1]
+    assert data["not_found"] == references[1:]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        {"gifts": []},
+        {"gifts": [{"user_id": None, "list_id": None}]},
+        {"gifts": [reference(INVALID_ID, INVALID_ID, INVALID_ID)]},
+        {"gifts": [reference(new_id(), new_id(), new_id())] * (MAX_BATCH_SIZE + 1)},
+    ],
+)
+def test_get_gifts_batch_invalid_data(client, user_1, data):
+    response = client.post(URL, json=data, headers=user_1.headers)
+    assert response.status_code == 400
+
+
+def test_get_gifts_batch_unknown_field(client, user_1, list_1, gift_1):
+    response = client.post(
+        f"{URL}?fields=list",
+        json={"gifts": [reference(user_1.id, list_1, gift_1)]},
+        headers=user_1.headers,
+    )
+    assert response.status_code == 400
+
+
+def test_get_gifts_batch_unauthorized(client, user_1, list_1, gift_1):
+    response = client.post(
+        URL,
+        json={"gifts": [reference(user_1.id, list_1, gift_1)]},
+        headers=auth_headers(INVALID_TOKEN),
+    )
+    assert response.status_code == 401
@@ -0,0 +1,58 @@
+from app.models import User, List, Gift, Token, GiftTombstone
+from app.utils.cascade import delete_user_cascade
+
+
+def test_delete_user_cascade(app, client, user_1, user_2, list_1, gift_1):
+    response = client.post(
+        "/api/list", json={"name": "other list"}, headers=user_2.headers
+    )
+    other_list = response.get_json()["id"]
+    response = client.post(
+        f"/api/list/{other_list}/gift", json={"name": "gift"}, headers=user_2.headers
+    )
+    other_gift = response.get_json()["id"]
+    client.post(
+        f"/api/user/{user_2.id}/list/{other_list}/gift/{other_gift}/buy",
+        headers=user_1.headers,
+    )
+    client.delete(f"/api/list/{list_1}/gift/{gift_1}", headers=user_1.headers)
+    token = client.get(f"/api/list/{other_list}/changes", headers=user_2.headers)
+    token = token.get_json()["sync_token"]
+
+    with app.app_context():
+        delete_user_cascade(user_1.id)
+    assert User.objects(id=user_1.id).count() == 0
+    assert Token.objects(user=user_1.id).count() == 0
+    assert List.objects(user=user_1.id).count() == 0
+    assert Gift.objects(list=list_1).count() == 0
+    assert GiftTombstone.objects(list=list_1).count() == 0
+
+    # the reservation is cancelled and synced to the clients of the list
+    response = client.get(
+        f"/api/list/{other_list}/changes?since={token}", headers=user_2.headers
+    )
+    gifts = response.get_json()["gifts"]
+    assert [(gift["id"], gift["expected_buyer"]) for gift in gifts] == [
+        (other_gift, None)
+    ]
+    assert Gift.objects(id=other_gift).count() == 1
+
+
+def test_delete_user_request_runs_the_cascade(client, user_1, list_1, gift_1):
+    assert client.delete("/api/user", headers=user_1.headers).status_code == 200
+    assert client.get("/api/user", headers=user_1.headers).status_code == 401
+    assert User.objects(id=user_1.id).count() == 0
+    assert Gift.objects(list=list_1).count() == 0
+
+
+def test_delete_list_cascade(client, user_1, list_1, list_2, gift_1):
+    client.delete(f"/api/list/{list_1}/gift/{gift_1}", headers=user_1.headers)
+    client.post(
+        f"/api/list/{list_1}/gift", json={"name": "gift2"}, headers=user_1.headers
+    )
+    assert (
+        client.delete(f"/api/list/{list_1}", headers=user_1.headers).status_code == 200
+    )
+    assert Gift.objects(list=list_1).count() == 0
+    assert GiftTombstone.objects(list=list_1).count() == 0
+    assert List.objects(id=list_2).count() == 1
@@ -0,0 +1,145 @@
+from app.utils.compression import COMPRESSORS, CompressedBodyCache, compress_response
+from flask import Response
+import gzip
+import os
+import pytest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def test_cache_is_bounded_by_compressed_size(app):
+    with app.app_context():
+        cache = CompressedBodyCache(max_bytes=1000, max_body_size=10_000)
+        bodies = [os.urandom(300) for _ in range(5)]
+        for body in bodies:
+            cache.get_or_compress("gzip", body)
+        assert cache.size == sum(map(len, cache.entries.values()))
+        assert cache.size <= 1000
+        # least recently used bodies are evicted first
+        assert len(cache.entries) == 3
+
+
+def test_large_bodies_are_not_cached(app):
+    with app.app_context():
+        cache = CompressedBodyCache(max_body_size=100)
+        compressed = cache.get_or_compress("gzip", b"a" * 101)
+        assert compressed and not cache.entries
+        cache.get_or_compress("gzip", b"a" * 100)
+        assert len(cache.entries) == 1
+
+
+BODY = b'{"name":"gift1","price":50}' * 100
+
+
+def compress(app, response, accept_encoding=None):
+    headers = {}
+    if accept_encoding is not None:
+        headers["Accept-Encoding"] = accept_encoding
+    with app.test_request_context(headers=headers):
+        return compress_response(response)
+
+
+def decompress(encoding, data):
+    if encoding == "br":
+        return brotli.decompress(data)
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding",
+    [
+        ("gzip", "gzip"),
+        ("gzip, deflate", "gzip"),
+        ("br", "br"),
+        ("zstd", "zstd"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("gzip;q=0.5, br", "br"),
+        ("br;q=0, zstd;q=0, gzip", "gzip"),
+        ("*", next(iter(COMPRESSORS))),
+        ("*, gzip;q=0", next(iter(COMPRESSORS))),
+    ],
+)
+def test_accept_encoding_negotiation(app, accept_encoding, encoding):
+    if encoding not in COMPRESSORS:
+        pytest.skip(f"{encoding} support is not installed")
+    response = compress(app, Response(BODY), accept_encoding)
+    assert response.headers["Content-Encoding"] == encoding
+    assert "Accept-Encoding" in response.vary
+    assert decompress(encoding, response.get_data()) == BODY
+    assert response.content_length == len(response.get_data())
+
+
+@pytest.mark.parametrize(
+    "accept_encoding", [None, "", "identity", "gzip;q=0", "deflate", "*;q=0"]
+)
+def test_accept_encoding_without_known_encodings(app, accept_encoding):
+    response = compress(app, Response(BODY), accept_encoding)
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.vary
+    assert response.get_data() == BODY
+
+
+def test_minimum_size(app, monkeypatch):
+    assert "Content-Encoding" not in compress(app, Response(b"a" * 499), "gzip").headers
+    response = compress(app, Response(b"a" * 500), "gzip")
+    assert response.headers["Content-Encoding"] == "gzip"
+    monkeypatch.setitem(app.config, "COMPRESS_MIN_SIZE", 1000)
+    assert "Content-Encoding" not in compress(app, Response(b"a" * 999), "gzip").headers
+
+
+def test_streamed_response(app):
+    lines = [b'{"type":"gift","id":"%d"}\n' % i for i in range(1000)]
+    # small streamed responses are compressed as well, their size is unknown
+    for chunks in (lines, lines[:1]):
+        response = Response(iter(chunks), headers={"Content-Length": "1"})
+        response = compress(app, response, "gzip")
+        assert response.is_streamed
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in response.headers
+        assert gzip.decompress(b"".join(response.response)) == b"".join(chunks)
+
+
+def test_streamed_export(client, user_1, list_1, gift_1):
+    plain = client.get("/api/list/export", headers=user_1.headers).get_data()
+    response = client.get(
+        "/api/list/export",
+        headers={**user_1.headers, "Accept-Encoding": "gzip"},
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.get_data()) == plain
+
+
+@pytest.mark.parametrize(
+    "response, body",
+    [
+        # event streams are flushed event by event, never buffered
+        (lambda: Response(iter([BODY]), mimetype="text/event-stream"), BODY),
+        (lambda: Response(BODY, mimetype="application/gzip"), BODY),
+        (lambda: Response(BODY, headers={"Content-Encoding": "br"}), BODY),
+        (lambda: Response(status=204), b""),
+        (lambda: Response(BODY, status=304), BODY),
+    ],
+)
+def test_skipped_responses(app, response, body):
+    response = response()
+    encoding = response.headers.get("Content-Encoding")
+    response = compress(app, response, "gzip, br, zstd")
+    assert response.headers.get("Content-Encoding") == encoding
+    assert b"".join(response.response) == body
+
+
+def test_compression_disabled(app, monkeypatch):
+    monkeypatch.setitem(app.config, "COMPRESS_ENABLED", False)
+    response = compress(app, Response(BODY), "gzip")
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data() == BODY
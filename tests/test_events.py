@@ -0,0 +1,106 @@
+from app.utils.events import list_events
+from redis.exceptions import ConnectionError
+import importlib
+import json
+import time
+
+events_module = importlib.import_module("app.utils.events")
+
+
+def next_event(events, timeout: float = 5):
+    """Next event of a stream, skipping keepalive comments."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        message = next(events)
+        if message != ": keepalive\n\n":
+            return message
+    raise AssertionError("no event received")
+
+
+def parse_event(message: str):
+    lines = message.rstrip("\n").split("\n")
+    assert lines[0].startswith("event: ") and lines[1].startswith("data: ")
+    return lines[0][len("event: ") :], json.loads(lines[1][len("data: ") :])
+
+
+def test_publish_and_stream(app):
+    events = list_events.stream("list-a", keepalive=0.05)
+    other_events = list_events.stream("list-b", keepalive=0.05)
+    assert next(events) == ": connected\n\n"
+    assert next(other_events) == ": connected\n\n"
+    with app.app_context():
+        list_events.publish("list-a", "gift_deleted", {"id": "gift-1"})
+        list_events.publish("list-b", "list_deleted", {"id": "list-b"})
+    assert parse_event(next_event(events)) == ("gift_deleted", {"id": "gift-1"})
+    assert parse_event(next_event(other_events)) == ("list_deleted", {"id": "list-b"})
+
+    events.close()
+    assert "list-a" not in list_events.subscribers
+    assert "list-b" in list_events.subscribers
+    other_events.close()
+
+
+def test_stream_keepalive(app):
+    events = list_events.stream("list-a", keepalive=0.01)
+    assert next(events) == ": connected\n\n"
+    assert next(events) == ": keepalive\n\n"
+    events.close()
+
+
+def test_stream_events_endpoint(client, user_1, user_2, list_1, gift_1):
+    response = client.get(
+        f"/api/user/{user_1.id}/list/{list_1}/events",
+        headers=user_2.headers,
+        buffered=False,
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    events = (chunk.decode() for chunk in response.response)
+    assert next(events) == ": connected\n\n"
+
+    client.post(
+        f"/api/user/{user_1.id}/list/{list_1}/gift/reservations",
+        json={"reserve": [gift_1]},
+        headers=user_2.headers,
+    )
+    client.post(
+        f"/api/user/{user_1.id}/list/{list_1}/gift/reservations",
+        json={"unreserve": [gift_1]},
+        headers=user_2.headers,
+    )
+    event_type, data = parse_event(next_event(events))
+    assert event_type == "gift_reserved"
+    assert data["id"] == gift_1
+    assert data["expected_buyer"]["id"] == user_2.id
+    event_type, data = parse_event(next_event(events))
+    assert event_type == "gift_unreserved"
+    assert (data["id"], data["expected_buyer"]) == (gift_1, None)
+    response.close()
+    assert list_1 not in list_events.subscribers
+
+
+def test_reader_thread_replaced_after_failure(app, monkeypatch):
+    monkeypatch.setattr(events_module, "RESUBSCRIBE_DELAY", 0)
+    events = list_events.stream("list-a", keepalive=0.05)
+    assert next(events) == ": connected\n\n"
+    thread = list_events.thread
+    get_message = thread.pubsub.get_message
+
+    def fail(*args, **kwargs):
+        thread.pubsub.get_message = get_message
+        raise ConnectionError("connection lost")
+
+    thread.pubsub.get_message = fail
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    deadline = time.monotonic() + 5
+    while list_events.thread in (None, thread) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert list_events.thread not in (None, thread)
+    assert list_events.thread.is_alive()
+
+    # the stream keeps receiving through the new subscription
+    with app.app_context():
+        list_events.publish("list-a", "list_updated", {"name": "list1"})
+    assert parse_event(next_event(events)) == ("list_updated", {"name": "list1"})
+    events.close()
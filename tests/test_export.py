@@ -0,0 +1,54 @@
+from tests.conftest import INVALID_TOKEN, auth_headers
+import gzip
+import json
+
+
+def read_export(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_export_lists(client, user_1, list_1, gift_1, list_2):
+    response = client.get("/api/list/export", headers=user_1.headers)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    records = read_export(response)
+    assert [(record["type"], record["id"]) for record in records] == [
+        ("list", list_1),
+        ("gift", gift_1),
+        ("list", list_2),
+    ]
+    assert records[0]["name"] == "list1"
+    assert records[1]["list"] == list_1
+    assert records[1]["price"] == 50
+
+
+def test_export_lists_resumed(client, user_1, list_1, gift_1, list_2):
+    response = client.get(f"/api/list/export?after={list_1}", headers=user_1.headers)
+    assert response.status_code == 200
+    records = read_export(response)
+    assert [(record["type"], record["id"]) for record in records] == [("list", list_2)]
+
+
+def test_export_lists_of_other_users(client, user_2, list_1, gift_1):
+    response = client.get("/api/list/export", headers=user_2.headers)
+    assert response.status_code == 200
+    assert response.get_data() == b""
+
+
+def test_export_lists_gzip(client, user_1, list_1, gift_1):
+    plain = client.get("/api/list/export", headers=user_1.headers).get_data()
+    response = client.get("/api/list/export?compression=gzip", headers=user_1.headers)
+    assert response.status_code == 200
+    assert response.mimetype == "application/gzip"
+    assert "Content-Encoding" not in response.headers
+    assert gzip.decompress(response.get_data()) == plain
+
+
+def test_export_lists_invalid_compression(client, user_1, list_1):
+    response = client.get("/api/list/export?compression=zip", headers=user_1.headers)
+    assert response.status_code == 400
+
+
+def test_export_lists_unauthorized(client, list_1):
+    response = client.get("/api/list/export", headers=auth_headers(INVALID_TOKEN))
+    assert response.status_code == 401
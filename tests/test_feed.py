@@ -0,0 +1,122 @@
+from app.models import List
+from app.utils.feed import list_feed
+from app.utils.sharding import is_targeted
+import pytest
+
+URL = "/api/user/feed"
+
+
+def feed_ids(client, user, query=""):
+    response = client.get(f"{URL}?{query}", headers=user.headers)
+    assert response.status_code == 200
+    return [item["id"] for item in response.get_json()["items"]]
+
+
+def search(client, user, other):
+    url = f"/api/user/search?phone_number={other.phone_number}"
+    assert client.get(url, headers=user.headers).status_code == 200
+
+
+def test_feed_empty(client, user_1):
+    assert feed_ids(client, user_1) == []
+
+
+def test_feed_unauthorized(client):
+    assert client.get(URL).status_code == 401
+
+
+def test_feed_invalid_page(client, user_1):
+    assert client.get(f"{URL}?page=0", headers=user_1.headers).status_code == 404
+
+
+def test_search_follows_user(client, user_1, user_2, list_1, list_2):
+    # lists updated before the follow are added to the feed
+    search(client, user_2, user_1)
+    assert feed_ids(client, user_2) == [list_2, list_1]
+
+    client.put(f"/api/list/{list_1}", json={"name": "renamed"}, headers=user_1.headers)
+    response = client.get(URL, headers=user_2.headers).get_json()
+    item = response["items"][0]
+    assert (item["id"], item["name"]) == (list_1, "renamed")
+    assert item["user"]["id"] == user_1.id
+    assert item["updated_at"] is not None
+
+    client.post(
+        f"/api/list/{list_2}/gift",
+        json={"name": "gift2", "price": 10},
+        headers=user_1.headers,
+    )
+    assert feed_ids(client, user_2) == [list_2, list_1]
+    assert feed_ids(client, user_2, "page=2&per_page=1") == [list_1]
+
+
+def test_buy_follows_owner(client, user_1, user_2, list_1, gift_1):
+    url = f"/api/user/{user_1.id}/list/{list_1}/gift/{gift_1}/buy"
+    assert client.post(url, headers=user_2.headers).status_code == 200
+    assert feed_ids(client, user_2) == [list_1]
+    assert feed_ids(client, user_1) == []
+
+
+def test_deleted_list_leaves_feed(client, user_1, user_2, list_1, list_2):
+    search(client, user_2, user_1)
+    client.delete(f"/api/list/{list_1}", headers=user_1.headers)
+    assert feed_ids(client, user_2) == [list_2]
+    assert (
+        list_feed.connection.zscore(
+            list_feed.feed_key(user_2.id), list_feed.member(user_1.id, list_1)
+        )
+        is None
+    )
+
+
+def test_high_fanout_owner_is_pulled_on_read(
+    client, monkeypatch, user_1, user_2, user_3, list_1
+):
+    monkeypatch.setattr(list_feed, "fanout_limit", 1)
+    search(client, user_2, user_1)
+    search(client, user_3, user_1)
+
+    # the followers are only counted, not read
+    def smembers(*args):
+        raise AssertionError("SMEMBERS called")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(list_feed.connection, "smembers", smembers)
+        patch.setattr(type(list_feed.connection.pipeline()), "smembers", smembers)
+        response = client.post(
+            "/api/list", json={"name": "new"}, headers=user_1.headers
+        )
+    new_list = response.get_json()["id"]
+    # not fanned out to the followers, merged into their feeds on read
+    assert (
+        list_feed.connection.zscore(
+            list_feed.feed_key(user_3.id), list_feed.member(user_1.id, new_list)
+        )
+        is None
+    )
+    assert feed_ids(client, user_2) == [new_list, list_1]
+    assert feed_ids(client, user_3) == [new_list, list_1]
+
+
+@pytest.mark.parametrize("deleted", ["follower", "owner"])
+def test_deleted_user_is_forgotten(client, user_1, user_2, list_1, deleted):
+    search(client, user_2, user_1)
+    user = user_2 if deleted == "follower" else user_1
+    assert client.delete("/api/user", headers=user.headers).status_code == 200
+    assert not list_feed.connection.exists(list_feed.followers_key(user_1.id))
+    assert not list_feed.connection.exists(list_feed.following_key(user_2.id))
+
+
+def test_feed_reads_lists_by_shard_key(client, monkeypatch, user_1, user_2, list_1):
+    search(client, user_2, user_1)
+    collection = List._get_collection()
+    find = collection.find
+    filters = []
+
+    def record(filter=None, *args, **kwargs):
+        filters.append(filter)
+        return find(filter, *args, **kwargs)
+
+    monkeypatch.setattr(collection, "find", record)
+    assert feed_ids(client, user_2) == [list_1]
+    assert filters and all(is_targeted(query, ("user",)) for query in filters)
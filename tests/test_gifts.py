@@ -0,0 +1,263 @@
+from tests.conftest import (
+    INVALID_TOKEN,
+    INVALID_ID,
+    INVALID_GIFT_LINK,
+    auth_headers,
+    forbid_save,
+)
+import pytest
+
+UNAUTHORIZED = auth_headers(INVALID_TOKEN)
+
+
+def test_create_gift(client, user_1, list_1):
+    response = client.post(
+        f"/api/list/{list_1}/gift",
+        json={"name": "gift1", "price": 50, "link": "https://www.amazon.com"},
+        headers=user_1.headers,
+    )
+    assert response.status_code == 201
+    assert isinstance(response.get_json()["id"], str)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"price": "50", "link": "https://www.amazon.com"},
+        {"name": "gift1", "price": 50, "link": INVALID_GIFT_LINK},
+    ],
+)
+def test_create_gift_invalid_data(client, user_1, list_1, data):
+    response = client.post(
+        f"/api/list/{list_1}/gift", json=data, headers=user_1.headers
+    )
+    assert response.status_code == 400
+
+
+def test_create_gift_unauthorized(client, list_1):
+    response = client.post(
+        f"/api/list/{list_1}/gift",
+        json={"name": "gift2", "price": 50, "link": "https://www.amazon.com"},
+        headers=UNAUTHORIZED,
+    )
+    assert response.status_code == 401
+
+
+def test_create_gift_list_not_found(client, user_1):
+    response = client.post(
+        f"/api/list/{INVALID_ID}/gift",
+        json={"name": "gift3", "price": 50, "link": "https://www.amazon.com"},
+        headers=user_1.headers,
+    )
+    assert response.status_code == 404
+
+
+def test_get_gifts(client, user_1, list_1, gift_1):
+    response = client.get(
+        f"/api/list/{list_1}/gift?page=1&per_page=1", headers=user_1.headers
+    )
+    assert response.status_code == 200
+
+
+def test_get_gifts_unauthorized(client, list_1):
+    response = client.get(
+        f"/api/list/{list_1}/gift?page=1&per_page=1", headers=UNAUTHORIZED
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize(
+    "invalid_list, query",
+    [(True, "page=1&per_page=1"), (False, "page=-1&per_page=-1")],
+)
+def test_get_gifts_not_found(client, user_1, list_1, gift_1, invalid_list, query):
+    list_id = INVALID_ID if invalid_list else list_1
+    response = client.get(f"/api/list/{list_id}/gift?{query}", headers=user_1.headers)
+    assert response.status_code == 404
+
+
+def test_get_gift(client, user_1, list_1, gift_1):
+    response = client.get(f"/api/list/{list_1}/gift/{gift_1}", headers=user_1.headers)
+    assert response.status_code == 200
+    assert response.get_json()["name"] == "gift1"
+
+
+def test_get_gift_unauthorized(client, list_1, gift_1):
+    response = client.get(f"/api/list/{list_1}/gift/{gift_1}", headers=UNAUTHORIZED)
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("invalid", ["list", "gift"])
+def test_get_gift_not_found(client, user_1, list_1, gift_1, invalid):
+    list_id = INVALID_ID if invalid == "list" else list_1
+    gift_id = INVALID_ID if invalid == "gift" else gift_1
+    response = client.get(f"/api/list/{list_id}/gift/{gift_id}", headers=user_1.headers)
+    assert response.status_code == 404
+
+
+def test_update_gift(client, monkeypatch, user_1, list_1, gift_1):
+    forbid_save(monkeypatch)
+    url = f"/api/list/{list_1}/gift/{gift_1}"
+    response = client.put(
+        url, json={"name": "new gift name", "price": 100}, headers=user_1.headers
+    )
+    assert response.status_code == 200
+    assert response.get_json()["price"] == 100
+    gift = client.get(url, headers=user_1.headers).get_json()
+    assert (gift["name"], gift["price"]) == ("new gift name", 100)
+    assert gift["link"] == "https://www.amazon.com"
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"gift_name": "new gift name 1", "price": 50},
+        {"name": "new gift name 2", "price": 100, "link": INVALID_GIFT_LINK},
+    ],
+)
+def test_update_gift_invalid_data(client, user_1, list_1, gift_1, data):
+    response = client.put(
+        f"/api/list/{list_1}/gift/{gift_1}", json=data, headers=user_1.headers
+    )
+    assert response.status_code == 400
+
+
+def test_update_gift_unauthorized(client, list_1, gift_1):
+    response = client.put(
+        f"/api/list/{list_1}/gift/{gift_1}",
+        json={"name": "new gift name"},
+        headers=UNAUTHORIZED,
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("invalid", ["list", "gift"])
+def test_update_gift_not_found(client, user_1, list_1, gift_1, invalid):
+    list_id = INVALID_ID if invalid == "list" else list_1
+    gift_id = INVALID_ID if invalid == "gift" else gift_1
+    response = client.put(
+        f"/api/list/{list_id}/gift/{gift_id}",
+        json={"name": "new gift name"},
+        headers=user_1.headers,
+    )
+    assert response.status_code == 404
+
+
+def test_delete_gift(client, user_1, list_1, gift_1):
+    url = f"/api/list/{list_1}/gift/{gift_1}"
+    assert client.delete(url, headers=UNAUTHORIZED).status_code == 401
+    response = client.delete(
+        f"/api/list/{INVALID_ID}/gift/{gift_1}", headers=user_1.headers
+    )
+    assert response.status_code == 404
+    response = client.delete(
+        f"/api/list/{list_1}/gift/{INVALID_ID}", headers=user_1.headers
+    )
+    assert response.status_code == 404
+    assert client.delete(url, headers=user_1.headers).status_code == 200
+    assert client.get(url, headers=user_1.headers).status_code == 404
+
+
+def test_get_gift_fields(client, user_1, list_1, gift_1):
+    response = client.get(
+        f"/api/list/{list_1}/gift/{gift_1}?fields=name,expected_buyer",
+        headers=user_1.headers,
+    )
+    assert response.status_code == 200
+    assert response.get_json() == {"name": "gift1", "expected_buyer": None}
+
+
+def test_get_gifts_fields(client, user_1, user_2, list_1, gift_1):
+    response = client.get(
+        f"/api/list/{list_1}/gift?fields=id,price", headers=user_1.headers
+    )
+    assert response.status_code == 200
+    assert response.get_json()["items"] == [{"id": gift_1, "price": 50}]
+    response = client.get(
+        f"/api/user/{user_1.id}/list/{list_1}/gift?fields=link",
+        headers=user_2.headers,
+    )
+    assert response.status_code == 200
+    assert response.get_json()["items"] == [{"link": "https://www.amazon.com"}]
+
+
+@pytest.mark.parametrize("fields", ["name,list", "buyer", ",,"])
+def test_get_gifts_unknown_field(client, user_1, list_1, gift_1, fields):
+    for url in (
+        f"/api/list/{list_1}/gift?fields={fields}",
+        f"/api/list/{list_1}/gift/{gift_1}?fields={fields}",
+    ):
+        assert client.get(url, headers=user_1.headers).status_code == 400
+
+
+@pytest.fixture
+def priced_gifts(client, user_1, user_2, list_1, gift_1):
+    gifts = {"gift1": gift_1}
+    for name, price in (("clock", 120), ("book", 20), ("vase", 50)):
+        response = client.post(
+            f"/api/list/{list_1}/gift",
+            json={"name": name, "price": price},
+            headers=user_1.headers,
+        )
+        gifts[name] = response.get_json()["id"]
+    response = client.post(
+        f"/api/user/{user_1.id}/list/{list_1}/gift/{gifts['clock']}/buy",
+        headers=user_2.headers,
+    )
+    assert response.status_code == 200
+    return gifts
+
+
+def gift_names(response):
+    assert response.status_code == 200
+    return [gift["name"] for gift in response.get_json()["items"]]
+
+
+@pytest.mark.parametrize(
+    "query, names",
+    [
+        ("sort=price", ["book", "gift1", "vase", "clock"]),
+        ("sort=-price", ["clock", "vase", "gift1", "book"]),
+        ("sort=name", ["book", "clock", "gift1", "vase"]),
+        ("sort=-created_at", ["vase", "book", "clock", "gift1"]),
+        ("reserved=true", ["clock"]),
+        ("reserved=false&sort=name", ["book", "gift1", "vase"]),
+        ("min_price=50&max_price=100&sort=-name", ["vase", "gift1"]),
+    ],
+)
+def test_get_gifts_sort_and_filter(
+    client, user_1, user_2, list_1, priced_gifts, query, names
+):
+    response = client.get(f"/api/list/{list_1}/gift?{query}", headers=user_1.headers)
+    assert gift_names(response) == names
+    response = client.get(
+        f"/api/user/{user_1.id}/list/{list_1}/gift?{query}", headers=user_2.headers
+    )
+    assert gift_names(response) == names
+
+
+def test_get_gifts_sorted_pages(client, user_1, list_1, priced_gifts):
+    url = f"/api/list/{list_1}/gift?sort=price&min_price=50&per_page=1"
+    response = client.get(url, headers=user_1.headers)
+    assert gift_names(response) == ["gift1"]
+    pagination = response.get_json()["pagination"]
+    assert pagination["total_items"] == 3
+    next_link = pagination["next"]
+    assert "sort=price" in next_link and "min_price=50" in next_link
+    assert gift_names(client.get(next_link, headers=user_1.headers)) == ["vase"]
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "sort=link",
+        "sort=--price",
+        "sort=price-",
+        "reserved=yes",
+        "min_price=cheap",
+        "max_price=1.5",
+    ],
+)
+def test_get_gifts_invalid_sort_or_filter(client, user_1, list_1, gift_1, query):
+    response = client.get(f"/api/list/{list_1}/gift?{query}", headers=user_1.headers)
+    assert response.status_code == 400
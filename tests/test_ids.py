@@ -0,0 +1,88 @@
+from tests.conftest import INVALID_ID
+from app.utils.ids import (
+    ID_LENGTH,
+    IdGenerator,
+    decode,
+    encode,
+    id_timestamp,
+    is_valid_id,
+    new_id,
+)
+from types import SimpleNamespace
+from werkzeug.exceptions import NotFound
+import importlib
+import pytest
+import time
+import uuid
+
+ids_module = importlib.import_module("app.utils.ids")
+
+
+def test_new_id_format():
+    id = new_id()
+    assert len(id) == ID_LENGTH
+    assert is_valid_id(id)
+    value = decode(id)
+    assert encode(value) == id
+    # UUIDv7 version and variant bits
+    assert uuid.UUID(int=value).version == 7
+    assert (value >> 62) & 0b11 == 0b10
+
+
+def test_new_ids_are_time_ordered():
+    before = time.time_ns() // 1_000_000
+    ids = [new_id() for _ in range(5000)]
+    after = time.time_ns() // 1_000_000
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert before <= id_timestamp(ids[0]) <= id_timestamp(ids[-1]) <= after + 1
+
+
+def test_sequence_overflow_borrows_next_millisecond(monkeypatch):
+    # the clock stands still, the generator must not go backwards
+    monkeypatch.setattr(ids_module, "time", SimpleNamespace(time_ns=lambda: 10**15))
+    generator = IdGenerator()
+    ids = [encode(generator.next_value()) for _ in range(0x1000 + 10)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert id_timestamp(ids[-1]) == 10**15 // 1_000_000 + 1
+
+
+def test_legacy_ids_are_valid():
+    legacy_id = str(uuid.uuid4())
+    assert is_valid_id(legacy_id)
+    assert id_timestamp(legacy_id) is None
+
+
+@pytest.mark.parametrize(
+    "id",
+    [INVALID_ID, "", None, new_id().upper(), new_id()[:-1], new_id() + "0", "u" * 26],
+)
+def test_malformed_ids_are_invalid(id):
+    assert not is_valid_id(id)
+
+
+def test_id_converter(app):
+    adapter = app.url_map.bind("localhost")
+    for list_id in (new_id(), str(uuid.uuid4())):
+        endpoint, values = adapter.match(f"/api/list/{list_id}")
+        assert endpoint == "list_bp.get_specific_list"
+        assert values == {"list_id": list_id}
+    with pytest.raises(NotFound):
+        adapter.match(f"/api/list/{INVALID_ID}")
+
+
+def test_malformed_id_not_found(client, user_1, list_1, gift_1):
+    for url in (
+        f"/api/list/{list_1}/gift/{gift_1}1",
+        f"/api/list/{list_1.upper()}",
+        f"/api/user/{INVALID_ID}/list/{list_1}",
+    ):
+        assert client.get(url, headers=user_1.headers).status_code == 404
+
+
+def test_created_documents_get_new_ids(client, user_1, list_1, gift_1):
+    for id in (user_1.id, list_1, gift_1):
+        assert len(id) == ID_LENGTH
+        assert is_valid_id(id)
+    assert user_1.id < list_1 < gift_1
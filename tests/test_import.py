@@ -0,0 +1,79 @@
+from tests.conftest import PHONE_NUMBER_1, INVALID_ID
+from app.models import User, List, Gift
+from app.utils.ids import new_id
+import json
+
+USER_ID = new_id()
+LIST_ID = new_id()
+GIFT_ID = new_id()
+
+ROWS = [
+    {"type": "user", "id": USER_ID, "phone_number": PHONE_NUMBER_1},
+    {"type": "list", "id": LIST_ID, "name": "list1", "phone_number": PHONE_NUMBER_1},
+    {"type": "gift", "id": GIFT_ID, "list": LIST_ID, "name": "gift1", "price": 50},
+]
+
+
+def import_data(app, tmp_path, content: str, *options: str):
+    source = tmp_path / "source"
+    source.write_text(content, encoding="utf-8")
+    runner = app.test_cli_runner()
+    return runner.invoke(args=["import", "data", str(source), *options])
+
+
+def test_import_ndjson(app, tmp_path):
+    content = "".join(json.dumps(row) + "\n" for row in ROWS)
+    result = import_data(app, tmp_path, content, "--chunk-size", "2")
+    assert result.exit_code == 0
+    assert "imported: 3, rejected: 0" in result.output
+    assert User.objects.get(id=USER_ID).phone_number == PHONE_NUMBER_1
+    gift_list = List.objects.get(id=LIST_ID)
+    assert gift_list.name == "list1"
+    assert gift_list.user.id == USER_ID
+    gift = Gift.objects.get(id=GIFT_ID)
+    assert (gift.list.id, gift.name, gift.price) == (LIST_ID, "gift1", 50)
+
+
+def test_import_is_idempotent(app, tmp_path):
+    content = "".join(json.dumps(row) + "\n" for row in ROWS)
+    import_data(app, tmp_path, content)
+    renamed = dict(ROWS[1], name="renamed")
+    result = import_data(app, tmp_path, json.dumps(renamed))
+    assert result.exit_code == 0
+    assert List.objects.count() == 1
+    assert List.objects.get(id=LIST_ID).name == "renamed"
+
+
+def test_import_csv(app, tmp_path):
+    content = (
+        "type,id,phone_number,name,list,price\n"
+        f"user,{USER_ID},{PHONE_NUMBER_1},,,\n"
+        f"list,{LIST_ID},{PHONE_NUMBER_1},list1,,\n"
+        f"gift,{GIFT_ID},,gift1,{LIST_ID},50\n"
+    )
+    result = import_data(app, tmp_path, content, "--format", "csv")
+    assert result.exit_code == 0
+    assert "imported: 3, rejected: 0" in result.output
+    assert Gift.objects.get(id=GIFT_ID).price == 50
+
+
+def test_import_rejected_rows(app, tmp_path):
+    rows = [
+        json.dumps(ROWS[0]),
+        "not json",
+        json.dumps({"type": "list", "id": INVALID_ID, "name": "list1"}),
+        json.dumps(dict(ROWS[2], list=new_id())),
+        json.dumps({"type": "comment", "id": new_id()}),
+    ]
+    errors = tmp_path / "errors.ndjson"
+    result = import_data(app, tmp_path, "\n".join(rows), "--errors", str(errors))
+    assert result.exit_code == 0
+    assert "imported: 1, rejected: 4" in result.output
+    rejected = [json.loads(line) for line in errors.read_text().splitlines()]
+    assert [(row["line"], row["error"]) for row in rejected] == [
+        (2, "malformed row"),
+        (3, "invalid id"),
+        (5, "unknown record type"),
+        (4, "list not found"),
+    ]
+    assert Gift.objects.count() == 0
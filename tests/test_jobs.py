@@ -0,0 +1,77 @@
+from app import redis_connection
+from app.utils.jobs.queue import JobQueue
+import pytest
+
+
+@pytest.fixture
+def queue(app, monkeypatch):
+    monkeypatch.setitem(app.config, "JOB_QUEUE_MODE", "redis")
+    queue = JobQueue(redis_connection, prefix="test_jobs", retry_delay=0)
+    queue.calls = []
+
+    @queue.handler("record")
+    def record(*args, **kwargs):
+        queue.calls.append((args, kwargs))
+
+    @queue.handler("fail")
+    def fail():
+        queue.calls.append("fail")
+        raise ValueError()
+
+    with app.app_context():
+        yield queue
+
+
+def test_enqueue_returns_and_worker_runs_job(queue):
+    assert queue.enqueue("record", 1, key="a") is not None
+    assert queue.calls == []
+    queue.work(burst=True)
+    assert queue.calls == [((1,), {"key": "a"})]
+    assert not redis_connection.exists(queue.queue_key, queue.processing_key)
+
+
+def test_local_mode_runs_job_inline(app, queue, monkeypatch):
+    monkeypatch.setitem(app.config, "JOB_QUEUE_MODE", "local")
+    assert queue.enqueue("record", 1) is None
+    assert queue.calls == [((1,), {})]
+
+
+def test_unknown_job(queue):
+    with pytest.raises(KeyError):
+        queue.enqueue("unknown")
+
+
+def test_pending_job_is_deduplicated(queue):
+    job_id = queue.enqueue("record", 1, dedup_key="key")
+    assert queue.enqueue("record", 2, dedup_key="key") == job_id
+    queue.work(burst=True)
+    assert queue.calls == [((1,), {})]
+    # the key is released when the job finishes
+    assert queue.enqueue("record", 3, dedup_key="key") != job_id
+
+
+def test_failed_job_is_retried_then_given_up(queue):
+    job_id = queue.enqueue("fail", dedup_key="key")
+    queue.work(burst=True)
+    assert queue.calls == ["fail"] * (queue.max_retries + 1)
+    assert redis_connection.lrange(queue.failed_key, 0, -1) == [job_id]
+    assert queue.enqueue("fail", dedup_key="key") != job_id
+
+
+def test_retry_is_delayed_with_backoff(queue):
+    queue.retry_delay = 60
+    queue.enqueue("fail")
+    queue.work(burst=True)
+    assert queue.calls == ["fail"]
+    assert redis_connection.zcard(queue.delayed_key) == 1
+
+
+def test_unfinished_job_is_claimed_again(queue):
+    queue.visibility_timeout = 0
+    job_id = queue.enqueue("record", 1)
+    # claimed by a worker which died before finishing it
+    assert queue.claim() == job_id
+    assert queue.claim() == job_id
+    queue.process(job_id)
+    assert queue.claim() is None
+    assert queue.calls == [((1,), {})]
@@ -0,0 +1,163 @@
+from tests.conftest import INVALID_TOKEN, INVALID_ID, auth_headers, forbid_save
+import pytest
+
+UNAUTHORIZED = auth_headers(INVALID_TOKEN)
+
+
+def test_create_list(client, user_1):
+    response = client.post("/api/list", json={"name": "list1"}, headers=user_1.headers)
+    assert response.status_code == 201
+    assert isinstance(response.get_json()["id"], str)
+
+
+def test_create_list_invalid_data(client, user_1):
+    response = client.post(
+        "/api/list", json={"list_name": "list1"}, headers=user_1.headers
+    )
+    assert response.status_code == 400
+
+
+def test_create_list_unauthorized(client):
+    response = client.post("/api/list", json={"name": "list1"}, headers=UNAUTHORIZED)
+    assert response.status_code == 401
+
+
+def test_create_list_duplicate_name(client, user_1, list_1):
+    response = client.post("/api/list", json={"name": "list1"}, headers=user_1.headers)
+    assert response.status_code == 409
+
+
+def test_get_lists(client, user_1, list_1, list_2):
+    response = client.get("/api/list?page=1&per_page=1", headers=user_1.headers)
+    assert response.status_code == 200
+
+
+def test_get_lists_unauthorized(client):
+    response = client.get("/api/list?page=1&per_page=1", headers=UNAUTHORIZED)
+    assert response.status_code == 401
+
+
+def test_get_lists_invalid_page(client, user_1, list_1):
+    response = client.get("/api/list?page=-1&per_page=-1", headers=user_1.headers)
+    assert response.status_code == 404
+
+
+def test_update_list(client, monkeypatch, user_1, list_1):
+    forbid_save(monkeypatch)
+    response = client.put(
+        f"/api/list/{list_1}", json={"name": "list2"}, headers=user_1.headers
+    )
+    assert response.status_code == 200
+    assert response.get_json()["name"] == "list2"
+    response = client.get(f"/api/list/{list_1}", headers=user_1.headers)
+    assert response.get_json()["name"] == "list2"
+
+
+def test_update_list_invalid_data(client, user_1, list_1):
+    response = client.put(
+        f"/api/list/{list_1}", json={"list_name": "list3"}, headers=user_1.headers
+    )
+    assert response.status_code == 400
+
+
+def test_update_list_unauthorized(client, list_1):
+    response = client.put(
+        f"/api/list/{list_1}", json={"name": "list4"}, headers=UNAUTHORIZED
+    )
+    assert response.status_code == 401
+
+
+def test_update_list_not_found(client, user_1):
+    response = client.put(
+        f"/api/list/{INVALID_ID}", json={"name": "list5"}, headers=user_1.headers
+    )
+    assert response.status_code == 404
+
+
+def test_update_list_duplicate_name(client, user_1, list_1, list_2):
+    response = client.put(
+        f"/api/list/{list_1}", json={"name": "second list"}, headers=user_1.headers
+    )
+    assert response.status_code == 409
+
+
+def test_get_list(client, user_1, list_1):
+    response = client.get(f"/api/list/{list_1}", headers=user_1.headers)
+    assert response.status_code == 200
+    assert response.get_json()["id"] == list_1
+
+
+def test_get_list_unauthorized(client, list_1):
+    assert client.get(f"/api/list/{list_1}", headers=UNAUTHORIZED).status_code == 401
+
+
+def test_get_list_not_found(client, user_1):
+    response = client.get(f"/api/list/{INVALID_ID}", headers=user_1.headers)
+    assert response.status_code == 404
+
+
+def test_delete_list(client, user_1, list_1, gift_1):
+    assert client.delete(f"/api/list/{list_1}", headers=UNAUTHORIZED).status_code == 401
+    response = client.delete(f"/api/list/{INVALID_ID}", headers=user_1.headers)
+    assert response.status_code == 404
+    response = client.delete(f"/api/list/{list_1}", headers=user_1.headers)
+    assert response.status_code == 200
+    response = client.get(f"/api/list/{list_1}", headers=user_1.headers)
+    assert response.status_code == 404
+
+
+def test_get_lists_fields(client, user_1, list_1, list_2):
+    response = client.get(
+        "/api/list?page=1&per_page=1&fields=name", headers=user_1.headers
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["items"] == [{"name": "list1"}]
+    assert "fields=name" in data["pagination"]["next"]
+
+
+def test_get_list_fields(client, user_1, list_1, gift_1):
+    response = client.get(
+        f"/api/list/{list_1}?fields=name,gifts&gift_fields=name,price",
+        headers=user_1.headers,
+    )
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "name": "list1",
+        "gifts": [{"name": "gift1", "price": 50}],
+    }
+
+
+def test_get_list_fields_without_gifts(client, user_1, list_1, gift_1):
+    response = client.get(f"/api/list/{list_1}?fields=id", headers=user_1.headers)
+    assert response.status_code == 200
+    assert response.get_json() == {"id": list_1}
+
+
+def test_get_list_by_user_id_fields(client, user_1, user_2, list_1, gift_1):
+    response = client.get(
+        f"/api/user/{user_1.id}/list/{list_1}?gift_fields=id",
+        headers=user_2.headers,
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["name"] == "list1"
+    assert data["gifts"] == [{"id": gift_1}]
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["fields=name,owner", "fields=", "fields=gifts&gift_fields=list"],
+)
+def test_get_list_unknown_field(client, user_1, user_2, list_1, query):
+    response = client.get(f"/api/list/{list_1}?{query}", headers=user_1.headers)
+    assert response.status_code == 400
+    response = client.get(
+        f"/api/user/{user_1.id}/list/{list_1}?{query}", headers=user_2.headers
+    )
+    assert response.status_code == 400
+
+
+def test_get_lists_unknown_field(client, user_1, list_1):
+    response = client.get("/api/list?fields=gifts", headers=user_1.headers)
+    assert response.status_code == 400
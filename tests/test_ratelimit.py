@@ -0,0 +1,82 @@
+from app import redis_connection
+from app.utils.ratelimit.limiter import RateLimiter
+import importlib
+import pytest
+
+# the package exports the limiter instance under the module's name
+limiter_module = importlib.import_module("app.utils.ratelimit.limiter")
+
+HOUR = 60 * 60
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # at the start of an hour, so every request is in the same window
+    clock = FakeClock(1_800_000_000 - 1_800_000_000 % HOUR)
+    monkeypatch.setattr(limiter_module, "time", clock)
+    return clock
+
+
+def count_allowed(limiters, requests, clock, spacing, key="test:key"):
+    allowed = 0
+    for number in range(requests):
+        limiter = limiters[number % len(limiters)]
+        allowed += limiter.hit(key, 1000, HOUR)
+        clock.sleep(spacing)
+    return allowed
+
+
+@pytest.mark.parametrize("spacing", [2, 0.5, 0.01, 0])
+def test_allowed_requests_match_the_limit(clock, spacing):
+    limiter = RateLimiter(redis_connection)
+    assert count_allowed([limiter], 100, clock, spacing) == 100
+    assert count_allowed([limiter], 1400, clock, spacing) == 900
+
+
+@pytest.mark.parametrize("spacing", [1, 0.01])
+def test_allowed_requests_match_the_limit_across_processes(clock, spacing):
+    limiters = [RateLimiter(redis_connection) for _ in range(3)]
+    allowed = count_allowed(limiters, 1500, clock, spacing)
+    assert allowed <= 1000
+    # requests leased by a process and not used are given back once the
+    # lease expires, other processes can use them
+    for _ in range(2):
+        clock.sleep(2)
+        allowed += count_allowed(limiters, 500, clock, spacing)
+    assert allowed == 1000
+
+
+def redis_used(limiter, clock):
+    window_index = int(clock.time() // HOUR)
+    return int(redis_connection.get(f"test:key:{window_index}") or 0)
+
+
+def test_sparse_traffic_is_charged_one_request_each(clock):
+    limiter = RateLimiter(redis_connection)
+    count_allowed([limiter], 10, clock, 2)
+    assert redis_used(limiter, clock) == 10
+
+
+def test_bursts_lease_batches(clock, monkeypatch):
+    limiter = RateLimiter(redis_connection)
+    calls = []
+    script = limiter._sliding_window
+    monkeypatch.setattr(
+        limiter, "_sliding_window", lambda **kwargs: calls.append(1) or script(**kwargs)
+    )
+    assert count_allowed([limiter], 500, clock, 0) == 500
+    assert len(calls) < 30
@@ -0,0 +1,155 @@
+from app.models import User, List, Gift, Token, GiftTombstone
+from app import redis_connection
+from argparse import Namespace
+from pathlib import Path
+from tests.conftest import NOT_USED_PHONE_NUMBER
+import importlib.util
+import json
+import pytest
+
+REPLAY_SCRIPT = Path(__file__).resolve().parent.parent / "benchmarks" / "replay.py"
+
+spec = importlib.util.spec_from_file_location("replay", REPLAY_SCRIPT)
+replay = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(replay)
+
+
+def fresh_database():
+    for model in (User, List, Gift, Token, GiftTombstone):
+        model._get_collection().delete_many({})
+    redis_connection.flushdb()
+
+
+def run(log, output):
+    fresh_database()
+    args = Namespace(
+        log=str(log),
+        target="app",
+        speed=0,
+        # in order, concurrent reads racing the writes may differ
+        concurrency=1,
+        limit=None,
+        output=str(output),
+    )
+    assert replay.run(args) == 0
+    return list(replay.read_ndjson(output))
+
+
+def compare(baseline, candidate, capsys):
+    args = Namespace(baseline=str(baseline), candidate=str(candidate), strict=True)
+    code = replay.compare(args)
+    return code, capsys.readouterr().out
+
+
+def record_traffic(client, user_1, user_2):
+    """Requests recorded by the access log, all of them successful."""
+    response = client.post(
+        "/api/user/auth/login/code",
+        json={"phone_number": NOT_USED_PHONE_NUMBER},
+        buffered=True,
+    )
+    client.post(
+        "/api/user/auth/login",
+        json={
+            "phone_number": NOT_USED_PHONE_NUMBER,
+            "login_code": response.get_json()["login_code"],
+        },
+        buffered=True,
+    )
+    response = client.post(
+        "/api/list", json={"name": "list"}, headers=user_1.headers, buffered=True
+    )
+    list_id = response.get_json()["id"]
+    response = client.post(
+        f"/api/list/{list_id}/gift",
+        json={"name": "gift", "price": 10},
+        headers=user_1.headers,
+        buffered=True,
+    )
+    gift_id = response.get_json()["id"]
+    client.put(
+        f"/api/list/{list_id}",
+        json={"name": "renamed"},
+        headers=user_1.headers,
+        buffered=True,
+    )
+    for path, user in [
+        ("/api/user", user_1),
+        (f"/api/list/{list_id}", user_1),
+        (f"/api/list/{list_id}/gift/{gift_id}", user_1),
+        (f"/api/user/{user_1.id}/list", user_2),
+        (f"/api/user/{user_1.id}/list/{list_id}", user_2),
+        (f"/api/list/{list_id}/changes", user_1),
+        ("/api/user/feed", user_2),
+    ]:
+        assert client.get(path, headers=user.headers, buffered=True).status_code == 200
+    client.post(
+        f"/api/user/{user_1.id}/list/{list_id}/gift/{gift_id}/buy",
+        headers=user_2.headers,
+        buffered=True,
+    )
+
+
+def write_log(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return path
+
+
+@pytest.fixture
+def recorded_log(app, client, tmp_path, monkeypatch, user_1, user_2, access_records):
+    monkeypatch.setitem(app.config, "ACCESS_LOG_REQUEST_BODIES", True)
+    record_traffic(client, user_1, user_2)
+    return write_log(tmp_path / "traffic.ndjson", access_records())
+
+
+def test_record_replay_compare(recorded_log, tmp_path, capsys):
+    baseline = run(recorded_log, tmp_path / "a.ndjson")
+    assert [result["status"] for result in baseline] == [
+        result["recorded_status"] for result in baseline
+    ]
+    requests = {(result["method"], result["endpoint"]) for result in baseline}
+    assert {("POST", "/api/list"), ("POST", "/api/list/<id>/gift")} <= requests
+    assert ("GET", "/api/user/feed") in requests
+    # the login body holds the login code and is not recorded
+    assert ("POST", "/api/user/auth/login") not in requests
+    assert "skipped 1 writes recorded without a body" in capsys.readouterr().out
+    run(recorded_log, tmp_path / "b.ndjson")
+
+    code, output = compare(tmp_path / "a.ndjson", tmp_path / "b.ndjson", capsys)
+    assert code == 0, output
+    assert "no status differences" in output
+    assert "no body differences" in output
+
+
+def test_compare_reports_body_differences(recorded_log, tmp_path, capsys):
+    results = run(recorded_log, tmp_path / "a.ndjson")
+    results[0]["body"] = "changed"
+    candidate = tmp_path / "b.ndjson"
+    candidate.write_text("".join(json.dumps(result) + "\n" for result in results))
+
+    code, output = compare(tmp_path / "a.ndjson", candidate, capsys)
+    assert code == 1
+    changed = results[0]
+    assert f"1  {changed['method']} {changed['endpoint']} (200)" in output
+
+
+def test_seeding_more_users_than_the_login_limit(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, "RATELIMIT_ENABLED", True)
+    log = tmp_path / "traffic.ndjson"
+    records = [
+        {"ts": number, "method": "GET", "path": "/api/user", "user_id": f"u{number}"}
+        for number in range(25)
+    ]
+    log.write_text("".join(json.dumps(record) + "\n" for record in records))
+    results = run(log, tmp_path / "a.ndjson")
+    assert [result["status"] for result in results] == [200] * 25
+
+
+def test_writes_recorded_without_body_are_skipped(
+    client, tmp_path, capsys, user_1, user_2, access_records
+):
+    record_traffic(client, user_1, user_2)
+    log = write_log(tmp_path / "traffic.ndjson", access_records())
+    results = run(log, tmp_path / "a.ndjson")
+    assert {result["method"] for result in results} == {"GET"}
+    assert "skipped 6 writes recorded without a body" in capsys.readouterr().out
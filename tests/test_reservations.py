@@ -0,0 +1,169 @@
+from tests.conftest import INVALID_TOKEN, INVALID_ID, auth_headers, forbid_save
+from app.utils.ids import new_id
+import importlib
+import pytest
+
+reservations_module = importlib.import_module("app.utils.reservations")
+
+
+@pytest.fixture
+def gift_2(client, user_1, list_1):
+    response = client.post(
+        f"/api/list/{list_1}/gift", json={"name": "gift2"}, headers=user_1.headers
+    )
+    return response.get_json()["id"]
+
+
+def reservations_url(user, list_id):
+    return f"/api/user/{user.id}/list/{list_id}/gift/reservations"
+
+
+def buyers(client, user, list_id):
+    response = client.get(f"/api/list/{list_id}/gift", headers=user.headers)
+    return {
+        gift["id"]: gift["expected_buyer"] and gift["expected_buyer"]["id"]
+        for gift in response.get_json()["items"]
+    }
+
+
+def test_reserve_gifts(client, monkeypatch, user_1, user_2, list_1, gift_1, gift_2):
+    forbid_save(monkeypatch)
+    missing = new_id()
+    response = client.post(
+        reservations_url(user_1, list_1),
+        json={"reserve": [gift_1, gift_2, missing]},
+        headers=user_2.headers,
+    )
+    assert response.status_code == 200
+    assert response.get_json()["outcomes"] == {
+        gift_1: "reserved",
+        gift_2: "reserved",
+        missing: "not_found",
+    }
+    assert buyers(client, user_1, list_1) == {gift_1: user_2.id, gift_2: user_2.id}
+
+
+def test_reserve_gifts_twice(client, user_1, user_2, user_3, list_1, gift_1, gift_2):
+    url = reservations_url(user_1, list_1)
+    client.post(url, json={"reserve": [gift_1]}, headers=user_2.headers)
+    # reserving again is a no-op for the same user and a conflict for others
+    response = client.post(url, json={"reserve": [gift_1]}, headers=user_2.headers)
+    assert response.get_json()["outcomes"] == {gift_1: "reserved"}
+    response = client.post(
+        url, json={"reserve": [gift_1, gift_2]}, headers=user_3.headers
+    )
+    assert response.status_code == 200
+    assert response.get_json()["outcomes"] == {
+        gift_1: "conflict",
+        gift_2: "reserved",
+    }
+    assert buyers(client, user_1, list_1) == {gift_1: user_2.id, gift_2: user_3.id}
+    # a gift bought one at a time is held as well
+    response = client.post(
+        f"/api/user/{user_1.id}/list/{list_1}/gift/{gift_2}/buy",
+        headers=user_2.headers,
+    )
+    assert response.status_code == 409
+
+
+def test_unreserve_gifts(client, user_1, user_2, user_3, list_1, gift_1, gift_2):
+    url = reservations_url(user_1, list_1)
+    client.post(url, json={"reserve": [gift_1]}, headers=user_2.headers)
+    client.post(url, json={"reserve": [gift_2]}, headers=user_3.headers)
+    response = client.post(
+        url, json={"unreserve": [gift_1, gift_2]}, headers=user_2.headers
+    )
+    assert response.status_code == 200
+    assert response.get_json()["outcomes"] == {
+        gift_1: "unreserved",
+        gift_2: "conflict",
+    }
+    assert buyers(client, user_1, list_1) == {gift_1: None, gift_2: user_3.id}
+
+
+def test_reserve_and_unreserve_gifts(client, user_1, user_2, list_1, gift_1, gift_2):
+    url = reservations_url(user_1, list_1)
+    client.post(url, json={"reserve": [gift_1]}, headers=user_2.headers)
+    response = client.post(
+        url,
+        json={"reserve": [gift_2], "unreserve": [gift_1]},
+        headers=user_2.headers,
+    )
+    assert response.get_json()["outcomes"] == {
+        gift_1: "unreserved",
+        gift_2: "reserved",
+    }
+    assert buyers(client, user_1, list_1) == {gift_1: None, gift_2: user_2.id}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        {"reserve": []},
+        {"reserve": [INVALID_ID]},
+        {"reserve": ["gift"], "unreserve": []},
+        {"reserve": "gift"},
+    ],
+)
+def test_reserve_gifts_invalid_data(client, user_1, user_2, list_1, data):
+    response = client.post(
+        reservations_url(user_1, list_1), json=data, headers=user_2.headers
+    )
+    assert response.status_code == 400
+
+
+def test_reserve_gifts_invalid_request(client, user_1, user_2, list_1, gift_1):
+    url = reservations_url(user_1, list_1)
+    # the same gift can not be reserved and unreserved at once
+    data = {"reserve": [gift_1], "unreserve": [gift_1]}
+    assert client.post(url, json=data, headers=user_2.headers).status_code == 400
+    # nor twice in one request
+    data = {"reserve": [gift_1, gift_1]}
+    assert client.post(url, json=data, headers=user_2.headers).status_code == 400
+    # the owner of the list can not reserve its gifts
+    data = {"reserve": [gift_1]}
+    assert client.post(url, json=data, headers=user_1.headers).status_code == 400
+    headers = auth_headers(INVALID_TOKEN)
+    assert client.post(url, json=data, headers=headers).status_code == 401
+
+
+def test_reserve_gifts_not_found(client, user_1, user_2, user_3, list_1, gift_1):
+    data = {"reserve": [gift_1]}
+    for url in (
+        reservations_url(user_1, new_id()),
+        f"/api/user/{new_id()}/list/{list_1}/gift/reservations",
+        # the list belongs to another user
+        reservations_url(user_3, list_1),
+    ):
+        assert client.post(url, json=data, headers=user_2.headers).status_code == 404
+
+
+@pytest.mark.parametrize(
+    "settings, use_transaction",
+    [
+        ({}, False),
+        ({"RESERVATION_TRANSACTIONS": True}, True),
+        # deleting users in transactions does not apply to reservations
+        ({"CASCADE_TRANSACTIONS": True}, False),
+    ],
+)
+def test_reserve_gifts_transaction_setting(
+    app, client, monkeypatch, user_1, user_2, list_1, gift_1, settings, use_transaction
+):
+    calls = []
+
+    def run_in_transaction(operations, use_transaction):
+        calls.append(use_transaction)
+        operations(None)
+
+    monkeypatch.setattr(reservations_module, "run_in_transaction", run_in_transaction)
+    for key, value in settings.items():
+        monkeypatch.setitem(app.config, key, value)
+    response = client.post(
+        reservations_url(user_1, list_1),
+        json={"reserve": [gift_1]},
+        headers=user_2.headers,
+    )
+    assert response.get_json()["outcomes"] == {gift_1: "reserved"}
+    assert calls == [use_transaction]
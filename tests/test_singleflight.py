@@ -0,0 +1,102 @@
+from app import redis_connection
+from app.utils.singleflight import SingleFlight
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import pytest
+
+
+@pytest.fixture
+def flight(app):
+    with app.app_context():
+        yield SingleFlight(redis_connection, wait_timeout=1)
+
+
+def run_in_app(app, function):
+    def run():
+        with app.app_context():
+            return function()
+
+    return run
+
+
+def test_concurrent_calls_compute_once(app, flight):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 1}
+
+    call = run_in_app(app, lambda: flight.do("key", compute))
+    with ThreadPoolExecutor(4) as executor:
+        results = [executor.submit(call) for _ in range(4)]
+        assert [future.result() for future in results] == [{"value": 1}] * 4
+    assert len(calls) == 1
+    # the result is stored and the lock released
+    assert redis_connection.get(flight.result_key("key")) == '{"result":{"value":1}}'
+    assert not redis_connection.exists(flight.lock_key("key"))
+
+
+def test_result_broadcast_by_another_process(flight):
+    # another process holds the lock and publishes the result later
+    redis_connection.set(flight.lock_key("key"), "other")
+
+    def publish():
+        while not redis_connection.pubsub_numsub(flight.channel("key"))[0][1]:
+            time.sleep(0.01)
+        redis_connection.publish(flight.channel("key"), '{"result":2}')
+
+    thread = threading.Thread(target=publish)
+    thread.start()
+    assert flight.do("key", lambda: 3) == 2
+    thread.join()
+    assert flight.stats["shared_remote"] == 1
+    # subscribed only while waiting
+    assert redis_connection.pubsub_numsub(flight.channel("key"))[0][1] == 0
+
+
+def test_result_stored_by_another_process(flight):
+    redis_connection.set(flight.lock_key("key"), "other")
+    redis_connection.set(flight.result_key("key"), '{"result":2}')
+    assert flight.do("key", lambda: 3) == 2
+
+
+def test_computes_when_no_broadcast_arrives(flight):
+    flight.wait_timeout = 0.05
+    redis_connection.set(flight.lock_key("key"), "other")
+    assert flight.do("key", lambda: 3) == 3
+    assert redis_connection.get(flight.lock_key("key")) == "other"
+
+
+def test_failure_is_broadcast_and_releases_the_lock(flight):
+    def compute():
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        flight.do("key", compute)
+    assert not redis_connection.exists(flight.lock_key("key"))
+    assert not redis_connection.exists(flight.result_key("key"))
+
+
+def test_local_caller_waits_for_leader_computing_after_remote_wait(app, flight):
+    # another process holds the lock but never broadcasts, the leader
+    # computes once its wait is over and local callers share its result
+    flight.wait_timeout = 0.3
+    redis_connection.set(flight.lock_key("key"), "other")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.15)
+        return {"value": len(calls)}
+
+    call = run_in_app(app, lambda: flight.do("key", compute))
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(call)
+        while "key" not in flight.calls:
+            time.sleep(0.001)
+        follower = executor.submit(call)
+        assert leader.result() == follower.result() == {"value": 1}
+    assert len(calls) == 1
+    assert flight.stats == {"computed": 1, "shared_local": 1, "shared_remote": 0}
@@ -0,0 +1,144 @@
+from app.utils.jobs import job_queue
+from app.utils.sms import sms_dispatcher, SMSProvider
+from tests.conftest import PHONE_NUMBER_1
+from collections import Counter
+import importlib
+import pytest
+
+dispatcher_module = importlib.import_module("app.utils.sms.dispatcher")
+
+
+@pytest.fixture
+def provider(app):
+    with app.app_context():
+        provider = sms_dispatcher.get_provider()
+        provider.outbox.clear()
+        yield provider
+
+
+@pytest.fixture
+def redis_jobs(app, monkeypatch):
+    monkeypatch.setitem(app.config, "JOB_QUEUE_MODE", "redis")
+
+
+def test_provider_must_implement_send_batch():
+    with pytest.raises(TypeError):
+        SMSProvider()
+
+
+def test_fake_provider_outbox_is_bounded(provider):
+    provider.send_batch([(PHONE_NUMBER_1, "code")] * (provider.outbox_size + 10))
+    assert len(provider.outbox) == provider.outbox_size
+
+
+def test_dispatch_sends_queued_messages(provider):
+    for number in range(250):
+        sms_dispatcher.queue_message(PHONE_NUMBER_1, f"code {number}")
+    assert sms_dispatcher.dispatch() == 250
+    assert sms_dispatcher.pending() == 0
+    # sent in the order they were queued
+    assert [text for _, text in provider.outbox][:2] == ["code 0", "code 1"]
+
+
+def test_dispatch_requeues_failed_batches(provider, monkeypatch):
+    def fail(messages):
+        raise ConnectionError("gateway down")
+
+    monkeypatch.setattr(provider, "send_batch", fail)
+    sms_dispatcher.queue_message(PHONE_NUMBER_1, "code")
+    with pytest.raises(ConnectionError):
+        sms_dispatcher.dispatch()
+    assert sms_dispatcher.pending() == 1
+
+
+def test_login_code_is_sent_by_the_worker(client, provider, redis_jobs):
+    client.post("/api/user/auth/login/code", json={"phone_number": PHONE_NUMBER_1})
+    assert not provider.outbox
+    job_queue.work(burst=True)
+    assert [number for number, _ in provider.outbox] == [PHONE_NUMBER_1]
+
+
+def test_message_queued_while_dispatching_is_not_stranded(
+    provider, redis_jobs, monkeypatch
+):
+    dispatch = sms_dispatcher.dispatch
+
+    def dispatch_then_queue():
+        sent = dispatch()
+        # queued after the last pop, its dispatch job is deduplicated away
+        sms_dispatcher.queue_message(PHONE_NUMBER_1, "late")
+        job_queue.enqueue("dispatch_sms", dedup_key="dispatch_sms")
+        return sent
+
+    monkeypatch.setattr(sms_dispatcher, "dispatch", dispatch_then_queue)
+    sms_dispatcher.queue_message(PHONE_NUMBER_1, "early")
+    job_queue.enqueue("dispatch_sms", dedup_key="dispatch_sms")
+    job_id = job_queue.claim()
+    job_queue.process(job_id)
+    monkeypatch.setattr(sms_dispatcher, "dispatch", dispatch)
+
+    job_queue.work(burst=True)
+    assert [text for _, text in provider.outbox] == ["early", "late"]
+    assert sms_dispatcher.pending() == 0
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.mark.parametrize("max_batch_size, concurrency", [(10, 2), (50, 4), (7, 3)])
+def test_dispatch_enforces_rate_limit(
+    provider, monkeypatch, max_batch_size, concurrency
+):
+    clock = FakeClock()
+    monkeypatch.setattr(dispatcher_module, "time", clock)
+    monkeypatch.setattr(provider, "max_batch_size", max_batch_size)
+    monkeypatch.setattr(provider, "concurrency", concurrency)
+    monkeypatch.setattr(provider, "rate_limit", 50)
+    sent_at = []
+    send_batch = provider.send_batch
+
+    def record(messages):
+        sent_at.extend([clock.now] * len(messages))
+        send_batch(messages)
+
+    monkeypatch.setattr(provider, "send_batch", record)
+    for number in range(500):
+        sms_dispatcher.queue_message(PHONE_NUMBER_1, f"code {number}")
+    assert sms_dispatcher.dispatch() == 500
+
+    windows = Counter(int(timestamp - 1000) for timestamp in sent_at)
+    assert max(windows.values()) <= 50
+    assert clock.now - 1000 >= 9
+    # no wait once the outbox is empty
+    assert clock.now - 1000 < 10
+
+
+def test_dispatch_skipped_while_locked(provider, redis_jobs):
+    lock = sms_dispatcher.connection.lock(f"sms:{provider.name}:dispatch", timeout=10)
+    lock.acquire()
+    sms_dispatcher.queue_message(PHONE_NUMBER_1, "code")
+    job_queue.enqueue("dispatch_sms", dedup_key="dispatch_sms")
+    # not enqueued again, the dispatcher holding the lock sends the message
+    job_queue.work(burst=True)
+    assert sms_dispatcher.pending() == 1
+    lock.release()
+
+
+def test_login_code_with_failing_provider(client, provider, monkeypatch):
+    def fail(messages):
+        raise ConnectionError("gateway down")
+
+    monkeypatch.setattr(provider, "send_batch", fail)
+    response = client.post(
+        "/api/user/auth/login/code", json={"phone_number": PHONE_NUMBER_1}
+    )
+    assert response.status_code == 200
+    assert sms_dispatcher.pending() == 1
@@ -0,0 +1,107 @@
+from app.models import Gift, List
+from app.utils.sync import (
+    SYNC_WRITE_TIMEOUT_SECONDS,
+    begin_sync_write,
+    sync_write,
+)
+from types import SimpleNamespace
+import importlib
+import time
+
+sync_module = importlib.import_module("app.utils.sync")
+
+
+def get_changes(client, user, list_id, token=None):
+    url = f"/api/list/{list_id}/changes"
+    if token is not None:
+        url += f"?since={token}"
+    response = client.get(url, headers=user.headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_changes_without_token_reset(client, user_1, list_1, gift_1):
+    changes = get_changes(client, user_1, list_1)
+    assert changes["reset"]
+    assert [gift["id"] for gift in changes["gifts"]] == [gift_1]
+    assert changes["deleted"] == []
+
+
+def test_changes_since_token(client, user_1, list_1, gift_1):
+    response = client.post(
+        f"/api/list/{list_1}/gift", json={"name": "gift2"}, headers=user_1.headers
+    )
+    gift_2 = response.get_json()["id"]
+    token = get_changes(client, user_1, list_1)["sync_token"]
+    assert get_changes(client, user_1, list_1, token)["gifts"] == []
+
+    client.put(
+        f"/api/list/{list_1}/gift/{gift_1}",
+        json={"name": "renamed"},
+        headers=user_1.headers,
+    )
+    client.delete(f"/api/list/{list_1}/gift/{gift_2}", headers=user_1.headers)
+    changes = get_changes(client, user_1, list_1, token)
+    assert not changes["reset"]
+    assert [gift["name"] for gift in changes["gifts"]] == ["renamed"]
+    assert changes["deleted"] == [gift_2]
+    assert get_changes(client, user_1, list_1, changes["sync_token"])["gifts"] == []
+
+
+def rename(list_id, gift_id, name, sync_version):
+    Gift.objects(id=gift_id, list=list_id).update_one(
+        set__name=name, set__sync_version=sync_version
+    )
+
+
+def test_writers_committing_out_of_order(client, user_1, list_1, gift_1):
+    response = client.post(
+        f"/api/list/{list_1}/gift", json={"name": "gift2"}, headers=user_1.headers
+    )
+    gift_2 = response.get_json()["id"]
+    token = get_changes(client, user_1, list_1)["sync_token"]
+
+    with sync_write(list_1, user_1.id) as first:
+        with sync_write(list_1, user_1.id) as second:
+            assert second == first + 1
+            rename(list_1, gift_2, "second", second)
+        # the second writer is done, the first has not written yet
+        changes = get_changes(client, user_1, list_1, token)
+        assert [gift["name"] for gift in changes["gifts"]] == ["second"]
+        token = changes["sync_token"]
+        rename(list_1, gift_1, "first", first)
+
+    changes = get_changes(client, user_1, list_1, token)
+    assert "first" in [gift["name"] for gift in changes["gifts"]]
+    assert List.objects(id=list_1).first().sync_pending == []
+    changes = get_changes(client, user_1, list_1, changes["sync_token"])
+    assert changes["gifts"] == []
+
+
+def test_version_of_a_dead_writer_expires(client, monkeypatch, user_1, list_1, gift_1):
+    token = get_changes(client, user_1, list_1)["sync_token"]
+    # taken by a writer which never finished
+    begin_sync_write(list_1, user_1.id)
+    client.put(
+        f"/api/list/{list_1}/gift/{gift_1}",
+        json={"name": "renamed"},
+        headers=user_1.headers,
+    )
+    changes = get_changes(client, user_1, list_1, token)
+    assert changes["sync_token"].split(".")[0] == token.split(".")[0]
+
+    now = time.time() + SYNC_WRITE_TIMEOUT_SECONDS
+    monkeypatch.setattr(sync_module, "time", SimpleNamespace(time=lambda: now))
+    changes = get_changes(client, user_1, list_1, token)
+    assert int(changes["sync_token"].split(".")[0]) > int(token.split(".")[0])
+
+
+def test_changes_invalid_token(client, user_1, list_1):
+    url = f"/api/list/{list_1}/changes?since=abcd"
+    assert client.get(url, headers=user_1.headers).status_code == 400
+
+
+def test_changes_expired_token_reset(client, user_1, list_1, gift_1):
+    changes = get_changes(client, user_1, list_1, "0.0")
+    assert changes["reset"]
+    assert [gift["id"] for gift in changes["gifts"]] == [gift_1]
@@ -0,0 +1,30 @@
+from app.models import User
+from app.utils.user_cache import user_cache
+
+
+def test_update_invalidates_cached_user(client, user_1):
+    assert user_cache.get(user_1.id).first_name is None
+    response = client.put(
+        "/api/user", json={"first_name": "lex"}, headers=user_1.headers
+    )
+    assert response.status_code == 200
+    assert user_cache.get(user_1.id).first_name == "lex"
+
+
+def test_fill_racing_an_update_is_discarded(user_1, monkeypatch):
+    fill = user_cache._fill
+
+    def update_then_fill(keys, args):
+        # the user is updated and invalidated after the cache read it
+        User.objects(id=user_1.id).update_one(set__first_name="lex")
+        user_cache.invalidate(user_1.id)
+        return fill(keys=keys, args=args)
+
+    user_cache.invalidate(user_1.id)
+    monkeypatch.setattr(user_cache, "_fill", update_then_fill)
+    assert user_cache.get(user_1.id).first_name is None
+    monkeypatch.setattr(user_cache, "_fill", fill)
+
+    assert not user_cache.connection.exists(user_cache.key(user_1.id))
+    assert user_cache.get(user_1.id).first_name == "lex"
+    assert user_cache.connection.exists(user_cache.key(user_1.id))
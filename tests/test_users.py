@@ -0,0 +1,215 @@
+from tests.conftest import (
+    NOT_USED_PHONE_NUMBER,
+    INVALID_TOKEN,
+    INVALID_ID,
+    auth_headers,
+    forbid_save,
+)
+import pytest
+
+UNAUTHORIZED = auth_headers(INVALID_TOKEN)
+
+
+def test_get_user(client, user_1):
+    response = client.get("/api/user", headers=user_1.headers)
+    assert response.status_code == 200
+    assert response.get_json()["id"] == user_1.id
+
+
+def test_get_user_unauthorized(client):
+    assert client.get("/api/user", headers=UNAUTHORIZED).status_code == 401
+
+
+def test_search_user(client, user_1, user_2):
+    response = client.get(
+        f"/api/user/search?phone_number={user_2.phone_number}",
+        headers=user_1.headers,
+    )
+    assert response.status_code == 200
+    assert response.get_json()["id"] == user_2.id
+
+
+def test_search_user_unauthorized(client, user_2):
+    response = client.get(
+        f"/api/user/search?phone_number={user_2.phone_number}", headers=UNAUTHORIZED
+    )
+    assert response.status_code == 401
+
+
+def test_search_user_not_found(client, user_1):
+    response = client.get(
+        f"/api/user/search?phone_number={NOT_USED_PHONE_NUMBER}",
+        headers=user_1.headers,
+    )
+    assert response.status_code == 404
+
+
+def test_get_user_by_id(client, user_1, user_2):
+    response = client.get(f"/api/user/{user_2.id}", headers=user_1.headers)
+    assert response.status_code == 200
+
+
+def test_get_user_by_id_unauthorized(client, user_2):
+    assert client.get(f"/api/user/{user_2.id}", headers=UNAUTHORIZED).status_code == 401
+
+
+def test_get_user_by_id_not_found(client, user_1):
+    response = client.get(f"/api/user/{INVALID_ID}", headers=user_1.headers)
+    assert response.status_code == 404
+
+
+def test_update_user(client, user_1):
+    response = client.put(
+        "/api/user",
+        json={"first_name": "lex", "last_name": "fridman"},
+        headers=user_1.headers,
+    )
+    assert response.status_code == 200
+    user = client.get("/api/user", headers=user_1.headers).get_json()
+    assert (user["first_name"], user["last_name"]) == ("lex", "fridman")
+
+
+def test_update_user_invalid_data(client, user_1):
+    response = client.put("/api/user", json={"name": "lex"}, headers=user_1.headers)
+    assert response.status_code == 400
+
+
+def test_update_user_unauthorized(client):
+    response = client.put(
+        "/api/user",
+        json={"first_name": "lex", "last_name": "fridman"},
+        headers=UNAUTHORIZED,
+    )
+    assert response.status_code == 401
+
+
+def test_get_lists_by_user_id(client, user_1, user_2, list_1, list_2):
+    response = client.get(
+        f"/api/user/{user_1.id}/list?page=1&per_page=1", headers=user_2.headers
+    )
+    assert response.status_code == 200
+
+
+def test_get_lists_by_user_id_unauthorized(client, user_1):
+    response = client.get(f"/api/user/{user_1.id}/list", headers=UNAUTHORIZED)
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize(
+    "user_id, query",
+    [(INVALID_ID, "page=1&per_page=1"), (None, "page=-1&per_page=-1")],
+)
+def test_get_lists_by_user_id_not_found(client, user_1, user_2, list_1, user_id, query):
+    user_id = user_id or user_1.id
+    response = client.get(f"/api/user/{user_id}/list?{query}", headers=user_2.headers)
+    assert response.status_code == 404
+
+
+def test_get_list_by_user_id(client, user_1, user_2, list_1):
+    response = client.get(
+        f"/api/user/{user_1.id}/list/{list_1}", headers=user_2.headers
+    )
+    assert response.status_code == 200
+    assert response.get_json()["id"] == list_1
+
+
+def test_get_list_by_user_id_unauthorized(client, user_1, list_1):
+    response = client.get(f"/api/user/{user_1.id}/list/{list_1}", headers=UNAUTHORIZED)
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("invalid", ["user", "list"])
+def test_get_list_by_user_id_not_found(client, user_1, user_2, list_1, invalid):
+    user_id = INVALID_ID if invalid == "user" else user_1.id
+    list_id = INVALID_ID if invalid == "list" else list_1
+    response = client.get(f"/api/user/{user_id}/list/{list_id}", headers=user_2.headers)
+    assert response.status_code == 404
+
+
+def test_get_gifts_by_user_id(client, user_1, user_2, list_1, gift_1):
+    response = client.get(
+        f"/api/user/{user_1.id}/list/{list_1}/gift?page=1&per_page=1",
+        headers=user_2.headers,
+    )
+    assert response.status_code == 200
+
+
+def test_get_gifts_by_user_id_unauthorized(client, user_1, list_1):
+    response = client.get(
+        f"/api/user/{user_1.id}/list/{list_1}/gift?page=1&per_page=1",
+        headers=UNAUTHORIZED,
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize(
+    "invalid, query",
+    [
+        ("user", "page=1&per_page=1"),
+        ("list", "page=1&per_page=1"),
+        (None, "page=-1&per_page=-1"),
+    ],
+)
+def test_get_gifts_by_user_id_not_found(
+    client, user_1, user_2, list_1, gift_1, invalid, query
+):
+    user_id = INVALID_ID if invalid == "user" else user_1.id
+    list_id = INVALID_ID if invalid == "list" else list_1
+    response = client.get(
+        f"/api/user/{user_id}/list/{list_id}/gift?{query}", headers=user_2.headers
+    )
+    assert response.status_code == 404
+
+
+def test_get_gift_by_user_id(client, user_1, user_2, list_1, gift_1):
+    response = client.get(
+        f"/api/user/{user_1.id}/list/{list_1}/gift/{gift_1}", headers=user_2.headers
+    )
+    assert response.status_code == 200
+    assert response.get_json()["id"] == gift_1
+
+
+def test_get_gift_by_user_id_unauthorized(client, user_1, list_1, gift_1):
+    response = client.get(
+        f"/api/user/{user_1.id}/list/{list_1}/gift/{gift_1}", headers=UNAUTHORIZED
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("invalid", ["user", "list", "gift"])
+def test_get_gift_by_user_id_not_found(client, user_1, user_2, list_1, gift_1, invalid):
+    user_id = INVALID_ID if invalid == "user" else user_1.id
+    list_id = INVALID_ID if invalid == "list" else list_1
+    gift_id = INVALID_ID if invalid == "gift" else gift_1
+    response = client.get(
+        f"/api/user/{user_id}/list/{list_id}/gift/{gift_id}", headers=user_2.headers
+    )
+    assert response.status_code == 404
+
+
+def test_buy_gift(client, monkeypatch, user_1, user_2, user_3, list_1, gift_1):
+    forbid_save(monkeypatch)
+    url = f"/api/user/{user_1.id}/list/{list_1}/gift/{gift_1}/buy"
+    # the owner of the list can not buy its gifts
+    assert client.post(url, headers=user_1.headers).status_code == 400
+    assert client.post(url, headers=user_2.headers).status_code == 200
+    assert client.post(url, headers=UNAUTHORIZED).status_code == 401
+    # the gift is already reserved by another user
+    assert client.post(url, headers=user_3.headers).status_code == 409
+
+    gift = client.get(
+        f"/api/list/{list_1}/gift/{gift_1}", headers=user_1.headers
+    ).get_json()
+    assert gift["expected_buyer"]["id"] == user_2.id
+
+
+@pytest.mark.parametrize("invalid", ["user", "list", "gift"])
+def test_buy_gift_not_found(client, user_1, user_2, list_1, gift_1, invalid):
+    user_id = INVALID_ID if invalid == "user" else user_1.id
+    list_id = INVALID_ID if invalid == "list" else list_1
+    gift_id = INVALID_ID if invalid == "gift" else gift_1
+    response = client.post(
+        f"/api/user/{user_id}/list/{list_id}/gift/{gift_id}/buy",
+        headers=user_2.headers,
+    )
+    assert response.status_code == 404